@@ -0,0 +1,259 @@
+import queue
+import random
+import traceback
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from typing import Callable, Optional
+from fantasyenv import FantasyFootballEnv
+from fantasyDeepQNetwork import Agent
+from trainingloop import make_replay_buffer
+import events
+
+# exploration of actor i is base ** (1 + alpha * i / (num_actors - 1)), as in Ape-X
+actor_epsilon_base = 0.4
+actor_epsilon_alpha = 7
+# seconds the learner waits for transitions while the replay buffer is too small to sample
+transition_wait = 0.1
+
+
+def actor_epsilons(num_actors: int, base: float = actor_epsilon_base, alpha: float = actor_epsilon_alpha) -> list:
+    if num_actors == 1:
+        return [base]
+    return [base ** (1 + alpha * idx / (num_actors - 1)) for idx in range(num_actors)]
+
+
+class SharedWeights:
+    '''
+    Policy weights in shared memory tensors plus a version counter. The learner publishes its
+    state_dict, actors pull it into their own network whenever the version moved.
+    '''
+
+    def __init__(self, model: torch.nn.Module, ctx):
+        self.tensors = {key: value.detach().cpu().clone().share_memory_() for key, value in model.state_dict().items()}
+        self.version = ctx.Value('i', 0, lock=False)
+        self.lock = ctx.Lock()
+
+    def publish(self, model: torch.nn.Module):
+        with self.lock:
+            for key, value in model.state_dict().items():
+                self.tensors[key].copy_(value)
+            self.version.value += 1
+
+    def pull(self, model: torch.nn.Module, version: int) -> int:
+        '''
+        Loads the weights into model if they are newer than version and returns the version held by model.
+        '''
+        if self.version.value == version:
+            return version
+        with self.lock:
+            model.load_state_dict(self.tensors)
+            return self.version.value
+
+
+def seed_actor(seed: int):
+    '''
+    Sets up an actor process: one torch thread, seeded RNG streams and no simulator events.
+    '''
+    events.set_sink(events.NullSink())
+    torch.set_num_threads(1)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def play_leagues(env_args: tuple, agent: Agent, stopped: Callable[[], bool], sync: Callable[[], None], sync_interval: int,
+                 env: Optional[FantasyFootballEnv] = None):
+    '''
+    Plays leagues in env, or an env built from env_args, until stopped() and yields ('transition', (compact observation, action, reward,
+    next compact observation, done)) for every step, ('episode', score) for every finished league
+    and ('error', traceback) when a league fails, after which a fresh league is started.
+    sync is called every sync_interval steps to refresh the policy weights.
+    '''
+    steps = 0
+    while not stopped():
+        try:
+            if env is None:
+                env = FantasyFootballEnv(*env_args)
+            else:
+                env.reset()
+            env._run_draft()
+            done = False
+            score = 0
+            while not done and not stopped():
+                if steps % sync_interval == 0:
+                    sync()
+                observation = env.get_observation()
+                compact = env.observations.compact()
+                action = agent.choose_action(observation)
+                _, reward, done = env.step(action)
+                score += reward
+                steps += 1
+                yield 'transition', (compact, action, reward, env.observations.compact(), done)
+            if done:
+                yield 'episode', score
+        except Exception:
+            env = None
+            yield 'error', traceback.format_exc()
+
+
+def _actor(idx: int, env_args: tuple, agent_args: tuple, agent_kwargs: dict, weights: SharedWeights, transitions,
+           stop, seed: int, sync_interval: int):
+    '''
+    Plays leagues with a fixed epsilon and puts (kind, idx, data) messages of play_leagues on the queue.
+    '''
+    seed_actor(seed)
+    # the learner may exit before the queue is drained
+    transitions.cancel_join_thread()
+    agent = Agent(*agent_args, **agent_kwargs)
+    version = weights.pull(agent.Q, -1)
+
+    def sync():
+        nonlocal version
+        version = weights.pull(agent.Q, version)
+
+    try:
+        for kind, data in play_leagues(env_args, agent, stop.is_set, sync, sync_interval):
+            transitions.put((kind, idx, data))
+    except KeyboardInterrupt:
+        pass
+
+
+class ActorLearner:
+    '''
+    Ape-X style training on CPU: num_actors processes each play FantasyFootballEnv leagues with their
+    own epsilon (see actor_epsilons) and stream compact transitions to the learner, which fills a
+    replay buffer and learns continuously in this process. The learner publishes its weights every
+    publish_interval learn steps, actors pick them up every sync_interval env steps.
+    Actors send compact observations (see ObservationBuilder.compact), the replay buffer expands them
+    with the observation builder of a probe env. replay_dir keeps the replay on disk (MemmapReplayStore).
+    max_replay_ratio caps the sampled transitions per received transition, the learner waits for the
+    actors instead of overfitting the replay when it runs ahead of them.
+    '''
+
+    def __init__(self, num_actors: int, board_path, weekly_stats_path, weekly_info_path, lr: float = 0.001,
+                 buffer_size: int = 100000, batch_size: int = 32, publish_interval: int = 50, sync_interval: int = 16,
+                 replay_dir: Optional[str] = None, max_replay_ratio: Optional[float] = None, seed: Optional[int] = None,
+                 start_method: str = 'spawn', **agent_kwargs):
+        self.num_actors = num_actors
+        self.env_args = (board_path, weekly_stats_path, weekly_info_path)
+        self.batch_size = batch_size
+        self.publish_interval = publish_interval
+        self.sync_interval = sync_interval
+        self.replay_dir = replay_dir
+        self.max_replay_ratio = max_replay_ratio
+        self._ctx = mp.get_context(start_method)
+        self._next_seed = seed if seed is not None else int(np.random.randint(2**31 - num_actors))
+
+        self.probe = FantasyFootballEnv(*self.env_args)
+        space = self.probe.observation_space
+        self.agent_args = (space['stats'].shape, space['draftboard'].shape, space['roster'].shape,
+                           self.probe.action_space.n, lr)
+        self.agent_kwargs = agent_kwargs
+        self.agent = Agent(*self.agent_args, **agent_kwargs)
+        self.replay_buffer = make_replay_buffer(buffer_size, space, self.probe.observations, compact_replay=True,
+                                                replay_dir=replay_dir)
+        self.stop = self._ctx.Event()
+        self._make_transport()
+        self.processes = []
+        self.scores = []
+        self.errors = []
+        self.learn_steps = 0
+        self.received = 0
+
+    def _make_transport(self):
+        self.weights = SharedWeights(self.agent.Q, self._ctx)
+        self.transitions = self._ctx.Queue()
+
+    def _actor_process(self, idx: int, agent_kwargs: dict, seed: int):
+        return self._ctx.Process(target=_actor, daemon=True,
+                                 args=(idx, self.env_args, self.agent_args, agent_kwargs, self.weights,
+                                       self.transitions, self.stop, seed, self.sync_interval))
+
+    def start(self):
+        kwargs = dict(self.agent_kwargs, inference_backend=None)
+        for idx, epsilon in enumerate(actor_epsilons(self.num_actors) if self.num_actors else []):
+            process = self._actor_process(idx, dict(kwargs, epsilon=epsilon, eps_min=epsilon), self._next_seed + idx)
+            process.start()
+            self.processes.append(process)
+
+    def _next_message(self, block: bool):
+        '''
+        Returns the next (kind, actor, data) message of the actors or None once none arrived within transition_wait.
+        '''
+        try:
+            return self.transitions.get(block=block, timeout=transition_wait)
+        except queue.Empty:
+            return None
+
+    def _publish(self):
+        self.weights.publish(self.agent.Q)
+
+    def _receive(self, block: bool) -> int:
+        '''
+        Moves the received transitions into the replay buffer, returns the number of finished leagues.
+        '''
+        finished = 0
+        while True:
+            message = self._next_message(block)
+            if message is None:
+                return finished
+            kind, idx, data = message
+            block = False
+            if kind == 'transition':
+                self.replay_buffer.add(*data)
+                self.received += 1
+            elif kind == 'transitions':
+                # stacked transitions, see add_batch
+                self.replay_buffer.add_batch(*data)
+                self.received += len(data[1])
+            elif kind == 'episode':
+                self.scores.append(data)
+                print(f'Actor {idx}, Episode {len(self.scores) - 1}, Score: {data}')
+                finished += 1
+            else:
+                self.errors.append((idx, data))
+
+    def run(self, num_episodes: Optional[int] = None, max_learn_steps: Optional[int] = None) -> list:
+        '''
+        Learns until num_episodes leagues have finished or max_learn_steps learn steps were taken.
+        Returns the scores of the finished leagues.
+        '''
+        if not self.processes:
+            self.start()
+        while (num_episodes is None or len(self.scores) < num_episodes) and \
+                (max_learn_steps is None or self.learn_steps < max_learn_steps):
+            ready = self.replay_buffer.size() >= self.batch_size and \
+                (self.max_replay_ratio is None or self.learn_steps * self.batch_size < self.max_replay_ratio * self.received)
+            if self._receive(block=not ready) and self.replay_dir is not None:
+                self.replay_buffer.flush()
+            if not ready:
+                if self.processes and not any(process.is_alive() for process in self.processes):
+                    raise RuntimeError('All actors exited')
+                continue
+            self.agent.learn(self.replay_buffer.sample(self.batch_size))
+            self.learn_steps += 1
+            if self.learn_steps % self.publish_interval == 0:
+                self._publish()
+        return self.scores
+
+    def _close_transport(self):
+        pass
+
+    def close(self):
+        self.stop.set()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.processes = []
+        self._close_transport()
+        if self.replay_dir is not None:
+            self.replay_buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
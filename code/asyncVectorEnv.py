@@ -0,0 +1,220 @@
+import random
+import traceback
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Optional
+from fantasyenv import FantasyFootballEnv
+
+# seconds between liveness checks while waiting for a worker
+worker_poll_interval = 0.1
+
+
+def _close_blocks(blocks):
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            # observations handed out are still alive, the mapping goes away with them
+            pass
+
+
+def _worker(idx: int, pipe, parent_pipe, env_args: tuple, memory_specs: dict, seed: int):
+    '''
+    Runs one FantasyFootballEnv in a subprocess. Observations are written straight into row idx of
+    the shared memory blocks, only commands, rewards and done flags go over the pipe.
+    '''
+    parent_pipe.close()
+    random.seed(seed)
+    np.random.seed(seed)
+    blocks = {key: shared_memory.SharedMemory(name=name) for key, (name, _, _) in memory_specs.items()}
+    try:
+        env = FantasyFootballEnv(*env_args)
+        env.observations.use_buffers({key: np.ndarray(shape, dtype=dtype, buffer=blocks[key].buf)[idx]
+                                      for key, (_, shape, dtype) in memory_specs.items()})
+        while True:
+            command, data = pipe.recv()
+            if command == 'reset':
+                env.reset()
+                env._run_draft()
+                env.get_observation()
+                pipe.send(('ok', None))
+            elif command == 'step':
+                _, reward, done = env.step(data)
+                if done:
+                    env.reset()
+                    env._run_draft()
+                    env.get_observation()
+                pipe.send(('ok', (reward, done)))
+            elif command == 'close':
+                pipe.send(('ok', None))
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        # the league state can no longer be trusted, report and exit so the parent restarts the worker
+        pipe.send(('error', traceback.format_exc()))
+    finally:
+        env = None
+        pipe.close()
+        _close_blocks(blocks.values())
+
+
+class AsyncVectorEnv:
+    '''
+    Runs num_envs FantasyFootballEnv leagues in worker processes.
+    Observations live in multiprocessing.shared_memory blocks stacked like VectorEnv, so the
+    learner reads them without copying. step_async sends the actions and returns right away,
+    step_wait collects rewards and done flags.
+    A worker that raises or dies is restarted with a new league. Its league is reported as done
+    with reward 0 and its index is listed in restarted until the next step.
+    '''
+
+    def __init__(self, num_envs: int, board_path, weekly_stats_path, weekly_info_path, seed: Optional[int] = None,
+                 observation_tensors: bool = False, start_method: Optional[str] = None):
+        self.num_envs = num_envs
+        self.env_args = (board_path, weekly_stats_path, weekly_info_path)
+        self._ctx = mp.get_context(start_method)
+        self._next_seed = seed if seed is not None else int(np.random.randint(2**31 - num_envs * 1000))
+
+        # one env in this process gives the spaces and the buffer layout
+        probe = FantasyFootballEnv(*self.env_args)
+        self.single_observation_space = probe.observation_space
+        self.single_action_space = probe.action_space
+        self._blocks = {}
+        self.buffers = {}
+        self._memory_specs = {}
+        for key, buf in probe.observations.buffers.items():
+            shape = (num_envs,) + buf.shape
+            block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * buf.dtype.itemsize))
+            self._blocks[key] = block
+            self.buffers[key] = np.ndarray(shape, dtype=buf.dtype, buffer=block.buf)
+            self._memory_specs[key] = (block.name, shape, buf.dtype)
+        del probe
+
+        if observation_tensors:
+            import torch
+            self._views = {key: torch.from_numpy(buf) for key, buf in self.buffers.items()}
+        else:
+            self._views = self.buffers
+
+        self.pipes = [None] * num_envs
+        self.processes = [None] * num_envs
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.restarted = []
+        self.errors = []
+        self._waiting = False
+        self.closed = False
+        for idx in range(num_envs):
+            self._start_worker(idx)
+
+    def _start_worker(self, idx: int):
+        parent_pipe, child_pipe = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker, daemon=True,
+                                    args=(idx, child_pipe, parent_pipe, self.env_args, self._memory_specs, self._next_seed))
+        self._next_seed += 1
+        process.start()
+        child_pipe.close()
+        self.pipes[idx] = parent_pipe
+        self.processes[idx] = process
+
+    def _stop_worker(self, idx: int):
+        self.pipes[idx].close()
+        process = self.processes[idx]
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+    def _receive(self, idx: int):
+        '''
+        Waits for the reply of a worker. Returns None if the worker failed or died.
+        '''
+        pipe, process = self.pipes[idx], self.processes[idx]
+        while True:
+            try:
+                if pipe.poll(worker_poll_interval):
+                    status, data = pipe.recv()
+                    if status == 'ok':
+                        return status, data
+                    self.errors.append((idx, data))
+                    return None
+            except (EOFError, OSError):
+                return None
+            if not process.is_alive() and not pipe.poll():
+                return None
+
+    def _restart_worker(self, idx: int):
+        self._stop_worker(idx)
+        self._start_worker(idx)
+        self.pipes[idx].send(('reset', None))
+        if self._receive(idx) is None:
+            raise RuntimeError(f'Worker {idx} failed to restart: {self.errors[-1][1] if self.errors else "process died"}')
+        self.restarted.append(idx)
+
+    def _send(self, idx: int, message) -> bool:
+        try:
+            self.pipes[idx].send(message)
+            return True
+        except (BrokenPipeError, OSError):
+            return False
+
+    def reset(self) -> dict:
+        self.restarted = []
+        sent = [self._send(idx, ('reset', None)) for idx in range(self.num_envs)]
+        for idx in range(self.num_envs):
+            if not sent[idx] or self._receive(idx) is None:
+                self._restart_worker(idx)
+        return dict(self._views)
+
+    def step_async(self, actions):
+        if self._waiting:
+            raise RuntimeError('step_async called again before step_wait')
+        self.restarted = []
+        self._sent = [self._send(idx, ('step', int(actions[idx]))) for idx in range(self.num_envs)]
+        self._waiting = True
+
+    def step_wait(self):
+        '''
+        Returns the stacked observations and copies of the reward and done arrays.
+        '''
+        if not self._waiting:
+            raise RuntimeError('step_wait called without step_async')
+        for idx in range(self.num_envs):
+            reply = self._receive(idx) if self._sent[idx] else None
+            if reply is None:
+                self.rewards[idx] = 0
+                self.dones[idx] = True
+                self._restart_worker(idx)
+            else:
+                self.rewards[idx], self.dones[idx] = reply[1]
+        self._waiting = False
+        return dict(self._views), self.rewards.copy(), self.dones.copy()
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        if self._waiting:
+            for idx in range(self.num_envs):
+                self._receive(idx)
+        for idx in range(self.num_envs):
+            if self._send(idx, ('close', None)):
+                self._receive(idx)
+            self._stop_worker(idx)
+        # drop the numpy views before releasing the shared memory
+        self.buffers = {}
+        self._views = {}
+        _close_blocks(self._blocks.values())
+        for block in self._blocks.values():
+            block.unlink()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
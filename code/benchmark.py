@@ -0,0 +1,250 @@
+import gc
+import os
+import sys
+import copy
+import json
+import time
+import platform
+import argparse
+import numpy as np
+import events
+from typing import Callable, Optional
+from fantasyTeam import Team
+from draftSimulator import DraftSimulator
+from seasonSimulator import SeasonSimulator
+from fantasyenv import FantasyFootballEnv
+from fantasyDeepQNetwork import Agent
+from profiler import (bot_draft, random_league, simulate_season, play_episode, seed_everything, draft_rounds,
+                      default_board_path, default_weekly_stats_path, default_weekly_info_path)
+
+default_baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark-baseline.json')
+# a benchmark regresses when its tracked metric is more than threshold slower than the baseline. The
+# runs are deterministic, so the fastest run is the one least disturbed by other processes, and the
+# default threshold leaves room for the run to run noise of a shared machine
+tracked_metric = 'min'
+default_threshold = 0.5
+default_seed = 0
+# the league the micro benchmarks and the season run on
+fixture_league_size = 10
+fixture_week = 1
+roster_pick_columns = ['Position', 'Name', 'PickNumber', 'AverageDraftPositionPPR', 'Team', 'ByeWeek', 'PointsPerGame', 'Status']
+
+
+class Benchmark:
+    '''
+    A timed call: setup() builds the arguments of run untimed, then run(*arguments) is timed.
+    Every repeat starts from a fresh setup and the same seed, so runs are identical.
+    '''
+
+    def __init__(self, name: str, kind: str, setup: Callable[[], tuple], run: Callable, repeats: int):
+        self.name = name
+        self.kind = kind
+        self.setup = setup
+        self.run = run
+        self.repeats = repeats
+
+
+# fixtures are built once per process and deep copied by every setup
+_fixtures = {}
+
+
+def _fixture(name: str):
+    if name not in _fixtures:
+        seed_everything(default_seed)
+        _fixtures[name] = _fixture_builders[name]()
+    return copy.deepcopy(_fixtures[name])
+
+
+def _build_board() -> DraftSimulator:
+    my_team, league_members = random_league(fixture_league_size)
+    return DraftSimulator(default_board_path, my_team, league_members, fixture_league_size, draft_rounds,
+                          default_weekly_stats_path)
+
+
+def _build_season() -> SeasonSimulator:
+    draft = _fixture('drafted')
+    waiver_wire_df = draft.constructWaiverWire()
+    waiver_wire_df.drop(columns=['Rank'], inplace=True)
+    return SeasonSimulator(teams=draft.teams, weekly_info_path=default_weekly_info_path, waiver_wire_df=waiver_wire_df)
+
+
+def _build_season_week() -> SeasonSimulator:
+    '''
+    The season with the statuses and projections of fixture_week and the waiver wire needs of every team.
+    '''
+    season = _fixture('season')
+    season.update_player_status_points(fixture_week)
+    for team in season.teams:
+        team.determineWeekWaiverWireStatus()
+        team.updateRoster()
+    return season
+
+
+_fixture_builders = {
+    'board': _build_board,
+    'drafted': lambda: bot_draft(default_board_path, default_weekly_stats_path, fixture_league_size),
+    'season': _build_season,
+    'season_week': _build_season_week
+}
+
+
+def _setup_add_picks() -> tuple:
+    drafted = _fixture('drafted').teams[0].roster.dropna(subset=['Name']).sort_values('PickNumber')
+    return Team('Bench', 1), drafted[roster_pick_columns].values.tolist()
+
+
+def _add_picks(team: Team, picks: list):
+    for pick in picks:
+        team.addPickToRoster(*pick)
+
+
+def _setup_season_week() -> tuple:
+    return (_fixture('season_week'),)
+
+
+def _update_rosters(season: SeasonSimulator):
+    for team in season.teams:
+        team.updateRoster()
+
+
+def _determine_swaps(season: SeasonSimulator):
+    for team in season.teams:
+        season.waiverWire.determineSwaps(team)
+
+
+def _setup_team_points() -> tuple:
+    season = _fixture('season_week')
+    return season, season.weekly_info_df[season.weekly_info_df['Week'] == fixture_week]
+
+
+def _calculate_team_points(season: SeasonSimulator, week_points):
+    for team in season.teamNames:
+        season._calculate_team_points(team, week_points)
+
+
+def _select_top_players(draft: DraftSimulator):
+    # one early round where every team looks for a WR or RB
+    for team in draft.teams:
+        draft._selectTopPlayerByPositionSet({'WR', 'RB'}, team, 'early')
+        draft.currentPick += 1
+
+
+def _setup_episode() -> tuple:
+    env = FantasyFootballEnv(default_board_path, default_weekly_stats_path, default_weekly_info_path)
+    space = env.observation_space
+    agent = Agent(space['stats'].shape, space['draftboard'].shape, space['roster'].shape, env.action_space.n, 0.001)
+    return env, agent, False
+
+
+# python benchmark.py [names] [--kind micro|macro] compares against the baseline and exits 1 on a
+# regression, --save records the results as the new baseline
+benchmarks = [
+    Benchmark('addPickToRoster', 'micro', _setup_add_picks, _add_picks, 10),
+    Benchmark('updateRoster', 'micro', _setup_season_week, _update_rosters, 10),
+    Benchmark('determineSwaps', 'micro', _setup_season_week, _determine_swaps, 10),
+    Benchmark('_selectTopPlayerByPositionSet', 'micro', lambda: (_fixture('board'),), _select_top_players, 10),
+    Benchmark('_calculate_team_points', 'micro', _setup_team_points, _calculate_team_points, 10),
+    Benchmark('update_player_status_points', 'micro', lambda: (_fixture('season'), fixture_week),
+              SeasonSimulator.update_player_status_points, 5),
+    *[Benchmark(f'draft_{num_teams}', 'macro', lambda num_teams=num_teams: (default_board_path, default_weekly_stats_path, num_teams),
+                bot_draft, 3) for num_teams in [8, 10, 12]],
+    Benchmark('season', 'macro', lambda: (_fixture('drafted'), default_weekly_info_path), simulate_season, 3),
+    Benchmark('episode', 'macro', _setup_episode, play_episode, 2)
+]
+
+
+def run_benchmark(benchmark: Benchmark, repeats: Optional[int] = None, seed: int = default_seed) -> dict:
+    '''
+    Returns the median, min and max seconds of the timed runs of benchmark.
+    '''
+    times = []
+    with events.use_sink(events.NullSink()):
+        for _ in range(repeats if repeats is not None else benchmark.repeats):
+            arguments = benchmark.setup()
+            seed_everything(seed)
+            # as timeit, collections of garbage left by the setup or earlier runs are kept out of the timing
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                benchmark.run(*arguments)
+                times.append(time.perf_counter() - start)
+            finally:
+                gc.enable()
+    return {'median': float(np.median(times)), 'min': min(times), 'max': max(times), 'repeats': len(times)}
+
+
+def select(names: Optional[list] = None, kind: Optional[str] = None) -> list:
+    '''
+    Returns the benchmarks of kind whose name contains any of names.
+    '''
+    return [benchmark for benchmark in benchmarks if (kind is None or benchmark.kind == kind) and
+            (not names or any(name in benchmark.name for name in names))]
+
+
+def load_baseline(path: str = default_baseline_path) -> dict:
+    if not os.path.exists(path):
+        return {'threshold': default_threshold, 'benchmarks': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results: dict, path: str = default_baseline_path):
+    '''
+    Merges results into the baseline at path, benchmarks that did not run keep their baseline.
+    '''
+    baseline = load_baseline(path)
+    baseline['machine'] = {'python': platform.python_version(), 'platform': platform.platform(),
+                           'processor': platform.processor(), 'cpus': os.cpu_count()}
+    baseline['benchmarks'] = dict(baseline['benchmarks'], **results)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def compare(results: dict, baseline: dict, threshold: Optional[float] = None) -> list:
+    '''
+    Returns (name, baseline, result, relative change) of the tracked metric of every result that is more
+    than threshold slower than its baseline. Benchmarks missing from the baseline never regress.
+    '''
+    threshold = threshold if threshold is not None else baseline.get('threshold', default_threshold)
+    regressions = []
+    for name, result in results.items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None:
+            continue
+        change = result[tracked_metric] / reference[tracked_metric] - 1
+        if change > threshold:
+            regressions.append((name, reference[tracked_metric], result[tracked_metric], change))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Times the simulator hot paths against the committed baselines')
+    parser.add_argument('names', nargs='*', help='only run benchmarks whose name contains one of these')
+    parser.add_argument('--kind', choices=['micro', 'macro'])
+    parser.add_argument('--repeats', type=int, help='overrides the repeats of every benchmark')
+    parser.add_argument('--threshold', type=float, help='overrides the threshold of the baseline')
+    parser.add_argument('--baseline', default=default_baseline_path)
+    parser.add_argument('--save', action='store_true', help='writes the results to the baseline instead of comparing')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    for benchmark in select(args.names, args.kind):
+        results[benchmark.name] = run_benchmark(benchmark, args.repeats)
+        reference = baseline['benchmarks'].get(benchmark.name)
+        value = results[benchmark.name][tracked_metric]
+        change = f'{value / reference[tracked_metric] - 1:+.1%}' if reference else 'new'
+        print(f'{benchmark.name:32} {value:10.4f}s  {change}')
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f'Saved {len(results)} baselines to {args.baseline}')
+        sys.exit(0)
+    regressions = compare(results, baseline, args.threshold)
+    for name, reference, value, change in regressions:
+        print(f'REGRESSION {name}: {reference:.4f}s -> {value:.4f}s ({change:+.1%})')
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,288 @@
+import os
+import json
+import shutil
+import random
+import numpy as np
+import torch
+from typing import Optional
+from fantasyDeepQNetwork import Agent
+from replayBuffer import PrioritizedReplayBuffer
+from replayStore import MemmapReplayStore
+
+latest_filename = 'latest'
+agent_filename = 'agent.pt'
+rng_filename = 'rng.pt'
+state_filename = 'state.json'
+replay_dirname = 'replay'
+base_filename = 'base.json'
+
+
+def rng_state() -> dict:
+    state = {'python': random.getstate(), 'numpy': np.random.get_state(), 'torch': torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state: dict):
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+def agent_state(agent: Agent) -> dict:
+    return {
+        'Q': agent.Q.state_dict(),
+        'optimizer': agent.Q.optimizer.state_dict(),
+        'epsilon': agent.epsilon,
+        'eps_dec': agent.eps_dec,
+        'eps_min': agent.eps_min,
+        'learn_steps': agent.learn_steps
+    }
+
+
+def load_agent_state(agent: Agent, state: dict):
+    agent.Q.load_state_dict(state['Q'])
+    agent.Q.optimizer.load_state_dict(state['optimizer'])
+    agent.epsilon = state['epsilon']
+    agent.eps_dec = state['eps_dec']
+    agent.eps_min = state['eps_min']
+    agent.learn_steps = state['learn_steps']
+    if agent.inference_Q is not None:
+        agent.refresh_inference_model()
+
+
+def replay_arrays(replay_buffer) -> dict:
+    '''
+    Returns name -> numpy view of the slot arrays of a ReplayBuffer or CompactReplayBuffer, slots along the first axis.
+    '''
+    arrays = {}
+    for group in ['observations', 'next_observations']:
+        for key, value in getattr(replay_buffer, group).items():
+            arrays[f'{group}.{key}'] = value.numpy() if isinstance(value, torch.Tensor) else value
+    for name in ['actions', 'rewards', 'dones']:
+        value = getattr(replay_buffer, name)
+        arrays[name] = value.numpy() if isinstance(value, torch.Tensor) else value
+    return arrays
+
+
+def _slot_ranges(first: int, num: int, max_size: int) -> list:
+    '''
+    Returns the (start, stop) ranges of num ring slots starting at first.
+    '''
+    if num >= max_size:
+        return [(0, max_size)]
+    stop = first + num
+    if stop <= max_size:
+        return [(first, stop)]
+    return [(first, max_size), (0, stop - max_size)]
+
+
+def _number(name: str) -> int:
+    return int(name.split('-')[1])
+
+
+class Checkpointer:
+    '''
+    Periodic checkpoints of a training run in directory: agent weights, Adam state and epsilon schedule,
+    every RNG stream, the replay buffer and a JSON dict of counters (episode, scores, ...).
+    Each save goes to a new checkpoint-<n> directory that is renamed into place when complete, and the
+    latest file is then replaced atomically, so a crash leaves the previous checkpoint intact.
+    A checkpoint holds only the replay slots filled since the previous one, as delta .npy files, so a
+    save costs the new transitions rather than the buffer. The replay as of the oldest kept checkpoint
+    is a base under replay/, and the deltas of newer checkpoints are applied on top of it when loading.
+    A delta is folded into the base only once the checkpoints before it are pruned, so every kept
+    checkpoint can be restored. A MemmapReplayStore is already on disk and is only flushed.
+    '''
+
+    def __init__(self, directory: str, keep: int = 2):
+        self.directory = directory
+        self.keep = keep
+        self.last_saved_slots = 0
+        self._saved_added = None
+        os.makedirs(directory, exist_ok=True)
+
+    def latest(self) -> Optional[str]:
+        path = os.path.join(self.directory, latest_filename)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return os.path.join(self.directory, f.read().strip())
+
+    def _replay_path(self, name: str, checkpoint: Optional[str] = None) -> str:
+        '''
+        Returns the path of the base array name, or of its delta in the checkpoint directory.
+        '''
+        directory = self.directory if checkpoint is None else checkpoint
+        return os.path.join(directory, replay_dirname, f'{name}.npy')
+
+    def _base(self) -> Optional[str]:
+        '''
+        Returns the name of the checkpoint the base replay arrays hold, None before the first fold.
+        '''
+        path = os.path.join(self.directory, replay_dirname, base_filename)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)['checkpoint']
+
+    def _checkpoints(self) -> list:
+        return sorted(entry for entry in os.listdir(self.directory)
+                      if entry.startswith('checkpoint-') and not entry.endswith('.tmp'))
+
+    def _save_replay(self, replay_buffer, path: str) -> dict:
+        '''
+        Writes the slots filled since the previous checkpoint into path and returns the replay state.
+        '''
+        if isinstance(replay_buffer, MemmapReplayStore):
+            replay_buffer.flush()
+            return {'directory': os.path.abspath(replay_buffer.directory)}
+
+        os.makedirs(os.path.join(path, replay_dirname))
+        new = replay_buffer.added - self._saved_added if self._saved_added is not None else replay_buffer.max_size
+        ranges = _slot_ranges((replay_buffer.position - min(new, replay_buffer.max_size)) % replay_buffer.max_size,
+                              new, replay_buffer.max_size)
+        for name, array in replay_arrays(replay_buffer).items():
+            np.save(self._replay_path(name, path), np.concatenate([array[start:stop] for start, stop in ranges]))
+
+        state = {'position': replay_buffer.position, 'count': replay_buffer.count, 'added': replay_buffer.added,
+                 'ranges': ranges}
+        if isinstance(replay_buffer, PrioritizedReplayBuffer):
+            # the sum-tree is small next to the observations and is written whole
+            np.save(self._replay_path('priorities', path), replay_buffer.priorities.tree)
+            state.update(beta=replay_buffer.beta, max_priority=replay_buffer.max_priority)
+        return state
+
+    def _apply_delta(self, arrays: dict, checkpoint: str):
+        with open(os.path.join(checkpoint, state_filename)) as f:
+            ranges = json.load(f)['replay']['ranges']
+        for name, array in arrays.items():
+            delta = np.load(self._replay_path(name, checkpoint), mmap_mode='r')
+            offset = 0
+            for start, stop in ranges:
+                array[start:stop] = delta[offset:offset + stop - start]
+                offset += stop - start
+
+    def _fold(self, name: str):
+        '''
+        Applies the delta of checkpoint name to the base arrays. A crash midway leaves the base between
+        the two, which the delta, still applied on load, overwrites.
+        '''
+        checkpoint = os.path.join(self.directory, name)
+        os.makedirs(os.path.join(self.directory, replay_dirname), exist_ok=True)
+        with open(os.path.join(checkpoint, state_filename)) as f:
+            ranges = json.load(f)['replay']['ranges']
+        arrays = {}
+        for entry in os.listdir(os.path.join(checkpoint, replay_dirname)):
+            array_name = entry[:-len('.npy')]
+            if array_name == 'priorities':
+                continue
+            path = self._replay_path(array_name)
+            if os.path.exists(path):
+                arrays[array_name] = np.load(path, mmap_mode='r+')
+            else:
+                # the first checkpoint holds every slot
+                delta = np.load(self._replay_path(array_name, checkpoint), mmap_mode='r')
+                arrays[array_name] = np.lib.format.open_memmap(path, mode='w+', dtype=delta.dtype,
+                                                               shape=(ranges[0][1],) + delta.shape[1:])
+        self._apply_delta(arrays, checkpoint)
+        for array in arrays.values():
+            array.flush()
+        path = os.path.join(self.directory, replay_dirname, base_filename)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'checkpoint': name}, f)
+        os.replace(path + '.tmp', path)
+
+    def _load_replay(self, replay_buffer, state: dict, path: str):
+        if isinstance(replay_buffer, MemmapReplayStore):
+            replay_buffer.refresh()
+            return
+        name = os.path.basename(path)
+        base = self._base()
+        if base is not None and _number(name) < _number(base):
+            raise ValueError(f'Checkpoint {name} is older than the replay base {base}')
+        arrays = replay_arrays(replay_buffer)
+        if base is not None:
+            for array_name, array in arrays.items():
+                array[...] = np.load(self._replay_path(array_name), mmap_mode='r')
+        for checkpoint in self._checkpoints():
+            if (base is None or _number(checkpoint) > _number(base)) and _number(checkpoint) <= _number(name):
+                self._apply_delta(arrays, os.path.join(self.directory, checkpoint))
+        replay_buffer.position = state['position']
+        replay_buffer.count = state['count']
+        replay_buffer.added = state['added']
+        if isinstance(replay_buffer, PrioritizedReplayBuffer):
+            replay_buffer.priorities.tree[...] = np.load(self._replay_path('priorities', path))
+            replay_buffer.beta = state['beta']
+            replay_buffer.max_priority = state['max_priority']
+
+    def save(self, agent: Agent, replay_buffer, counters: dict) -> str:
+        '''
+        Writes a checkpoint and returns its directory. counters must be JSON serializable.
+        '''
+        previous = self.latest()
+        number = _number(os.path.basename(previous)) + 1 if previous is not None else 0
+        name = f'checkpoint-{number:06d}'
+        tmp_path = os.path.join(self.directory, name + '.tmp')
+        # left behind by a save that did not finish
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        torch.save(agent_state(agent), os.path.join(tmp_path, agent_filename))
+        torch.save(rng_state(), os.path.join(tmp_path, rng_filename))
+        state = {'counters': counters, 'replay': self._save_replay(replay_buffer, tmp_path)}
+        with open(os.path.join(tmp_path, state_filename), 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+        with open(os.path.join(self.directory, latest_filename + '.tmp'), 'w') as f:
+            f.write(name)
+        os.replace(os.path.join(self.directory, latest_filename + '.tmp'), os.path.join(self.directory, latest_filename))
+        if 'ranges' in state['replay']:
+            self.last_saved_slots = sum(stop - start for start, stop in state['replay']['ranges'])
+            self._saved_added = replay_buffer.added
+        self._prune(number)
+        return os.path.join(self.directory, name)
+
+    def _prune(self, number: int):
+        '''
+        Folds the deltas up to the oldest kept checkpoint into the base, then removes the checkpoints
+        older than the keep newest. A checkpoint whose delta is not in the base yet, e.g. after a crash
+        during a fold, is kept until a later fold covers it.
+        '''
+        base = self._base()
+        for entry in self._checkpoints():
+            has_delta = os.path.isdir(os.path.join(self.directory, entry, replay_dirname))
+            if has_delta and (base is None or _number(entry) > _number(base)) and _number(entry) <= number - self.keep + 1:
+                self._fold(entry)
+        base = self._base()
+        for entry in os.listdir(self.directory):
+            if not entry.startswith('checkpoint-'):
+                continue
+            if entry.endswith('.tmp'):
+                shutil.rmtree(os.path.join(self.directory, entry))
+                continue
+            folded = not os.path.isdir(os.path.join(self.directory, entry, replay_dirname)) or \
+                (base is not None and _number(entry) <= _number(base))
+            if folded and _number(entry) <= number - self.keep:
+                shutil.rmtree(os.path.join(self.directory, entry))
+
+    def load(self, agent: Agent, replay_buffer, checkpoint: Optional[str] = None) -> Optional[dict]:
+        '''
+        Restores checkpoint, a directory returned by save and the latest by default, into agent and
+        replay_buffer, sets the RNG streams and returns the saved counters, or None if there is no
+        checkpoint yet.
+        '''
+        path = self.latest() if checkpoint is None else checkpoint
+        if path is None:
+            return None
+        with open(os.path.join(path, state_filename)) as f:
+            state = json.load(f)
+        load_agent_state(agent, torch.load(os.path.join(path, agent_filename), weights_only=False))
+        self._load_replay(replay_buffer, state['replay'], path)
+        set_rng_state(torch.load(os.path.join(path, rng_filename), weights_only=False))
+        # the next delta builds on the latest checkpoint, an older one is followed by a full save
+        latest = os.path.abspath(path) == os.path.abspath(self.latest())
+        self._saved_added = state['replay'].get('added') if latest else None
+        return state['counters']
@@ -0,0 +1,179 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Optional
+from injuryIndex import InjuryIndex
+from vocabulary import build_vocabularies
+
+default_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+# columns of the weekly defense files that are kept as typed arrays
+defense_stat_columns = ['SACK', 'INT', 'FR', 'FF', 'DEF TD', 'SFTY', 'SPC TD', 'FPTS']
+defense_num_weeks = 18
+
+# the weekly defense files use a few abbreviations that differ from the ADP boards
+team_abbreviation_aliases = {'JAC': 'JAX'}
+
+
+class WeeklyDefense:
+    '''
+    Weekly DST actuals for a single season stored as (teams x weeks) arrays.
+    Row i of every array belongs to teams[i], column j to week j + 1.
+    Weeks where a team did not play (bye weeks) are 0 and flagged False in played.
+    rostered holds the ROST percentage, which is also reported for bye weeks.
+    '''
+
+    def __init__(self, season: int, teams: list, team_names: list, stats: dict, played: np.ndarray, rostered: np.ndarray):
+        self.season = season
+        self.teams = teams
+        self.team_names = team_names
+        self.stats = stats
+        self.played = played
+        self.rostered = rostered
+        self.num_weeks = played.shape[1]
+        self._team_lookup = {team: idx for idx, team in enumerate(teams)}
+        self._team_lookup.update({name: idx for idx, name in enumerate(team_names)})
+
+    def team_index(self, team: str) -> int:
+        '''
+        Returns the row of a team given either its abbreviation or its full name.
+        '''
+        team = team_abbreviation_aliases.get(team, team)
+        return self._team_lookup[team]
+
+    def stat(self, column: str) -> np.ndarray:
+        '''
+        Returns the (teams x weeks) array of a stat column.
+        '''
+        return self.stats[column]
+
+    def points(self, team: str, week: int) -> float:
+        '''
+        Returns the fantasy points a defense scored in a given week.
+        '''
+        return float(self.stats['FPTS'][self.team_index(team), week - 1])
+
+    def to_weekly_info(self) -> pd.DataFrame:
+        '''
+        Returns the played weeks in the same layout as simulator-weekly-info-*.csv
+        (Name, Position, Week, FantasyPoints).
+        '''
+        team_idx, week_idx = np.nonzero(self.played)
+        return pd.DataFrame({
+            'Name': np.asarray(self.team_names, dtype=object)[team_idx],
+            'Position': 'DST',
+            'Week': week_idx + 1,
+            'FantasyPoints': self.stats['FPTS'][team_idx, week_idx].astype(np.float64)
+        })
+
+    def apply_to_weekly_info(self, weekly_info_df: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Returns a copy of a weekly info dataframe where the DST FantasyPoints are
+        replaced by the actuals of this loader. Rows without a match are left untouched.
+        '''
+        res = weekly_info_df.copy()
+        dst_rows = (res['Position'] == 'DST').to_numpy()
+        team_idx = res.loc[dst_rows, 'Name'].map(self._team_lookup)
+        week_idx = res.loc[dst_rows, 'Week'].to_numpy() - 1
+        known = team_idx.notna().to_numpy() & (week_idx >= 0) & (week_idx < self.num_weeks)
+        team_idx = team_idx.to_numpy()[known].astype(int)
+        week_idx = week_idx[known]
+        matched = self.played[team_idx, week_idx]
+        rows = res.index[dst_rows][known][matched]
+        res.loc[rows, 'FantasyPoints'] = self.stats['FPTS'][team_idx[matched], week_idx[matched]].astype(np.float64)
+        return res
+
+
+def load_weekly_defense(data_dir: str, season: int, num_weeks: int = defense_num_weeks) -> WeeklyDefense:
+    '''
+    Parses data/defense_<season>/week<N>.csv for every week in one pass and pivots
+    them into a WeeklyDefense. Team identity is split out of strings like
+    "Dallas Cowboys (DAL)" and ROST is converted from a percent string.
+    '''
+    season_dir = os.path.join(data_dir, f'defense_{season}')
+    frames = []
+    for week in range(1, num_weeks + 1):
+        path = os.path.join(season_dir, f'week{week}.csv')
+        if not os.path.exists(path):
+            continue
+        week_df = pd.read_csv(path)
+        week_df['Week'] = week
+        frames.append(week_df)
+    if not frames:
+        raise FileNotFoundError(f'No weekly defense files found in {season_dir}')
+
+    df = pd.concat(frames, ignore_index=True)
+    # the exports end with blank rows
+    df = df.dropna(subset=['Player'])
+    identity = df['Player'].str.extract(r'^(?P<TeamName>.*) \((?P<Team>[A-Z]+)\)$')
+    df['TeamName'] = identity['TeamName']
+    df['Team'] = identity['Team'].replace(team_abbreviation_aliases)
+    df['ROST'] = df['ROST'].astype(str).str.rstrip('%').astype(float)
+
+    team_table = df[['Team', 'TeamName']].drop_duplicates('Team').sort_values('Team')
+    teams = team_table['Team'].tolist()
+    team_names = team_table['TeamName'].tolist()
+    team_codes = pd.Categorical(df['Team'], categories=teams).codes
+    week_codes = df['Week'].to_numpy() - 1
+
+    shape = (len(teams), num_weeks)
+    stats = {}
+    for col in defense_stat_columns:
+        arr = np.zeros(shape, dtype=np.float32)
+        arr[team_codes, week_codes] = df[col].to_numpy(dtype=np.float32)
+        stats[col] = arr
+    # bye weeks are exported as rows with G == 0
+    played = np.zeros(shape, dtype=bool)
+    played[team_codes, week_codes] = df['G'].to_numpy() > 0
+    rostered = np.zeros(shape, dtype=np.float32)
+    rostered[team_codes, week_codes] = df['ROST'].to_numpy(dtype=np.float32)
+
+    return WeeklyDefense(season, teams, team_names, stats, played, rostered)
+
+
+class DatasetStore:
+    '''
+    Loads the files under data/ once and keeps the parsed results cached so
+    environments and simulators that are rebuilt every episode can share them.
+    Cached objects are shared, so callers that mutate them must copy first.
+    '''
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir if data_dir is not None else default_data_dir
+        self._cache = {}
+
+    def _cached(self, key, loader):
+        if key not in self._cache:
+            self._cache[key] = loader()
+        return self._cache[key]
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.data_dir, filename)
+
+    def read_csv(self, filename: str) -> pd.DataFrame:
+        '''
+        Returns the cached contents of a csv under the data directory.
+        '''
+        return self._cached(('csv', filename), lambda: pd.read_csv(self.path(filename)))
+
+    def weekly_defense(self, season: int) -> WeeklyDefense:
+        '''
+        Returns the weekly DST actuals of a season.
+        '''
+        return self._cached(('weekly_defense', season), lambda: load_weekly_defense(self.data_dir, season))
+
+    def injury_index(self, filename: str = 'injuries(2021-2023).csv') -> InjuryIndex:
+        '''
+        Returns the injury report index, which parses the file on its first query.
+        '''
+        return self._cached(('injury_index', filename), lambda: InjuryIndex(self.path(filename)))
+
+    def vocabularies(self, board_filename: str, stats_filename: str) -> dict:
+        '''
+        Returns the categorical vocabularies of a draftboard and weekly stats file pair.
+        '''
+        return self._cached(('vocabularies', board_filename, stats_filename),
+                            lambda: build_vocabularies(self.read_csv(board_filename), self.read_csv(stats_filename)))
+
+    def clear(self):
+        self._cache.clear()
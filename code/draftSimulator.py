@@ -2,6 +2,7 @@ import pandas as pd
 from fantasyTeam import Team
 import torch
 from typing import Optional
+from events import emit, MySelection
 import numpy as np
 
 earlyRoundThreshold = 4
@@ -329,7 +330,7 @@ class DraftSimulator:
         
         self.draftBoard.loc[self.draftBoard['Name'] == player_name, 'Available'] = False
 
-        print(f"My selection at pick {self.currentPick}, round {self.currentRound}: {player_name}, {position}")
+        emit(MySelection, self.currentPick, self.currentRound, player_name, position)
         self.currentPick += 1
 
     def constructWaiverWire(self):
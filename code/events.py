@@ -0,0 +1,197 @@
+import json
+import collections
+import numpy as np
+import pandas as pd
+from typing import NamedTuple, Optional
+
+
+class PickMade(NamedTuple):
+    team: str
+    pick: int
+    round: int
+    player: str
+    position: str
+
+    def format(self) -> str:
+        return f'{self.team} selection at pick {self.pick}, round {self.round}: {self.player}, {self.position}'
+
+
+class MySelection(NamedTuple):
+    pick: int
+    round: int
+    player: str
+    position: str
+
+    def format(self) -> str:
+        return f'My selection at pick {self.pick}, round {self.round}: {self.player}, {self.position}'
+
+
+class PickFailed(NamedTuple):
+    team: str
+    pick: int
+    round: int
+
+    def format(self) -> str:
+        return 'error occurred in selecting draft pick'
+
+
+class InvalidAction(NamedTuple):
+    player: str
+    position: str
+
+    def format(self) -> str:
+        return f'model choice invalid action - {self.position} cannot be drafted'
+
+
+class MatchupResult(NamedTuple):
+    week: int
+    team1: str
+    team2: str
+    points1: float
+    points2: float
+
+    def format(self) -> str:
+        return f'Week {self.week} - {self.team1} vs {self.team2}: {self.points1} - {self.points2}'
+
+
+class WaiverTransaction(NamedTuple):
+    week: int
+    team: str
+    added: str
+    dropped: Optional[str]
+    position: str
+
+    def format(self) -> str:
+        dropped = f', dropped {self.dropped}' if self.dropped is not None else ''
+        return f'Week {self.week} - {self.team} added {self.added}, {self.position}{dropped}'
+
+
+class LineupSet(NamedTuple):
+    week: int
+    team: str
+    lineup: tuple
+
+    def format(self) -> str:
+        return f'Week {self.week} - {self.team} lineup: ' + ', '.join(f'{slot} {player}' for slot, player in self.lineup)
+
+
+class PlayoffResult(NamedTuple):
+    bracket: str
+    num_teams: int
+    team1: str
+    team2: str
+    winner: str
+
+    def format(self) -> str:
+        return f'{self.num_teams}-Player {self.bracket} Final: {self.team1} vs {self.team2} - Winner: {self.winner}'
+
+
+class SeasonFinished(NamedTuple):
+    standings: pd.DataFrame
+    playoff_standings: pd.DataFrame
+
+    def format(self) -> str:
+        return f'\nFinal Season Standings:\n{self.standings}\n\nFinal Playoff Standings:\n{self.playoff_standings}'
+
+
+def _json_value(value):
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict(orient='records')
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class NullSink:
+    '''
+    Drops every event, emit returns before the event is even built.
+    '''
+
+    def write(self, event):
+        pass
+
+
+class RingBufferSink:
+    '''
+    Keeps the last capacity events in memory.
+    '''
+
+    def __init__(self, capacity: int = 10000):
+        self.events = collections.deque(maxlen=capacity)
+
+    def write(self, event):
+        self.events.append(event)
+
+
+class JsonlSink:
+    '''
+    Appends every event to a JSON lines file as {'event': type name, **fields}.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def write(self, event):
+        self._file.write(json.dumps({'event': type(event).__name__, **event._asdict()}, default=_json_value) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class ConsoleSink:
+    '''
+    Prints the human readable form of every event, the behaviour of the simulators before events existed.
+    '''
+
+    def write(self, event):
+        print(event.format())
+
+
+_sink = ConsoleSink()
+
+
+def emit(event_type, *fields):
+    '''
+    Sends event_type(*fields) to the current sink. Events are only built, and only formatted by
+    the console sink, when the sink is not a NullSink.
+    '''
+    if type(_sink) is not NullSink:
+        _sink.write(event_type(*fields))
+
+
+def enabled() -> bool:
+    '''
+    Whether events are kept, for call sites that have to build their fields.
+    '''
+    return type(_sink) is not NullSink
+
+
+def get_sink():
+    return _sink
+
+
+def set_sink(sink):
+    '''
+    Replaces the sink of every event and returns the previous one.
+    '''
+    global _sink
+    previous = _sink
+    _sink = sink
+    return previous
+
+
+class use_sink:
+    '''
+    Context manager sending events to sink and restoring the previous sink afterwards.
+    '''
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        self.previous = set_sink(self.sink)
+        return self.sink
+
+    def __exit__(self, *args):
+        set_sink(self.previous)
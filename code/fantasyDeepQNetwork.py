@@ -1,8 +1,62 @@
+import copy
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import torch.optim as optim
 import numpy as np
+from typing import Dict, Optional
+from observationBuilder import draftboard_name_column
+from featureStore import stats_weeks, stats_pad_value
+from replayBuffer import stack_transitions
+from telemetry import timed
+
+
+def legal_action_mask(draftboard: torch.Tensor, action_mask: torch.Tensor, n_actions: int) -> torch.Tensor:
+    '''
+    Maps the candidate mask of a batch of observations onto a (batch x n_actions) mask over player codes.
+    '''
+    names = draftboard[..., draftboard_name_column].long()
+    legal = action_mask & (names >= 0)
+    mask = torch.zeros(names.shape[0], n_actions, dtype=torch.int32, device=names.device)
+    mask.scatter_add_(1, names.clamp(min=0), legal.int())
+    return mask > 0
+
+
+def action_slots(draftboard: torch.Tensor, actions: torch.Tensor) -> torch.Tensor:
+    '''
+    Returns the draftboard row of each action (a player code) in a batch of observations. Raises a
+    ValueError when an action is not a candidate of its observation, argmax would pick row 0 for it.
+    '''
+    names = draftboard[..., draftboard_name_column].long()
+    matches = names == actions.unsqueeze(-1)
+    missing = ~matches.any(dim=1)
+    if missing.any():
+        rows = missing.nonzero().flatten().tolist()
+        raise ValueError(f'Actions {actions[missing].tolist()} of batch rows {rows} are not on their draftboards')
+    return matches.int().argmax(dim=1)
+
+
+# Q network architectures of Agent: one output per player code or one per candidate slot
+architectures = ['dense', 'candidate']
+
+# inference copies of the Q network used by Agent.choose_actions
+inference_backends = ['script', 'compile', 'quantized']
+
+
+def make_inference_model(model: nn.Module, backend: str) -> nn.Module:
+    '''
+    Returns an eval mode copy of model for action selection: TorchScript ('script'), torch.compile ('compile')
+    or dynamically int8 quantized linear layers on the CPU ('quantized').
+    '''
+    if backend not in inference_backends:
+        raise ValueError(f'Unknown inference backend {backend}, expected one of {inference_backends}')
+    model = copy.deepcopy(model).eval()
+    if backend == 'script':
+        return torch.jit.script(model)
+    if backend == 'compile':
+        return torch.compile(model)
+    model.device = torch.device('cpu')
+    return torch.ao.quantization.quantize_dynamic(model.cpu(), {nn.Linear}, dtype=torch.qint8)
 
 class FantasyDeepQNetwork(nn.Module):
     def __init__(self, lr, n_actions, stats_dims, draftboard_dims, roster_dims):
@@ -30,7 +84,7 @@ class FantasyDeepQNetwork(nn.Module):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.to(self.device)
 
-    def forward(self, observations):
+    def forward(self, observations: Dict[str, torch.Tensor]):
         stats = observations['stats']
         draftboard = observations['draftboard']
         roster = observations['roster']
@@ -72,8 +126,74 @@ class FantasyDeepQNetwork(nn.Module):
         return actions
 
 
+class CandidateQNetwork(nn.Module):
+    '''
+    Scores every draftboard candidate with the same weights and returns one Q-value per candidate slot.
+    The weekly stat rows of a candidate are encoded row by row and mean pooled over the weeks played,
+    the roster rows are pooled the same way into a context shared by all candidates.
+    Stat block i (num_weeks rows) belongs to draftboard row i, which holds as long as the positions
+    with stats come first in the draftboard order; later candidates get an empty stats encoding.
+    The parameter count does not depend on the board size or the number of candidates.
+    '''
+
+    def __init__(self, lr, stats_dims, draftboard_dims, roster_dims, num_weeks: int = stats_weeks,
+                 pad_value: float = stats_pad_value, hidden: int = 64):
+        super(CandidateQNetwork, self).__init__()
+        self.num_weeks = num_weeks
+        self.pad_value = pad_value
+
+        self.stats_fc1 = nn.Linear(stats_dims[1], hidden // 2)
+        self.stats_fc2 = nn.Linear(hidden // 2, hidden // 2)
+        self.draftboard_fc = nn.Linear(draftboard_dims[1], hidden // 2)
+        self.candidate_fc = nn.Linear(hidden, hidden)
+
+        self.roster_fc1 = nn.Linear(roster_dims[1], hidden // 2)
+        self.roster_fc2 = nn.Linear(hidden // 2, hidden // 2)
+
+        self.fc1 = nn.Linear(hidden + hidden // 2, hidden)
+        self.fc2 = nn.Linear(hidden, 1)
+
+        self.optimizer = optim.Adam(self.parameters(), lr=lr)
+        self.loss = nn.MSELoss()
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.to(self.device)
+
+    def _pool(self, features: torch.Tensor, rows: torch.Tensor) -> torch.Tensor:
+        # mean over the rows that are not padding
+        present = (rows != self.pad_value).any(dim=-1, keepdim=True).to(features.dtype)
+        return (features * present).sum(dim=-2) / present.sum(dim=-2).clamp(min=1.0)
+
+    def forward(self, observations: Dict[str, torch.Tensor]):
+        stats = observations['stats']
+        draftboard = observations['draftboard']
+        roster = observations['roster']
+        batch_size, num_candidates = draftboard.shape[0], draftboard.shape[1]
+
+        # (batch, stats candidates, weeks, columns)
+        stats = stats.view(batch_size, -1, self.num_weeks, stats.shape[-1])
+        stats_out = F.relu(self.stats_fc2(F.relu(self.stats_fc1(stats))))
+        stats_out = self._pool(stats_out, stats)
+        stats_out = F.pad(stats_out, (0, 0, 0, num_candidates - stats_out.shape[1]))
+
+        draftboard_out = F.relu(self.draftboard_fc(draftboard))
+        candidates = F.relu(self.candidate_fc(torch.cat([draftboard_out, stats_out], dim=-1)))
+
+        roster_out = F.relu(self.roster_fc2(F.relu(self.roster_fc1(roster))))
+        context = self._pool(roster_out, roster)
+
+        combined = torch.cat([candidates, context.unsqueeze(1).expand(-1, num_candidates, -1)], dim=-1)
+        return self.fc2(F.relu(self.fc1(combined))).squeeze(-1)
+
+
 class Agent():
-    def __init__(self, stats_dims, draftboard_dims, roster_dims, n_actions, lr, gamma=0.99, epsilon=1.0, eps_dec=1e-5, eps_min=0.01):
+    '''
+    architecture 'dense' uses FantasyDeepQNetwork with one Q-value per player code, 'candidate' uses
+    CandidateQNetwork with one Q-value per draftboard row. Actions are player codes either way.
+    inference_backend selects a copy of the Q network for choose_actions (see make_inference_model),
+    refreshed from the learner weights every inference_refresh calls of learn. None uses Q itself.
+    '''
+    def __init__(self, stats_dims, draftboard_dims, roster_dims, n_actions, lr, gamma=0.99, epsilon=1.0, eps_dec=1e-5, eps_min=0.01,
+                 inference_backend: Optional[str] = None, inference_refresh: int = 100, architecture: str = 'dense'):
         self.lr = lr
         self.stats_dims = stats_dims
         self.draftboard_dims = draftboard_dims
@@ -84,89 +204,144 @@ class Agent():
         self.eps_dec = eps_dec
         self.eps_min = eps_min
 
-        self.Q = FantasyDeepQNetwork(self.lr, self.n_actions, self.stats_dims, self.draftboard_dims, self.roster_dims)
-
-    def choose_action(self, observations):
-        if np.random.random() > self.epsilon:
-            stats = observations['stats'].to_numpy()
-            draftboard = observations['draftboard'].to_numpy()
-            roster = observations['roster'].to_numpy()
-            stats_obs = torch.tensor(stats, dtype=torch.float32).to(self.Q.device)
-            draftboard_obs = torch.tensor(draftboard, dtype=torch.float32).to(self.Q.device)
-            roster_obs = torch.tensor(roster, dtype=torch.float32).to(self.Q.device)
-            obs = {
-                'stats': stats_obs,
-                'draftbord': draftboard_obs,
-                'roster': roster_obs
-            }
-            actions = self.Q.forward(obs)
-            action = torch.argmax(actions).item()
+        if architecture not in architectures:
+            raise ValueError(f'Unknown architecture {architecture}, expected one of {architectures}')
+        self.architecture = architecture
+        if architecture == 'candidate':
+            self.Q = CandidateQNetwork(self.lr, self.stats_dims, self.draftboard_dims, self.roster_dims)
+        else:
+            self.Q = FantasyDeepQNetwork(self.lr, self.n_actions, self.stats_dims, self.draftboard_dims, self.roster_dims)
+
+        self.inference_backend = inference_backend
+        self.inference_refresh = inference_refresh
+        self.learn_steps = 0
+        self.inference_Q = None
+        self.inference_device = self.Q.device
+        if inference_backend is not None:
+            self.refresh_inference_model()
+
+    def refresh_inference_model(self):
+        '''
+        Copies the learner weights into the inference model.
+        '''
+        if self.inference_backend == 'quantized' or self.inference_Q is None:
+            # quantized weights are packed when the copy is made
+            self.inference_Q = make_inference_model(self.Q, self.inference_backend)
+            self.inference_device = torch.device('cpu') if self.inference_backend == 'quantized' else self.Q.device
         else:
-            board = observations['draftboard']
-            action = np.random.choice(board['Name'])
+            # torch.compile wraps the copy, its weights live in the original module
+            model = getattr(self.inference_Q, '_orig_mod', self.inference_Q)
+            model.load_state_dict(self.Q.state_dict())
+
+    def _legal_candidates(self, observations) -> tuple:
+        names = np.asarray(observations['draftboard'])[..., draftboard_name_column].astype(np.int64)
+        legal = names >= 0
+        if 'action_mask' in observations:
+            mask = np.asarray(observations['action_mask'], dtype=bool)
+            # observations without any legal candidate (the draft is over) fall back to every listed name
+            legal &= mask | ~mask.any(axis=-1, keepdims=True)
+        return names, legal
+
+    @timed('choose_action')
+    def choose_actions(self, observations) -> np.ndarray:
+        '''
+        Returns one action per row of a batch of observations, e.g. the stacked observations of a VectorEnv.
+        Each row explores with probability epsilon, the others take the legal candidate with the highest Q-value.
+        '''
+        names, legal = self._legal_candidates(observations)
+        batch_size = names.shape[0]
+        actions = np.empty(batch_size, dtype=np.int64)
+
+        greedy = np.random.random(batch_size) > self.epsilon
+        for idx in np.flatnonzero(~greedy):
+            actions[idx] = np.random.choice(names[idx][legal[idx]])
+
+        if greedy.any():
+            rows = np.flatnonzero(greedy)
+            all_rows = len(rows) == batch_size
+            model = self.inference_Q if self.inference_Q is not None else self.Q
+            with torch.inference_mode():
+                obs = {key: torch.as_tensor(observations[key] if all_rows else np.asarray(observations[key])[rows],
+                                            dtype=torch.float32, device=self.inference_device)
+                       for key in ['stats', 'draftboard', 'roster']}
+                q_values = model(obs)
+                # only the Q-values of legal candidates are compared
+                legal_rows = torch.as_tensor(legal[rows], device=self.inference_device)
+                if self.architecture == 'candidate':
+                    slots = q_values.masked_fill(~legal_rows, float('-inf')).argmax(dim=1).cpu().numpy()
+                    actions[rows] = names[rows, slots]
+                else:
+                    legal_mask = legal_action_mask(obs['draftboard'], legal_rows, self.n_actions)
+                    actions[rows] = q_values.masked_fill(~legal_mask, float('-inf')).argmax(dim=1).cpu().numpy()
+
+        return actions
 
-        return action
+    def choose_action(self, observations):
+        batch = {key: np.asarray(value)[None] for key, value in observations.items()}
+        return int(self.choose_actions(batch)[0])
     
     def decrement_epsilon(self):
         self.epsilon = (self.epsilon - self.eps_dec) if self.epsilon > self.eps_min else self.eps_min
 
     # working on learn
 
+    @timed('learn')
     def learn(self, batch):
-        observations, actions, rewards, next_observations, dones = zip(*batch)
+        '''
+        Takes a batch from ReplayBuffer.sample or a list of (observation, action, reward, next_observation, done) tuples.
+        Returns the absolute TD errors of the batch, used as priorities by PrioritizedReplayBuffer.
+        '''
+        if not isinstance(batch, dict):
+            batch = stack_transitions(batch)
 
         # Perform gradient descent
         self.Q.optimizer.zero_grad()
 
-        def totuple(a):
-            try:
-                return tuple(totuple(i) for i in a)
-            except TypeError:
-                return a
-
-        arr = [obs['stats'].to_numpy() for obs in observations]
-
-        test = np.stack(arr).astype(np.float32)
-        # print(f'test is \n {test.shape}')
-
-        # linearize obs space
-        stats_tensor = torch.from_numpy(np.stack([obs['stats'].to_numpy() for obs in observations]).astype(np.float32))
-        draftboard_tensor = torch.from_numpy(np.stack([obs['draftboard'].to_numpy() for obs in observations]).astype(np.float32))
-        roster_tensor = torch.from_numpy(np.stack([obs['roster'].to_numpy() for obs in observations]).astype(np.float32))
-
-        next_stats_tensor = torch.from_numpy(np.stack([obs['stats'].to_numpy() for obs in next_observations]).astype(np.float32))
-        next_draftboard_tensor = torch.from_numpy(np.stack([obs['draftboard'].to_numpy() for obs in next_observations]).astype(np.float32))
-        next_roster_tensor = torch.from_numpy(np.stack([obs['roster'].to_numpy() for obs in next_observations]).astype(np.float32))
-
-        processed_obs = {
-            'stats': stats_tensor,
-            'draftboard': draftboard_tensor,
-            'roster': roster_tensor
-        }
-
-        processed_next_obs = {
-            'stats': next_stats_tensor,
-            'draftboard': next_draftboard_tensor,
-            'roster': next_roster_tensor
-        }
-        # print(f'action shape: {np.array(actions)}')
-        actions = torch.tensor(np.array(actions), dtype=torch.long).to(self.Q.device)
-        rewards = torch.tensor(np.array(rewards), dtype=torch.float32).to(self.Q.device)
-        dones = torch.tensor(np.array(dones), dtype=torch.bool).to(self.Q.device)
+        processed_obs = {key: batch['observations'][key].to(self.Q.device) for key in ['stats', 'draftboard', 'roster']}
+        processed_next_obs = {key: batch['next_observations'][key].to(self.Q.device) for key in ['stats', 'draftboard', 'roster']}
+        actions = batch['actions'].to(self.Q.device)
+        rewards = batch['rewards'].to(self.Q.device)
+        dones = batch['dones'].to(self.Q.device)
 
         # Compute predicted Q-values
         # interim =  self.Q.forward(processed_obs)
         # print(f'shape of interim is {interim.shape}')
+        if self.architecture == 'candidate':
+            # the network scores draftboard rows, the stored actions are player codes
+            actions = action_slots(processed_obs['draftboard'], actions)
         q_pred = self.Q.forward(processed_obs).gather(1, actions.unsqueeze(-1)).squeeze(-1)
 
         # Compute target Q-values
-        q_next = self.Q.forward(processed_next_obs).max(dim=1)[0]
+        q_next_all = self.Q.forward(processed_next_obs)
+        next_mask = None
+        if self.architecture == 'candidate':
+            next_mask = processed_next_obs['draftboard'][..., draftboard_name_column] >= 0
+            if 'action_mask' in batch['next_observations']:
+                next_mask &= batch['next_observations']['action_mask'].to(self.Q.device)
+        elif 'action_mask' in batch['next_observations']:
+            next_mask = legal_action_mask(processed_next_obs['draftboard'],
+                                          batch['next_observations']['action_mask'].to(self.Q.device), self.n_actions)
+        if next_mask is not None:
+            q_next = q_next_all.masked_fill(~next_mask, float('-inf')).max(dim=1)[0]
+            # next states without legal candidates have no bootstrap value
+            q_next = torch.where(next_mask.any(dim=1), q_next, torch.zeros_like(q_next))
+        else:
+            q_next = q_next_all.max(dim=1)[0]
         q_target = rewards + self.gamma * q_next * (~dones)
 
         # Compute the loss
-        loss = self.Q.loss(q_pred, q_target).to(self.Q.device)
+        td_errors = q_target - q_pred
+        if 'weights' in batch:
+            # importance sampling weights of a prioritized replay buffer
+            loss = (batch['weights'].to(self.Q.device) * td_errors.pow(2)).mean()
+        else:
+            loss = self.Q.loss(q_pred, q_target).to(self.Q.device)
 
         loss.backward()
         self.Q.optimizer.step()
 
         self.decrement_epsilon()
+        self.learn_steps += 1
+        if self.inference_Q is not None and self.learn_steps % self.inference_refresh == 0:
+            self.refresh_inference_model()
+        return td_errors.detach().abs().cpu()
@@ -5,9 +5,15 @@ import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
 import os
-from sklearn.preprocessing import LabelEncoder
 import pandas as pd
 from draftSimulator import max_positions
+from featureStore import PlayerFeatureStore, load_position_aggregates, stats_weeks
+from observationBuilder import ObservationBuilder, draftboard_name_column
+from datasetStore import DatasetStore
+from vocabulary import Vocabulary
+from typing import Optional
+from telemetry import timed
+from events import emit, InvalidAction, PickFailed, PickMade
 pd.options.mode.chained_assignment = None 
 
 pos_to_fantpos_mapping = {
@@ -20,12 +26,21 @@ pos_to_fantpos_mapping = {
 }
 
 positions = ['QB', 'RB', 'WR', 'TE', 'K', 'DST']
+# positions with weekly stat rows, K and DST candidates have no stats observation
+stats_positions = ['QB', 'RB', 'WR', 'TE']
+candidates_per_position = 10
 fant_positions = ['QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'K', 'DST', 'BE1', 'BE2', 'BE3', 'BE4', 'BE5', 'BE6', 'BE7']
+fant_position_vocabulary = Vocabulary.from_values(fant_positions)
+
+# roster rows a pick of each position can start in, and the bench rows
+position_active_slots = {pos: [fant_positions.index(slot) for slot in slots] for pos, slots in pos_to_fantpos_mapping.items()}
+bench_slots = [idx for idx, slot in enumerate(fant_positions) if slot.startswith('BE')]
 
 class FantasyFootballEnv(gym.Env):
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, board_path, weekly_stats_path, weekly_info_path, team_name=None, team_pick=None, leagueMembers=None):
+    def __init__(self, board_path, weekly_stats_path, weekly_info_path, team_name=None, team_pick=None, leagueMembers=None,
+                 observation_tensors=False, store: Optional[DatasetStore] = None):
         '''
         There are two modes that the FantasyFootballEnv can be utilized. 
 
@@ -34,6 +49,12 @@ class FantasyFootballEnv(gym.Env):
 
         2) Do not input a team_name, team_pick, or leagueMembers parameters and utilize the environment
         as a random generator of leagues. 
+
+        Observations are float32 numpy arrays, or torch tensors if observation_tensors is set, whose
+        buffers are reused between steps.
+
+        Categorical columns are encoded with fixed vocabularies cached by store (by default a
+        DatasetStore over the directory of board_path), so codes are the same in every episode.
         '''
         super(FantasyFootballEnv, self).__init__()
 
@@ -44,6 +65,7 @@ class FantasyFootballEnv(gym.Env):
         self.current_dir = os.getcwd()
         self.data_dir = os.path.join(self.current_dir, '..', 'data')
         self.weekly_info_path = weekly_info_path
+        self.store = store if store is not None else DatasetStore(os.path.dirname(board_path))
 
         if team_name is not None and team_pick is not None and leagueMembers is not None:
             self.team: Team = Team(team_name, team_pick)
@@ -73,8 +95,8 @@ class FantasyFootballEnv(gym.Env):
 
         # define action and obs space
 
-        stats_low = np.ones(((len(positions)-2)*10*21, 48)) * -100
-        stats_high = np.ones(((len(positions)-2)*10*21, 48)) * 1000
+        stats_low = np.ones((len(stats_positions)*candidates_per_position*stats_weeks, 48)) * -100
+        stats_high = np.ones((len(stats_positions)*candidates_per_position*stats_weeks, 48)) * 1000
 
         draftboard_low = np.zeros((len(positions)*10, 9))
         draftboard_high = np.ones((len(positions)*10, 9)) * 2500
@@ -83,30 +105,25 @@ class FantasyFootballEnv(gym.Env):
         roster_high = np.ones((len(self.team.roster), len(self.team.roster.columns))) * 2500
 
 
+        # action_mask flags the draftboard rows that are legal picks for the agent
         self.observation_space = spaces.Dict({
             'stats': spaces.Box(low=stats_low, high=stats_high, dtype=np.float32),
             'draftboard': spaces.Box(low=draftboard_low, high=draftboard_high, dtype=np.float32),
-            'roster': spaces.Box(low=roster_low, high=roster_high, dtype=np.float32)
+            'roster': spaces.Box(low=roster_low, high=roster_high, dtype=np.float32),
+            'action_mask': spaces.MultiBinary(len(positions)*candidates_per_position)
         })
+        self.observations = ObservationBuilder(self.observation_space, candidates_per_position,
+                                               as_tensor=observation_tensors)
 
-        self.shared_label_encoders = {
-            'Name': LabelEncoder(),
-            'Position': LabelEncoder(),
-            'Team': LabelEncoder(),
-            'Status': LabelEncoder(),
-            'FantasyPosition': LabelEncoder(),
-            'player_display_name': LabelEncoder(),
-            'recent_team': LabelEncoder(),
-            'season_type': LabelEncoder(),
-            'opponent_team': LabelEncoder()
+        self.vocabularies: dict[str, Vocabulary] = {
+            **self.store.vocabularies(os.path.basename(board_path), os.path.basename(weekly_stats_path)),
+            'FantasyPosition': fant_position_vocabulary
         }
 
-        # fit on fant positions for later usage
-        self.shared_label_encoders['FantasyPosition'].fit(fant_positions)
-
         # creates instance variables stats_ and draftBoard_ that are ready to use for torch
-        # update_draftBoard will need to be called right before an action is needed to be taken
+        # encoding only happens here, reset starts from a copy of the encoded draftboard
         self._process_data()
+        self._reset_draftboard()
 
         self.action_space = spaces.Discrete(len(self.draftBoard_))
 
@@ -115,24 +132,19 @@ class FantasyFootballEnv(gym.Env):
         self.update_round_info = False
         self.state = self._get_state()
 
-    def update_action_space(self, obs: pd.DataFrame):
+    def update_action_space(self, obs: np.ndarray):
         '''
         Updates the action space - removes drafted players from the agent's action space 
         '''
-        self.action_space = spaces.Discrete(obs.shape[0])
+        self.action_space = spaces.Discrete(int((obs[:, draftboard_name_column] >= 0).sum()))
 
-    def _encode_categorical_data_with_shared_encoders(self, df: pd.DataFrame, columns):
+    def _encode_categorical_data(self, df: pd.DataFrame, columns):
         """
-        Encodes the categorical columns using shared label encoders across all dataframes.
+        Encodes the categorical columns using the vocabularies shared across all dataframes.
         """
         res = df.copy(deep=True)
         for col in columns:
-            le = self.shared_label_encoders[col]
-            # Fit encoder if not already fitted
-            if not hasattr(le, 'classes_') or le.classes_.size == 0:
-                res[col] = le.fit_transform(df[col].astype(str))
-            else:
-                res[col] = le.transform(df[col].astype(str))
+            res[col] = self.vocabularies[col].encode(df[col])
         return res
     
     def _process_data(self):
@@ -153,12 +165,21 @@ class FantasyFootballEnv(gym.Env):
         # encode stats
         self.stats_ = self.draft.stats.copy(deep=True)
 
-        for original_col, encoder_key in categorical_columns_stats_mapping.items():
-            le = self.shared_label_encoders[encoder_key]
-            if not hasattr(le, 'classes_') or le.classes_.size == 0:
-                self.stats_[original_col] = le.fit_transform(self.stats_[original_col].astype(str))
-            else:
-                self.stats_[original_col] = le.transform(self.stats_[original_col].astype(str))
+        for original_col, vocabulary_key in categorical_columns_stats_mapping.items():
+            self.stats_[original_col] = self.vocabularies[vocabulary_key].encode(self.stats_[original_col])
+
+        self._build_feature_store()
+
+    def _build_feature_store(self):
+        '''
+        Builds the per player stat blocks gathered by get_observation
+        '''
+        descriptive_path = os.path.join(os.path.dirname(self.weekly_stats_path), 'players_historic_descriptive_stats.csv')
+        season = int(self.draft.stats['season'].iloc[0])
+        aggregates = load_position_aggregates(descriptive_path, season)
+        self.feature_store = PlayerFeatureStore(self.stats_, 'player_display_name',
+                                                num_players=len(self.vocabularies['Name']),
+                                                positions=self.draft.stats['position'], aggregates=aggregates)
 
     def _process_draftboard(self):
         '''
@@ -167,13 +188,24 @@ class FantasyFootballEnv(gym.Env):
         # column to encode
         categorical_columns_draftboard = ['Name', 'Team', 'Position', 'Status']
 
-        # Encode draftboard dataframe using shared encoders
-        self.draftBoard_ = self._encode_categorical_data_with_shared_encoders(
+        # Encode draftboard dataframe using the shared vocabularies
+        self._encoded_draftBoard = self._encode_categorical_data(
             self.draft.draftBoard, categorical_columns_draftboard
         )
         # convert position rank to float type
-        self._keep_only_numeric_and_convert_to_float(self.draftBoard_, 'PositionRank')
-        self.draftBoard_['Available'] = self.draftBoard_['Available'].astype(int)
+        self._keep_only_numeric_and_convert_to_float(self._encoded_draftBoard, 'PositionRank')
+        self._encoded_draftBoard['Available'] = self._encoded_draftBoard['Available'].astype(int)
+        self._position_by_name = np.full(len(self.vocabularies['Name']), -1, dtype=np.intp)
+        self._position_by_name[self._encoded_draftBoard['Name'].to_numpy()] = self._encoded_draftBoard['Position'].to_numpy()
+
+    def _reset_draftboard(self):
+        '''
+        Restores the encoded draftboard with every player available
+        '''
+        self.draftBoard_ = self._encoded_draftBoard.copy()
+        self.observations.load(self.draftBoard_, self.feature_store,
+                               self.vocabularies['Position'].encode(positions),
+                               self.vocabularies['Position'].encode(stats_positions))
 
     def _keep_only_numeric_and_convert_to_float(self, df: pd.DataFrame, col_name):
         '''
@@ -189,24 +221,29 @@ class FantasyFootballEnv(gym.Env):
     def _update_roster(self):
         categorical_columns_roster = ['FantasyPosition', 'Name', 'Position', 'Team', 'Status']
         roster = self.team.roster.dropna()
-        self.roster_ = self._encode_categorical_data_with_shared_encoders(
+        self.roster_ = self._encode_categorical_data(
             roster, categorical_columns_roster
         )
+        self.observations.set_roster(self.roster_.to_numpy(dtype=np.float32))
+        self._slot_filled = self.team.roster['Name'].notna().to_numpy()
 
-        fixed_roster_size = len(self.team.roster)  # Example fixed size
-        current_size = self.roster_.shape[0]
-
-        if current_size < fixed_roster_size:
-            # Create a DataFrame with -1 values for missing rows
-            num_missing_rows = fixed_roster_size - current_size
-            columns = self.roster_.columns
-            
-            # Create a DataFrame of -1s for the missing rows
-            missing_rows = pd.DataFrame(-1, index=range(num_missing_rows), columns=columns)
-            
-            # Concatenate the missing rows to the existing roster_
-            self.roster_ = pd.concat([self.roster_, missing_rows], ignore_index=True)
-        
+    def _update_legal_positions(self):
+        '''
+        Flags the positions the agent can draft with its current pick: below max_positions, among the
+        positions required to fill the roster in the remaining rounds and with an open roster spot.
+        Once the draft is over any action moves on to the season, so every position is legal.
+        '''
+        legal = self.observations.legal_positions
+        if self.draft.currentRound > self.draft.numRounds:
+            legal.fill(True)
+            return
+        remaining_rounds = self.draft.numRounds - self.draft.currentRound + 1
+        required_positions_set = self.draft._determineRequiredPositions(self.team, remaining_rounds)
+        bench_full = self._slot_filled[bench_slots].all()
+        for idx, pos in enumerate(positions):
+            legal[idx] = (self.team.posFreqMap[pos] < max_positions[pos]
+                          and (len(required_positions_set) == 0 or pos in required_positions_set)
+                          and not (bench_full and self._slot_filled[position_active_slots[pos]].all()))
     
     def _get_state(self):
         self._update_roster()
@@ -216,57 +253,14 @@ class FantasyFootballEnv(gym.Env):
             'roster': self.roster_
         }
     
-    def _pad_dataframe(self, df, target_shape):
-        """
-        Pads the DataFrame `df` with -1s to match the target_shape while keeping it as a DataFrame.
-        """
-        current_shape = df.shape
-        if current_shape[0] < target_shape[0]:
-            # Create padding DataFrame with -1s
-            padding = pd.DataFrame(
-                -1, 
-                index=range(target_shape[0] - current_shape[0]), 
-                columns=df.columns
-            )
-            # Concatenate the original DataFrame with the padding
-            padded_df = pd.concat([df, padding], ignore_index=True)
-        else:
-            padded_df = df
-
-        return padded_df
-    
+    @timed('get_observation')
     def get_observation(self):
-        draftboard_df = self.state['draftboard']
-        
-        filter_draftboard_df = draftboard_df[draftboard_df['Available'] == 1]
-        top_players = []
-
-        # Iterate over each position and get the top 10 players for each
-        for pos in positions:
-            pos_encoding = self.shared_label_encoders['Position'].transform([pos])[0]
-            top_players_pos = filter_draftboard_df[filter_draftboard_df['Position'] == pos_encoding].head(10)
-            top_players.append(top_players_pos)
-
-        # Combine all top players into a single DataFrame
-        draftboard_obs = pd.concat(top_players)
-
-        self.update_action_space(draftboard_obs)
-
-        roster_obs = self.state['roster']
-        draftboard_names = draftboard_obs['Name']
-        # fix stats obs --> wrong bc draft and stats have different labels
-        stats_obs = self.stats_[self.stats_['player_display_name'].isin(draftboard_names)]
-
-        stats_obs = self._pad_dataframe(stats_obs, self.observation_space['stats'].shape)
-        draftboard_obs = self._pad_dataframe(draftboard_obs, self.observation_space['draftboard'].shape)
-        roster_obs = self._pad_dataframe(roster_obs, self.observation_space['roster'].shape)
-
-        return {
-            'stats': stats_obs,
-            'draftboard': draftboard_obs,
-            'roster': roster_obs
-        }
+        self._update_legal_positions()
+        observation = self.observations.build()
+        self.update_action_space(observation['draftboard'])
+        return observation
     
+    @timed('run_draft')
     def _run_draft(self):
         agent_team_name = self.team.name 
 
@@ -290,11 +284,12 @@ class FantasyFootballEnv(gym.Env):
                         player_name, playerTeam, position, byeWeek, status, avgadp = response
                         team.addPickToRoster(position, player_name, self.draft.currentPick,
                                             avgadp, playerTeam, byeWeek, 0, status)
-                        print(f"{team.name} selection at pick {self.draft.currentPick}, round {self.draft.currentRound}: {player_name}, {position}")
-                        player_name_encoding = self.shared_label_encoders['Name'].transform([player_name])[0]
+                        emit(PickMade, team.name, self.draft.currentPick, self.draft.currentRound, player_name, position)
+                        player_name_encoding = self.vocabularies['Name'].code(player_name)
                         self.draftBoard_.loc[self.draftBoard_['Name'] == player_name_encoding, 'Available'] = 0
+                        self.observations.mark_unavailable(player_name_encoding)
                     else:
-                        print('error occurred in selecting draft pick')
+                        emit(PickFailed, team.name, self.draft.currentPick, self.draft.currentRound)
                     self.draft.currentPick += 1
             self.draft.currentRound += 1
             self.snake.reverse()
@@ -308,43 +303,21 @@ class FantasyFootballEnv(gym.Env):
 
         if self.draft.currentRound <= self.draft.numRounds:
             # enough draft capital
-            player_name = self.shared_label_encoders['Name'].inverse_transform([action])[0]
-            player_position = self.draft.draftBoard.loc[self.draft.draftBoard['Name'] == player_name, 'Position'].values[0]
-            if self.team.posFreqMap[player_position] >= max_positions[player_position]:
-                # Invalid action because it violates the max_positions constraint
+            player_name = self.vocabularies['Name'].label(action)
+            player_position = self.vocabularies['Position'].label(self._position_by_name[action])
+            if not self.observations.legal_positions[positions.index(player_position)]:
+                # Invalid action because it violates the max_positions constraint, the required_positions
+                # constraint or there is no room in the roster for the position
+                emit(InvalidAction, player_name, player_position)
                 reward -= 10  # Penalize for invalid action
                 self.current_step += 1
                 return observation, reward, done
             
-            # Check required positions for the remaining rounds
-            remaining_rounds = self.draft.numRounds - self.draft.currentRound + 1
-            required_positions_set = self.draft._determineRequiredPositions(self.team, remaining_rounds)
-
-            if len(required_positions_set) > 0 and player_position not in required_positions_set:
-                print(f'model choice invalid action - {required_positions_set}')
-                # Invalid action because it violates the required_positions constraint
-                reward -= 10  # Penalize for invalid action
-                self.current_step += 1
-                return observation, reward, done
-            
-            # add case where bench is full and player chosen does not add to active roster
-            fant_positions = pos_to_fantpos_mapping[player_position]
-            available_in_active = False
-            for fant_pos in fant_positions:
-                if pd.isna(self.team.roster.loc[self.team.roster['FantasyPosition'] == fant_pos, 'Name'].values[0]):
-                    available_in_active = True
-                    break
-            if self.team.isBenchFull() and not available_in_active:
-                # invalid action because there is no space
-                print(f'model choice invalid action - not enough room in roster for pick')
-                reward -= 10
-                self.current_step += 1
-                return observation, reward, done
-            
             # can draft player
             self.draft.mySelection(player_name)
 
             self.draftBoard_.loc[self.draftBoard_['Name'] == action, 'Available'] = 0
+            self.observations.mark_unavailable(action)
 
             # Continue the draft after the agent's pick
             self._run_draft()
@@ -384,19 +357,7 @@ class FantasyFootballEnv(gym.Env):
         self.team: Team = myTeam
         self.draftTeams: list[Team] = self.draft.teams.copy()
         self.snake = self.draftTeams.copy()
-        self.shared_label_encoders = {
-            'Name': LabelEncoder(),
-            'Position': LabelEncoder(),
-            'Team': LabelEncoder(),
-            'Status': LabelEncoder(),
-            'FantasyPosition': LabelEncoder(),
-            'player_display_name': LabelEncoder(),
-            'recent_team': LabelEncoder(),
-            'season_type': LabelEncoder(),
-            'opponent_team': LabelEncoder()
-        }
-        self.shared_label_encoders['FantasyPosition'].fit(fant_positions)
-        self._process_data()
+        self._reset_draftboard()
         self.current_team_idx = 0
         self.current_step = 0
         self.state = self._get_state()
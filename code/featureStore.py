@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+# number of weekly stat rows kept per player (regular season plus playoffs)
+stats_weeks = 21
+stats_pad_value = -1.0
+
+# statistics of players_historic_descriptive_stats.csv kept as aggregates
+descriptive_statistics = ['mean', 'std']
+descriptive_skip_columns = ['Unnamed: 0', 'season', 'week']
+
+
+def load_position_aggregates(path: str, season: int, statistics: list = descriptive_statistics) -> pd.DataFrame:
+    '''
+    Reads the per position descriptive stats of a season from players_historic_descriptive_stats.csv.
+    Returns a dataframe indexed by position with one '<stat>_<statistic>' column per aggregate.
+    '''
+    df = pd.read_csv(path, header=[0, 1], index_col=[0, 1])
+    df = df.xs(season, level='season')
+    keep = [col for col in df.columns if col[1] in statistics and col[0] not in descriptive_skip_columns]
+    res = df[keep].astype(np.float32)
+    res.columns = [f'{stat}_{statistic}' for stat, statistic in keep]
+    return res
+
+
+class PlayerFeatureStore:
+    '''
+    Fixed size float32 feature blocks for every player of an encoded weekly stats table.
+    Player i owns a (num_weeks x stat columns) block holding its weekly rows in file order,
+    padded with pad_value, so the stats of a set of players is a single gather by id.
+    Optionally, the position aggregates of load_position_aggregates are kept per player.
+    '''
+
+    def __init__(self, stats: pd.DataFrame, id_column: str, num_players: int, positions: Optional[pd.Series] = None,
+                 aggregates: Optional[pd.DataFrame] = None, num_weeks: int = stats_weeks, pad_value: float = stats_pad_value):
+        self.columns = list(stats.columns)
+        self.num_players = num_players
+        self.num_weeks = num_weeks
+        self.pad_value = pad_value
+
+        codes = stats[id_column].to_numpy(dtype=np.intp)
+        rank = stats.groupby(id_column, sort=False).cumcount().to_numpy()
+        keep = rank < num_weeks
+
+        # the extra block at index num_players is the padding block used for missing ids
+        self._blocks = np.full((num_players + 1, num_weeks, len(self.columns)), pad_value, dtype=np.float32)
+        self._blocks[codes[keep], rank[keep]] = stats.to_numpy(dtype=np.float32)[keep]
+        self.num_games = np.bincount(codes[keep], minlength=num_players + 1)[:num_players]
+
+        self.aggregate_columns = []
+        self._aggregates = None
+        if aggregates is not None and positions is not None:
+            self.aggregate_columns = list(aggregates.columns)
+            self._aggregates = np.full((num_players + 1, len(self.aggregate_columns)), pad_value, dtype=np.float32)
+            player_positions = pd.Series(positions.to_numpy(), index=codes).groupby(level=0).first()
+            known = player_positions[player_positions.isin(aggregates.index)]
+            self._aggregates[known.index.to_numpy()] = aggregates.loc[known.to_numpy()].to_numpy()
+
+    def _block_index(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.intp)
+        return np.where(ids < 0, self.num_players, ids)
+
+    def gather(self, ids, out: Optional[np.ndarray] = None) -> np.ndarray:
+        '''
+        Writes the stat blocks of ids into out, a (len(ids) * num_weeks x stat columns) float32 array.
+        ids can have leading batch dimensions, which out then shares. Negative ids produce padding rows.
+        '''
+        idx = self._block_index(ids)
+        if out is None:
+            out = np.empty(idx.shape[:-1] + (idx.shape[-1] * self.num_weeks, len(self.columns)), dtype=np.float32)
+        np.take(self._blocks, idx, axis=0, out=out.reshape(idx.shape + (self.num_weeks, len(self.columns))))
+        return out
+
+    def gather_aggregates(self, ids, out: Optional[np.ndarray] = None) -> np.ndarray:
+        '''
+        Writes the aggregates of ids into out, a (len(ids) x aggregate columns) float32 array.
+        '''
+        if self._aggregates is None:
+            raise ValueError('Feature store was built without aggregates')
+        idx = self._block_index(ids)
+        if out is None:
+            out = np.empty((len(idx), len(self.aggregate_columns)), dtype=np.float32)
+        np.take(self._aggregates, idx, axis=0, out=out)
+        return out
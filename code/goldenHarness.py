@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import argparse
+import importlib
+import numpy as np
+import pandas as pd
+import events
+from typing import Callable, NamedTuple, Optional
+from events import SeasonFinished
+from seasonSimulator import SeasonSimulator
+from profiler import (bot_draft, simulate_season, seed_everything, default_board_path, default_weekly_stats_path,
+                      default_weekly_info_path)
+
+default_golden_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+# (seed, number of teams) of the leagues every engine is checked on
+reference_leagues = [(0, 8), (0, 10), (0, 12)]
+# decimals points are compared at, engines may add up points in a different order
+points_decimals = 6
+
+
+def reference_engine(num_teams: int, board_path: str = default_board_path, weekly_stats_path: str = default_weekly_stats_path,
+                     weekly_info_path: str = default_weekly_info_path) -> SeasonSimulator:
+    '''
+    The pandas DraftSimulator, SeasonSimulator and WaiverWireSimulator: a bot draft and the season it leads to.
+    An engine is any callable with this signature that emits the same events (see events) and returns
+    an object with the final standings and playoff_standings.
+    '''
+    return simulate_season(bot_draft(board_path, weekly_stats_path, num_teams), weekly_info_path)
+
+
+def canonical(value):
+    '''
+    Returns value as plain JSON values: numpy scalars as Python ones, tuples as lists, missing values as
+    None and floats rounded to points_decimals.
+    '''
+    if isinstance(value, (tuple, list)):
+        return [canonical(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if np.isnan(value) else round(value, points_decimals)
+    if value is pd.NA or value is None:
+        return None
+    return value
+
+
+class GoldenRecorder:
+    '''
+    Event sink turning the events of a league into canonical rows, [event type, *fields], in the order they
+    happened. The final standings become one row per team.
+    '''
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, event):
+        if isinstance(event, SeasonFinished):
+            for name, standings in [('Standings', event.standings), ('PlayoffStandings', event.playoff_standings)]:
+                self.rows.extend([name, *canonical(row)] for row in standings.values.tolist())
+        else:
+            self.rows.append([type(event).__name__, *canonical(list(event))])
+
+
+def record_league(engine: Callable, seed: int, num_teams: int, **paths) -> list:
+    '''
+    Plays the seeded league through engine and returns its canonical rows.
+    '''
+    seed_everything(seed)
+    with events.use_sink(GoldenRecorder()) as recorder:
+        engine(num_teams, **paths)
+    return recorder.rows
+
+
+def golden_path(seed: int, num_teams: int, directory: str = default_golden_dir) -> str:
+    return os.path.join(directory, f'league-{seed}-{num_teams}.jsonl')
+
+
+def save_golden(rows: list, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+
+def load_golden(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class Divergence(NamedTuple):
+    index: int
+    expected: Optional[list]
+    actual: Optional[list]
+
+    def format(self) -> str:
+        return f'row {self.index}: expected {self.expected}, got {self.actual}'
+
+
+def first_divergence(expected: list, actual: list) -> Optional[Divergence]:
+    '''
+    Returns the first row where the records differ, a missing row is None, or None if they are equal.
+    '''
+    for index in range(max(len(expected), len(actual))):
+        expected_row = expected[index] if index < len(expected) else None
+        actual_row = actual[index] if index < len(actual) else None
+        if expected_row != actual_row:
+            return Divergence(index, expected_row, actual_row)
+    return None
+
+
+def check_engine(engine: Callable, leagues: list = reference_leagues, directory: str = default_golden_dir,
+                 **paths) -> dict:
+    '''
+    Plays every reference league through engine and returns (seed, num_teams) -> first Divergence
+    from the golden records, None where the engine matched them.
+    '''
+    return {(seed, num_teams): first_divergence(load_golden(golden_path(seed, num_teams, directory)),
+                                                record_league(engine, seed, num_teams, **paths))
+            for seed, num_teams in leagues}
+
+
+def load_engine(spec: str) -> Callable:
+    '''
+    Returns the engine named by 'module:function'.
+    '''
+    module, function = spec.split(':')
+    return getattr(importlib.import_module(module), function)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Records the golden leagues or diffs an engine against them')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('record', help='records the golden leagues with the reference engine')
+    check = subparsers.add_parser('check', help='diffs an engine against the golden leagues')
+    check.add_argument('engine', nargs='?', default='goldenHarness:reference_engine', help='module:function')
+    parser.add_argument('--golden-dir', default=default_golden_dir)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        for seed, num_teams in reference_leagues:
+            path = golden_path(seed, num_teams, args.golden_dir)
+            save_golden(record_league(reference_engine, seed, num_teams), path)
+            print(f'Recorded {path}')
+        sys.exit(0)
+    divergences = check_engine(load_engine(args.engine), directory=args.golden_dir)
+    for (seed, num_teams), divergence in divergences.items():
+        print(f'league {seed}-{num_teams}: ' + ('matches' if divergence is None else divergence.format()))
+    sys.exit(1 if any(divergence is not None for divergence in divergences.values()) else 0)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+# small integer codes for the injury report columns, 0 means no designation
+report_status_codes = {'Questionable': 1, 'Doubtful': 2, 'Out': 3}
+practice_status_codes = {
+    'Full Participation in Practice': 1,
+    'Limited Participation in Practice': 2,
+    'Did Not Participate In Practice': 3
+}
+report_status_names = {code: status for status, code in report_status_codes.items()}
+
+# share of the weekly projection kept for designated players that are not ruled out
+report_status_projection_factor = {'Questionable': 0.85, 'Doubtful': 0.25}
+
+
+class InjuryIndex:
+    '''
+    Injury report lookup built from injuries(2021-2023).csv.
+    Entries are keyed by (player_id, season, week) where player_id is the gsis_id and
+    hold the report and practice status as integer codes. The file is only parsed on
+    the first query.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self._loaded = False
+
+    def _load(self):
+        df = pd.read_csv(self.path, keep_default_na=False)
+        # a player can have multiple reports in a week, the latest one wins
+        df = df.sort_values('date_modified').drop_duplicates(['gsis_id', 'season', 'week'], keep='last')
+        df = df.sort_values(['gsis_id', 'season', 'week'], ignore_index=True)
+
+        self.player_ids = df['gsis_id'].to_numpy(dtype=object)
+        self.seasons = df['season'].to_numpy(dtype=np.int16)
+        self.weeks = df['week'].to_numpy(dtype=np.int8)
+        self.report_status = df['report_status'].map(report_status_codes).fillna(0).to_numpy(dtype=np.int8)
+        self.practice_status = df['practice_status'].map(practice_status_codes).fillna(0).to_numpy(dtype=np.int8)
+
+        self._row = {key: idx for idx, key in enumerate(zip(self.player_ids, self.seasons.tolist(), self.weeks.tolist()))}
+        self._player_id_by_name = dict(zip(df['full_name'], self.player_ids))
+        self._missed_weeks = self._build_missed_weeks()
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+
+    def _build_missed_weeks(self):
+        '''
+        Groups consecutive weeks with an Out designation into (season, first_week, last_week) intervals.
+        '''
+        missed = {}
+        out_rows = np.flatnonzero(self.report_status == report_status_codes['Out'])
+        for idx in out_rows:
+            player_id = self.player_ids[idx]
+            season = int(self.seasons[idx])
+            week = int(self.weeks[idx])
+            intervals = missed.setdefault(player_id, [])
+            if intervals and intervals[-1][0] == season and intervals[-1][2] == week - 1:
+                intervals[-1] = (season, intervals[-1][1], week)
+            else:
+                intervals.append((season, week, week))
+        return missed
+
+    def player_id(self, name: str) -> Optional[str]:
+        '''
+        Returns the gsis_id of a player given the display name used by the simulators.
+        '''
+        self._ensure_loaded()
+        return self._player_id_by_name.get(name)
+
+    def lookup(self, player_id: str, season: int, week: int):
+        '''
+        Returns (report_status, practice_status) codes for a player week, (0, 0) if unreported.
+        '''
+        self._ensure_loaded()
+        row = self._row.get((player_id, season, week))
+        if row is None:
+            return 0, 0
+        return int(self.report_status[row]), int(self.practice_status[row])
+
+    def report_status_by_name(self, name: str, season: int, week: int) -> Optional[str]:
+        '''
+        Returns the report designation ('Questionable', 'Doubtful', 'Out') of a player week or None.
+        '''
+        player_id = self.player_id(name)
+        if player_id is None:
+            return None
+        report, _ = self.lookup(player_id, season, week)
+        return report_status_names.get(report)
+
+    def missed_weeks(self, player_id: str) -> list:
+        '''
+        Returns the (season, first_week, last_week) intervals a player was ruled out for.
+        '''
+        self._ensure_loaded()
+        return list(self._missed_weeks.get(player_id, []))
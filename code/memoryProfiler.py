@@ -0,0 +1,259 @@
+import os
+import json
+import types
+import argparse
+import tracemalloc
+import collections
+import numpy as np
+import pandas as pd
+import torch
+import events
+from typing import Callable, NamedTuple, Optional
+from fantasyenv import FantasyFootballEnv
+from fantasyDeepQNetwork import Agent
+from trainingloop import make_replay_buffer
+from profiler import (play_episode, seed_everything, default_board_path, default_weekly_stats_path,
+                      default_weekly_info_path)
+
+# attribute depth the walk follows below each root
+default_max_depth = 8
+# allocations are charged to the innermost frame in this directory, pandas internals say little
+source_dir = os.path.dirname(os.path.abspath(__file__))
+default_traceback_frames = 32
+# sources of allocations tracemalloc mode leaves out, the bookkeeping of the profiler itself
+ignored_allocation_files = [tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>']
+# objects the walk never enters
+_opaque_types = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, str, bytes)
+
+
+class Component(NamedTuple):
+    path: str
+    kind: str
+    nbytes: int
+    shape: tuple
+    # path of the component whose memory this one shares, counted there
+    shared_with: Optional[str] = None
+
+
+def _array_owner(array: np.ndarray) -> np.ndarray:
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _memory_key(value):
+    '''
+    Returns the address of the buffer holding value, views of one buffer share it.
+    '''
+    if isinstance(value, torch.Tensor):
+        return value.untyped_storage().data_ptr()
+    return _array_owner(value).__array_interface__['data'][0]
+
+
+def _leaf(path: str, value, owners: dict) -> Optional[Component]:
+    if isinstance(value, pd.DataFrame):
+        return Component(path, 'DataFrame', int(value.memory_usage(deep=True).sum()), value.shape)
+    if isinstance(value, (pd.Series, pd.Index)):
+        return Component(path, type(value).__name__, int(value.memory_usage(deep=True)), value.shape)
+    if isinstance(value, (np.ndarray, torch.Tensor)):
+        kind = 'ndarray' if isinstance(value, np.ndarray) else 'Tensor'
+        shape = tuple(value.shape)
+        key = _memory_key(value)
+        if key in owners and key != 0:
+            return Component(path, kind, 0, shape, owners[key])
+        owners[key] = path
+        if isinstance(value, torch.Tensor):
+            return Component(path, kind, value.untyped_storage().nbytes(), shape)
+        return Component(path, kind, _array_owner(value).nbytes, shape)
+    return None
+
+
+def _children(value) -> list:
+    if isinstance(value, dict):
+        return [(f'[{key!r}]', child) for key, child in value.items()]
+    if isinstance(value, (list, tuple, collections.deque)):
+        return [(f'[{idx}]', child) for idx, child in enumerate(value)]
+    if isinstance(value, (set, frozenset)):
+        return []
+    children = []
+    if hasattr(value, '__dict__'):
+        children.extend((f'.{name}', child) for name, child in vars(value).items())
+    for name in getattr(type(value), '__slots__', ()):
+        if hasattr(value, name):
+            children.append((f'.{name}', getattr(value, name)))
+    return children
+
+
+class MemoryReport:
+    '''
+    The DataFrames, Series, arrays and tensors reachable from a set of root objects, with their bytes:
+    pandas memory_usage(deep=True), the nbytes of the array owning the data and the size of tensor
+    storages. Buffers shared by several arrays or tensors, e.g. torch.from_numpy views, count once.
+    '''
+
+    def __init__(self, components: list):
+        self.components = sorted(components, key=lambda component: -component.nbytes)
+
+    @property
+    def total(self) -> int:
+        return sum(component.nbytes for component in self.components)
+
+    def by_prefix(self, depth: int = 1) -> dict:
+        '''
+        Returns the bytes per path prefix of depth attributes, e.g. env.draft for depth 1.
+        '''
+        totals = collections.Counter()
+        for component in self.components:
+            parts = component.path.replace('[', '.[').split('.')
+            totals['.'.join(parts[:depth + 1]).replace('.[', '[')] += component.nbytes
+        return dict(totals.most_common())
+
+    def duplicates(self, min_bytes: int = 2**20) -> list:
+        '''
+        Returns groups of paths of at least min_bytes components of the same kind, shape and size,
+        likely copies of one table.
+        '''
+        groups = collections.defaultdict(list)
+        for component in self.components:
+            if component.nbytes >= min_bytes:
+                groups[(component.kind, component.shape, component.nbytes)].append(component.path)
+        return [paths for paths in groups.values() if len(paths) > 1]
+
+    def to_dict(self) -> dict:
+        return {'total': self.total, 'components': [component._asdict() for component in self.components],
+                'duplicates': self.duplicates()}
+
+    def format(self, top: int = 20) -> str:
+        lines = [f'{"bytes":>14}  {"kind":10} {"shape":16} path']
+        for component in self.components[:top]:
+            shared = f' (shares {component.shared_with})' if component.shared_with else ''
+            lines.append(f'{component.nbytes:14,d}  {component.kind:10} {str(component.shape):16} {component.path}{shared}')
+        lines.append(f'{self.total:14,d}  total of {len(self.components)} components')
+        for paths in self.duplicates():
+            lines.append('possible copies: ' + ', '.join(paths))
+        return '\n'.join(lines)
+
+
+def memory_report(roots: dict, max_depth: int = default_max_depth) -> MemoryReport:
+    '''
+    Walks the attributes, dict values and list items of the name -> object roots, max_depth levels deep,
+    and returns a MemoryReport of the tables, arrays and tensors found. Objects reached twice count once.
+    '''
+    components = []
+    seen = set()
+    owners = {}
+    stack = [(name, root, 0) for name, root in reversed(list(roots.items()))]
+    while stack:
+        path, value, depth = stack.pop()
+        if value is None or isinstance(value, (int, float, bool, _opaque_types)) or id(value) in seen:
+            continue
+        seen.add(id(value))
+        component = _leaf(path, value, owners)
+        if component is not None:
+            components.append(component)
+        elif depth < max_depth:
+            stack.extend((path + name, child, depth + 1) for name, child in reversed(_children(value)))
+    return MemoryReport(components)
+
+
+class AllocationGrowth(NamedTuple):
+    run: int
+    current: int
+    peak: int
+    growth: int
+    # (file:line, size difference, count difference) of the lines that grew the most
+    top: list
+
+
+def _source_line(traceback: tracemalloc.Traceback) -> str:
+    '''
+    Returns file:line of the innermost frame of traceback in source_dir, or of the innermost frame.
+    '''
+    frame = next((frame for frame in reversed(traceback) if frame.filename.startswith(source_dir)), traceback[-1])
+    return f'{frame.filename}:{frame.lineno}'
+
+
+def track_allocations(run: Callable[[], object], num_runs: int, top: int = 10,
+                      frames: int = default_traceback_frames) -> list:
+    '''
+    Calls run num_runs times under tracemalloc and returns an AllocationGrowth per call: the traced
+    bytes, the peak during the call and the growth since the previous call, attributed to the source
+    lines in source_dir that allocated, up to frames calls deep. Growth that does not level off over
+    the calls is a leak.
+    '''
+    filters = [tracemalloc.Filter(False, filename) for filename in ignored_allocation_files]
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(frames)
+    try:
+        previous = tracemalloc.take_snapshot().filter_traces(filters)
+        growths = []
+        for idx in range(num_runs):
+            tracemalloc.reset_peak()
+            run()
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+            by_line = collections.defaultdict(lambda: [0, 0])
+            for difference in snapshot.compare_to(previous, 'traceback'):
+                line = by_line[_source_line(difference.traceback)]
+                line[0] += difference.size_diff
+                line[1] += difference.count_diff
+            lines = sorted(by_line.items(), key=lambda item: -abs(item[1][0]))
+            growths.append(AllocationGrowth(idx, current, peak, sum(size for size, _ in by_line.values()),
+                                            [(line, size, count) for line, (size, count) in lines[:top]]))
+            previous = snapshot
+        return growths
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def training_objects(buffer_size: int = 100, compact_replay: bool = True, seed: int = 0) -> dict:
+    '''
+    Returns the env, agent and replay buffer of a training run after one seeded episode, so the
+    season tables exist too.
+    '''
+    seed_everything(seed)
+    env = FantasyFootballEnv(default_board_path, default_weekly_stats_path, default_weekly_info_path)
+    space = env.observation_space
+    agent = Agent(space['stats'].shape, space['draftboard'].shape, space['roster'].shape, env.action_space.n, 0.001)
+    replay_buffer = make_replay_buffer(buffer_size, space, env.observations, compact_replay)
+    with events.use_sink(events.NullSink()):
+        play_episode(env, agent, reset=False)
+    return {'env': env, 'agent': agent, 'replay': replay_buffer}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reports the memory of an env, agent and replay buffer')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report_parser = subparsers.add_parser('report', help='bytes per table, array and tensor')
+    report_parser.add_argument('--buffer-size', type=int, default=100)
+    report_parser.add_argument('--full-replay', action='store_true', help='stores full rather than compact observations')
+    report_parser.add_argument('--top', type=int, default=25)
+    report_parser.add_argument('--depth', type=int, default=1, help='depth of the per prefix totals')
+    episodes_parser = subparsers.add_parser('episodes', help='tracemalloc allocation growth per env episode')
+    episodes_parser.add_argument('-n', '--num-episodes', type=int, default=3)
+    episodes_parser.add_argument('--top', type=int, default=10)
+    for subparser in (report_parser, episodes_parser):
+        subparser.add_argument('--json', help='JSON file the results are written to')
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        report = memory_report(training_objects(args.buffer_size, not args.full_replay))
+        print(report.format(args.top))
+        for prefix, nbytes in report.by_prefix(args.depth).items():
+            print(f'{nbytes:14,d}  {prefix}')
+        result = report.to_dict()
+    else:
+        objects = training_objects(buffer_size=1)
+        env, agent = objects['env'], objects['agent']
+        with events.use_sink(events.NullSink()):
+            growths = track_allocations(lambda: play_episode(env, agent, reset=True), args.num_episodes, args.top)
+        for growth in growths:
+            print(f'episode {growth.run}: traced {growth.current:,d} bytes, peak {growth.peak:,d}, growth {growth.growth:+,d}')
+            for line, size, count in growth.top:
+                print(f'    {size:+14,d} bytes {count:+8d} blocks  {line}')
+        result = [growth._asdict() for growth in growths]
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, default=str)
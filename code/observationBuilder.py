@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from featureStore import PlayerFeatureStore
+
+# column of the encoded draftboard observation holding the player name code
+draftboard_name_column = 1
+
+
+def copy_observation(observation: dict) -> dict:
+    '''
+    Copies an observation returned by ObservationBuilder.build so it survives the next step.
+    '''
+    return {key: value.clone() if hasattr(value, 'clone') else value.copy() for key, value in observation.items()}
+
+
+class ObservationBuilder:
+    '''
+    Writes draft observations into preallocated float32 buffers shaped like the env observation_space.
+    The buffers are reused between steps and returned as numpy arrays, or as torch tensors
+    sharing their memory when as_tensor is set, so callers that keep an observation past the
+    next step must copy it (see copy_observation).
+    The boolean action_mask flags the draftboard rows whose position is currently legal to draft.
+    '''
+
+    def __init__(self, observation_space, candidates_per_position: int, pad_value: float = -1.0, as_tensor: bool = False):
+        self.pad_value = pad_value
+        self.candidates_per_position = candidates_per_position
+        self.buffers = {key: np.full(space.shape, pad_value, dtype=np.float32)
+                        for key, space in observation_space.items() if key != 'action_mask'}
+        num_candidates = self.buffers['draftboard'].shape[0]
+        self.buffers['action_mask'] = np.zeros(num_candidates, dtype=bool)
+        self.candidate_rows = np.full(num_candidates, -1, dtype=np.intp)
+        self.candidate_positions = np.full(num_candidates, -1, dtype=np.intp)
+        self.as_tensor = as_tensor
+        self._make_views()
+
+    def _make_views(self):
+        if self.as_tensor:
+            import torch
+            self._views = {key: torch.from_numpy(buf) for key, buf in self.buffers.items()}
+        else:
+            self._views = self.buffers
+
+    def use_buffers(self, buffers: dict):
+        '''
+        Moves the observation into externally owned arrays of the same shapes and dtypes,
+        e.g. the rows of stacked arrays shared by several environments.
+        '''
+        for key, buf in buffers.items():
+            buf[...] = self.buffers[key]
+        self.buffers = dict(buffers)
+        self._make_views()
+
+    def load(self, board: pd.DataFrame, feature_store: PlayerFeatureStore, position_codes, stats_position_codes):
+        '''
+        Takes an encoded draftboard (numeric columns, rows in ADP order), the stats feature store of an episode,
+        the position codes in draftboard observation order and the codes of positions with stat rows.
+        '''
+        if board.columns.get_loc('Name') != draftboard_name_column:
+            raise ValueError(f"Draftboard column {draftboard_name_column} must be 'Name'")
+        self.feature_store = feature_store
+        self._stats_ids = np.full(self.buffers['stats'].shape[0] // feature_store.num_weeks, -1, dtype=np.intp)
+        self.board = board.to_numpy(dtype=np.float32)
+        # unchanged copy of the board with a padding row at the end, used by expand
+        self.board_rows = np.full((len(board) + 1, board.shape[1]), self.pad_value, dtype=np.float32)
+        self.board_rows[:-1] = self.board
+        self._available_col = board.columns.get_loc('Available')
+        names = board['Name'].to_numpy(dtype=np.intp)
+        board_positions = board['Position'].to_numpy()
+        self.available = board['Available'].to_numpy(dtype=bool).copy()
+        self._row_by_name = np.full(names.max() + 1, -1, dtype=np.intp)
+        self._row_by_name[names] = np.arange(len(names))
+        self._names = names
+        self._position_rows = [np.flatnonzero(board_positions == code) for code in position_codes]
+        self.legal_positions = np.ones(len(position_codes), dtype=bool)
+        self._has_stats = np.isin(board_positions, stats_position_codes)
+
+    def mark_unavailable(self, name_code: int):
+        row = self._row_by_name[name_code]
+        self.available[row] = False
+        self.board[row, self._available_col] = 0
+
+    def set_roster(self, roster: np.ndarray):
+        '''
+        Writes the encoded filled roster rows, the remaining rows are padding.
+        '''
+        buf = self.buffers['roster']
+        buf[:len(roster)] = roster
+        buf[len(roster):] = self.pad_value
+
+    def build(self) -> dict:
+        '''
+        Fills the stats, draftboard, roster and action_mask buffers for the current board and returns them.
+        The draftboard holds the top available players of each position in ADP order.
+        '''
+        num_candidates = 0
+        for position_idx, rows in enumerate(self._position_rows):
+            top = rows[self.available[rows]][:self.candidates_per_position]
+            self.candidate_rows[num_candidates:num_candidates + len(top)] = top
+            self.candidate_positions[num_candidates:num_candidates + len(top)] = position_idx
+            num_candidates += len(top)
+        self.candidate_rows[num_candidates:] = -1
+        self.candidate_positions[num_candidates:] = -1
+        candidates = self.candidate_rows[:num_candidates]
+
+        action_mask = self.buffers['action_mask']
+        np.take(self.legal_positions, self.candidate_positions[:num_candidates], out=action_mask[:num_candidates])
+        action_mask[num_candidates:] = False
+
+        draftboard = self.buffers['draftboard']
+        np.take(self.board, candidates, axis=0, out=draftboard[:num_candidates])
+        draftboard[num_candidates:] = self.pad_value
+
+        stats_candidates = candidates[self._has_stats[candidates]]
+        self._stats_ids.fill(-1)
+        self._stats_ids[:len(stats_candidates)] = self._names[stats_candidates]
+        self.feature_store.gather(self._stats_ids, out=self.buffers['stats'])
+
+        return dict(self._views)
+
+    def compact(self) -> dict:
+        '''
+        Returns a copy of the last built observation that stores the draftboard as board row
+        indices and the stats as player ids instead of the full arrays. See expand.
+        '''
+        return {
+            'candidate_rows': self.candidate_rows.astype(np.int32),
+            'stats_ids': self._stats_ids.astype(np.int32),
+            'roster': self.buffers['roster'].copy(),
+            'action_mask': self.buffers['action_mask'].copy()
+        }
+
+    def expand(self, compact: dict, out: dict) -> dict:
+        '''
+        Rebuilds full observations from (batches of) compact observations into the arrays of out.
+        Candidates are always available when shown, so their rows come from the unchanged board.
+        '''
+        candidate_rows = compact['candidate_rows']
+        rows = np.where(candidate_rows < 0, len(self.board_rows) - 1, candidate_rows)
+        np.take(self.board_rows, rows, axis=0, out=out['draftboard'])
+        self.feature_store.gather(compact['stats_ids'], out=out['stats'])
+        out['roster'][...] = compact['roster']
+        out['action_mask'][...] = compact['action_mask']
+        return out
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import random
+import pstats
+import cProfile
+import argparse
+import threading
+import collections
+import numpy as np
+import torch
+import events
+from events import emit, PickMade
+from functools import partial
+from telemetry import Telemetry, span
+from datasetStore import default_data_dir
+from draftSimulator import DraftSimulator
+from fantasyTeam import Team
+from seasonSimulator import SeasonSimulator
+from fantasyenv import FantasyFootballEnv
+from fantasyDeepQNetwork import Agent
+
+workloads = ['draft', 'season', 'episode']
+# seconds between two stack samples of the flamegraph
+default_sample_interval = 0.005
+default_board_path = os.path.join(default_data_dir, 'ppr-adp-2023-updated.csv')
+default_weekly_stats_path = os.path.join(default_data_dir, 'weekly-stats-2022.csv')
+default_weekly_info_path = os.path.join(default_data_dir, 'simulator-weekly-info-2023.csv')
+draft_rounds = 16
+
+
+def seed_everything(seed: int):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def random_league(num_teams: int) -> tuple:
+    '''
+    Returns the (my team, league members) of a league with shuffled draft picks, as FantasyFootballEnv draws them.
+    '''
+    picks = np.random.permutation(np.arange(1, num_teams + 1))
+    return Team('Team1', picks[0]), [(f'Team{i}', picks[i - 1]) for i in range(2, num_teams + 1)]
+
+
+def bot_draft(board_path: str, weekly_stats_path: str, num_teams: int) -> DraftSimulator:
+    '''
+    Runs a snake draft where every team, Team1 included, picks with otherTeamSelection.
+    '''
+    my_team, league_members = random_league(num_teams)
+    draft = DraftSimulator(board_path, my_team, league_members, num_teams, draft_rounds, weekly_stats_path)
+    snake = draft.teams.copy()
+    for _ in range(draft.numRounds):
+        for team in snake:
+            with span('draft.pick'):
+                response = draft.otherTeamSelection(team)
+                if response:
+                    player_name, player_team, position, bye_week, status, avgadp = response
+                    team.addPickToRoster(position, player_name, draft.currentPick, avgadp, player_team, bye_week, 0, status)
+                    emit(PickMade, team.name, draft.currentPick, draft.currentRound, player_name, position)
+            draft.currentPick += 1
+        draft.currentRound += 1
+        snake.reverse()
+    return draft
+
+
+def simulate_season(draft: DraftSimulator, weekly_info_path: str) -> SeasonSimulator:
+    waiver_wire_df = draft.constructWaiverWire()
+    waiver_wire_df.drop(columns=['Rank'], inplace=True)
+    season = SeasonSimulator(teams=draft.teams, weekly_info_path=weekly_info_path, waiver_wire_df=waiver_wire_df)
+    season.simulate_season()
+    return season
+
+
+def play_episode(env: FantasyFootballEnv, agent: Agent, reset: bool) -> float:
+    if reset:
+        env.reset()
+    env._run_draft()
+    done = False
+    score = 0
+    while not done:
+        _, reward, done = env.step(agent.choose_action(env.get_observation()))
+        score += reward
+    return score
+
+
+def prepare_runs(workload: str, num_runs: int, board_path: str = default_board_path,
+                 weekly_stats_path: str = default_weekly_stats_path,
+                 weekly_info_path: str = default_weekly_info_path) -> list:
+    '''
+    Returns one callable per run of workload. Setup that is not part of the workload, the drafts
+    of the seasons and the env and agent of the episodes, happens here rather than in the runs.
+    '''
+    if workload == 'draft':
+        return [partial(bot_draft, board_path, weekly_stats_path, int(np.random.choice([8, 10, 12])))
+                for _ in range(num_runs)]
+    if workload == 'season':
+        return [partial(simulate_season, bot_draft(board_path, weekly_stats_path, int(np.random.choice([8, 10, 12]))),
+                        weekly_info_path) for _ in range(num_runs)]
+    if workload == 'episode':
+        env = FantasyFootballEnv(board_path, weekly_stats_path, weekly_info_path)
+        space = env.observation_space
+        agent = Agent(space['stats'].shape, space['draftboard'].shape, space['roster'].shape, env.action_space.n, 0.001)
+        return [partial(play_episode, env, agent, idx > 0) for idx in range(num_runs)]
+    raise ValueError(f'Unknown workload {workload}, expected one of {workloads}')
+
+
+class StackSampler:
+    '''
+    Samples the Python stack of a thread every interval seconds from a background thread and
+    counts the collapsed stacks (root;...;leaf) of flamegraph.pl and speedscope. Only the frames
+    from root_code, the code object of the profiled entry function, down are kept.
+    '''
+
+    def __init__(self, root_code, interval: float = default_sample_interval, thread_id: int = None):
+        self.root_code = root_code
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.counts = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _stack(self, frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            if code is self.root_code:
+                return ';'.join(reversed(stack))
+            frame = frame.f_back
+        return None
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = self._stack(frame) if frame is not None else None
+            if stack is not None:
+                self.counts[stack] += 1
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f'{stack} {count}\n')
+
+
+def _run(workload: str, runs: list):
+    for run in runs:
+        with span(workload):
+            run()
+
+
+def profile(workload: str, num_runs: int, output_dir: str, seed: int = 0,
+            sample_interval: float = default_sample_interval, **paths) -> dict:
+    '''
+    Runs num_runs seeded runs of workload (bot drafts, seasons or env episodes) on the data files
+    of paths (see prepare_runs) and writes to output_dir:
+    <workload>.prof, the cProfile stats, <workload>.collapsed, the sampled collapsed stacks for a
+    flamegraph, and <workload>.trace.json, the Chrome trace of the telemetry spans.
+    Returns the paths of the three files. Both profilers run at once, so the sampled stacks and
+    the spans include the overhead of cProfile, which inflates frames making many Python calls.
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    recorder = Telemetry(trace=True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler(_run.__code__, sample_interval)
+    # the setup drafts of seasons emit their picks too
+    with events.use_sink(events.NullSink()):
+        seed_everything(seed)
+        runs = prepare_runs(workload, num_runs, **paths)
+        with recorder:
+            sampler.start()
+            profiler.enable()
+            try:
+                _run(workload, runs)
+            finally:
+                profiler.disable()
+                sampler.stop()
+
+    outputs = {name: os.path.join(output_dir, f'{workload}.{extension}')
+               for name, extension in [('stats', 'prof'), ('collapsed', 'collapsed'), ('trace', 'trace.json')]}
+    profiler.dump_stats(outputs['stats'])
+    sampler.write_collapsed(outputs['collapsed'])
+    with open(outputs['trace'], 'w') as f:
+        json.dump(recorder.chrome_trace(), f)
+    return outputs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profiles bot drafts, seasons or env episodes')
+    parser.add_argument('workload', choices=workloads)
+    parser.add_argument('-n', '--num-runs', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default='profiles')
+    parser.add_argument('--sample-interval', type=float, default=default_sample_interval)
+    parser.add_argument('--top', type=int, default=20, help='functions of the cProfile summary printed')
+    parser.add_argument('--board', default=default_board_path)
+    parser.add_argument('--weekly-stats', default=default_weekly_stats_path)
+    parser.add_argument('--weekly-info', default=default_weekly_info_path)
+    args = parser.parse_args()
+
+    outputs = profile(args.workload, args.num_runs, args.output_dir, args.seed, args.sample_interval,
+                      board_path=args.board, weekly_stats_path=args.weekly_stats, weekly_info_path=args.weekly_info)
+    pstats.Stats(outputs['stats']).sort_stats('tottime').print_stats(args.top)
+    for name, path in outputs.items():
+        print(f'{name}: {path}')
@@ -0,0 +1,341 @@
+import numpy as np
+import torch
+from gymnasium import spaces
+from observationBuilder import ObservationBuilder
+
+observation_keys = ['stats', 'draftboard', 'roster', 'action_mask']
+
+
+def observation_specs(observation_space: spaces.Dict) -> dict:
+    '''
+    Returns key -> (shape, torch dtype) of the env observations, the action mask is stored as bool.
+    '''
+    return {key: (space.shape, torch.bool if isinstance(space, spaces.MultiBinary) else torch.float32)
+            for key, space in observation_space.items()}
+
+
+def stack_transitions(transitions) -> dict:
+    '''
+    Stacks a list of (observation, action, reward, next_observation, done) tuples into the batch
+    layout returned by ReplayBuffer.sample.
+    '''
+    observations, actions, rewards, next_observations, dones = zip(*transitions)
+
+    def stack(obs_list):
+        return {key: torch.from_numpy(np.stack([np.asarray(obs[key], dtype=bool if key == 'action_mask' else np.float32)
+                                                for obs in obs_list]))
+                for key in observation_keys if key in obs_list[0]}
+
+    return {
+        'observations': stack(observations),
+        'actions': torch.tensor(np.array(actions), dtype=torch.long),
+        'rewards': torch.tensor(np.array(rewards), dtype=torch.float32),
+        'next_observations': stack(next_observations),
+        'dones': torch.tensor(np.array(dones), dtype=torch.bool)
+    }
+
+
+class ReplayBuffer:
+    '''
+    Ring buffer of transitions backed by preallocated tensors, one per observation key for the
+    observation and the next observation, plus action, reward and done tensors.
+    Memory use is max_size * bytes_per_transition. sample draws indices uniformly with
+    replacement and gathers them into batch tensors that are reused by the next call of the
+    same batch size, so callers must not keep a batch across samples.
+    '''
+
+    def __init__(self, max_size: int, observation_space: spaces.Dict):
+        self.max_size = max_size
+        self.specs = observation_specs(observation_space)
+        self.observations = {key: torch.empty((max_size,) + shape, dtype=dtype) for key, (shape, dtype) in self.specs.items()}
+        self.next_observations = {key: torch.empty((max_size,) + shape, dtype=dtype) for key, (shape, dtype) in self.specs.items()}
+        self.actions = torch.zeros(max_size, dtype=torch.long)
+        self.rewards = torch.zeros(max_size, dtype=torch.float32)
+        self.dones = torch.zeros(max_size, dtype=torch.bool)
+        self.position = 0
+        self.count = 0
+        # transitions added since creation, used by incremental checkpoints
+        self.added = 0
+        self._batches = {}
+
+    @property
+    def bytes_per_transition(self) -> int:
+        obs_bytes = sum(tensor[0].nelement() * tensor.element_size() for tensor in self.observations.values())
+        return 2 * obs_bytes + self.actions.element_size() + self.rewards.element_size() + self.dones.element_size()
+
+    def add(self, observation: dict, action: int, reward: float, next_observation: dict, done: bool):
+        '''
+        Copies a transition into the next slot, overwriting the oldest one once the buffer is full.
+        '''
+        idx = self.position
+        for key in self.specs:
+            self.observations[key][idx] = torch.as_tensor(observation[key])
+            self.next_observations[key][idx] = torch.as_tensor(next_observation[key])
+        self.actions[idx] = int(action)
+        self.rewards[idx] = float(reward)
+        self.dones[idx] = bool(done)
+        self.position = (self.position + 1) % self.max_size
+        self.count = min(self.count + 1, self.max_size)
+        self.added += 1
+
+    def add_batch(self, observations: dict, actions, rewards, next_observations: dict, dones):
+        '''
+        Copies stacked transitions, e.g. one per league of a VectorEnv step.
+        '''
+        num = len(actions)
+        idx = (self.position + torch.arange(num)) % self.max_size
+        for key in self.specs:
+            self.observations[key][idx] = torch.as_tensor(observations[key])
+            self.next_observations[key][idx] = torch.as_tensor(next_observations[key])
+        self.actions[idx] = torch.as_tensor(np.asarray(actions), dtype=torch.long)
+        self.rewards[idx] = torch.as_tensor(np.asarray(rewards), dtype=torch.float32)
+        self.dones[idx] = torch.as_tensor(np.asarray(dones), dtype=torch.bool)
+        self.position = (self.position + num) % self.max_size
+        self.count = min(self.count + num, self.max_size)
+        self.added += num
+
+    def _batch(self, batch_size: int) -> dict:
+        if batch_size not in self._batches:
+            self._batches[batch_size] = {
+                'indices': torch.empty(batch_size, dtype=torch.long),
+                'observations': {key: torch.empty((batch_size,) + shape, dtype=dtype) for key, (shape, dtype) in self.specs.items()},
+                'actions': torch.empty(batch_size, dtype=torch.long),
+                'rewards': torch.empty(batch_size, dtype=torch.float32),
+                'next_observations': {key: torch.empty((batch_size,) + shape, dtype=dtype) for key, (shape, dtype) in self.specs.items()},
+                'dones': torch.empty(batch_size, dtype=torch.bool)
+            }
+        return self._batches[batch_size]
+
+    def sample(self, batch_size: int) -> dict:
+        '''
+        Returns a batch dict with observations, actions, rewards, next_observations, dones and the sampled indices.
+        '''
+        batch = self._batch(batch_size)
+        torch.randint(0, self.count, (batch_size,), out=batch['indices'])
+        return self._gather(batch)
+
+    def _gather(self, batch: dict) -> dict:
+        idx = batch['indices']
+        for key in self.specs:
+            torch.index_select(self.observations[key], 0, idx, out=batch['observations'][key])
+            torch.index_select(self.next_observations[key], 0, idx, out=batch['next_observations'][key])
+        torch.index_select(self.actions, 0, idx, out=batch['actions'])
+        torch.index_select(self.rewards, 0, idx, out=batch['rewards'])
+        torch.index_select(self.dones, 0, idx, out=batch['dones'])
+        return batch
+
+    def size(self) -> int:
+        return self.count
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class SumTree:
+    '''
+    Array based binary tree whose leaves hold the priorities of the replay slots and whose inner
+    nodes hold the sum of their children, so the root is the total priority.
+    The leaves are padded to a power of two so they all sit on the same level, which lets update
+    and find walk a whole batch of indices one level at a time in O(log n).
+    '''
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.first_leaf = 2**self.depth - 1
+        self.tree = np.zeros(2 * self.first_leaf + 1, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return self.tree[0]
+
+    def get(self, indices) -> np.ndarray:
+        return self.tree[self.first_leaf + np.asarray(indices)]
+
+    def update(self, indices, priorities):
+        '''
+        Sets the priorities of the slots in indices and refreshes the sums above them.
+        With repeated indices the last priority wins.
+        '''
+        nodes = self.first_leaf + np.asarray(indices, dtype=np.int64)
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique((nodes - 1) // 2)
+            self.tree[nodes] = self.tree[2 * nodes + 1] + self.tree[2 * nodes + 2]
+
+    def find(self, values) -> np.ndarray:
+        '''
+        Returns the slot of each value in [0, total), i.e. the first leaf whose cumulative priority exceeds it.
+        '''
+        values = np.array(values, dtype=np.float64)
+        nodes = np.zeros(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes + 1
+            go_right = values >= self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0)
+            nodes = left + go_right
+        return nodes - self.first_leaf
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    '''
+    ReplayBuffer sampling transition i with probability p_i^alpha / sum_j p_j^alpha, where p_i is the
+    last absolute TD error of the transition (see update_priorities) and new transitions get the
+    highest priority seen so far. Batches carry importance sampling weights (N * P(i))^-beta,
+    normalized by their maximum, for the loss. beta is annealed towards 1 by beta_increment per sample.
+    '''
+
+    def __init__(self, max_size: int, observation_space: spaces.Dict, alpha: float = 0.6, beta: float = 0.4,
+                 beta_increment: float = 1e-4, epsilon: float = 1e-5):
+        super().__init__(max_size, observation_space)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.priorities = SumTree(max_size)
+
+    def add(self, observation: dict, action: int, reward: float, next_observation: dict, done: bool):
+        self.priorities.update([self.position], self.max_priority ** self.alpha)
+        super().add(observation, action, reward, next_observation, done)
+
+    def add_batch(self, observations: dict, actions, rewards, next_observations: dict, dones):
+        idx = (self.position + np.arange(len(actions))) % self.max_size
+        self.priorities.update(idx, self.max_priority ** self.alpha)
+        super().add_batch(observations, actions, rewards, next_observations, dones)
+
+    def _batch(self, batch_size: int) -> dict:
+        batch = super()._batch(batch_size)
+        if 'weights' not in batch:
+            batch['weights'] = torch.empty(batch_size, dtype=torch.float32)
+        return batch
+
+    def sample(self, batch_size: int) -> dict:
+        '''
+        Draws one transition from each of batch_size equal slices of the total priority.
+        The batch also holds the importance sampling weights.
+        '''
+        batch = self._batch(batch_size)
+        total = self.priorities.total
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * (total / batch_size)
+        # float rounding can push the last value past the filled slots
+        idx = np.minimum(self.priorities.find(values), self.count - 1)
+        probabilities = self.priorities.get(idx) / total
+        weights = (self.count * probabilities) ** -self.beta
+        batch['weights'].copy_(torch.from_numpy(weights / weights.max()))
+        batch['indices'].copy_(torch.from_numpy(idx))
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return self._gather(batch)
+
+    def update_priorities(self, indices, td_errors):
+        '''
+        Sets the priorities of sampled transitions from the absolute TD errors returned by Agent.learn.
+        '''
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.priorities.update(np.asarray(indices, dtype=np.int64), priorities ** self.alpha)
+
+
+class CompactReplayBuffer:
+    '''
+    Ring buffer of compact observations (see ObservationBuilder.compact): candidate board rows,
+    stats player ids, roster and action mask. The board and the stats feature store of the season
+    are only held once, by the observation builder, and sample rebuilds the full observation
+    tensors with a gather, so a transition takes a few kilobytes instead of the stats arrays.
+    sample returns the layout of ReplayBuffer.sample and reuses its batch arrays the same way.
+    '''
+
+    def __init__(self, max_size: int, observations: ObservationBuilder):
+        self.max_size = max_size
+        self.builder = observations
+        example = observations.compact()
+        self.observations = {key: np.zeros((max_size,) + value.shape, dtype=value.dtype) for key, value in example.items()}
+        self.next_observations = {key: np.zeros((max_size,) + value.shape, dtype=value.dtype) for key, value in example.items()}
+        self.actions = np.zeros(max_size, dtype=np.int64)
+        self.rewards = np.zeros(max_size, dtype=np.float32)
+        self.dones = np.zeros(max_size, dtype=bool)
+        self.position = 0
+        self.count = 0
+        self.added = 0
+        self._batches = {}
+
+    @property
+    def bytes_per_transition(self) -> int:
+        obs_bytes = sum(array[0].nbytes for array in self.observations.values())
+        return 2 * obs_bytes + self.actions.itemsize + self.rewards.itemsize + self.dones.itemsize
+
+    def add(self, observation: dict, action: int, reward: float, next_observation: dict, done: bool):
+        '''
+        Copies a transition of compact observations into the next slot.
+        '''
+        idx = self.position
+        for key in self.observations:
+            self.observations[key][idx] = observation[key]
+            self.next_observations[key][idx] = next_observation[key]
+        self.actions[idx] = action
+        self.rewards[idx] = reward
+        self.dones[idx] = done
+        self.position = (self.position + 1) % self.max_size
+        self.count = min(self.count + 1, self.max_size)
+        self.added += 1
+
+    def add_batch(self, observations: dict, actions, rewards, next_observations: dict, dones):
+        '''
+        Copies stacked transitions of compact observations.
+        '''
+        num = len(actions)
+        idx = (self.position + np.arange(num)) % self.max_size
+        for key in self.observations:
+            self.observations[key][idx] = observations[key]
+            self.next_observations[key][idx] = next_observations[key]
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.dones[idx] = dones
+        self.position = (self.position + num) % self.max_size
+        self.count = min(self.count + num, self.max_size)
+        self.added += num
+
+    def _batch(self, batch_size: int) -> dict:
+        if batch_size not in self._batches:
+            def full():
+                return {key: np.empty((batch_size,) + buf.shape, dtype=buf.dtype) for key, buf in self.builder.buffers.items()}
+
+            def compact():
+                return {key: np.empty((batch_size,) + array.shape[1:], dtype=array.dtype) for key, array in self.observations.items()}
+
+            arrays = {
+                'observations': full(), 'next_observations': full(),
+                'actions': np.empty(batch_size, dtype=np.int64),
+                'rewards': np.empty(batch_size, dtype=np.float32),
+                'dones': np.empty(batch_size, dtype=bool)
+            }
+            self._batches[batch_size] = {
+                'arrays': arrays,
+                'compact': compact(),
+                'next_compact': compact(),
+                'batch': {key: {k: torch.from_numpy(v) for k, v in value.items()} if isinstance(value, dict) else torch.from_numpy(value)
+                          for key, value in arrays.items()}
+            }
+        return self._batches[batch_size]
+
+    def sample(self, batch_size: int) -> dict:
+        buffers = self._batch(batch_size)
+        arrays = buffers['arrays']
+        idx = np.random.randint(0, self.count, size=batch_size)
+        for key in self.observations:
+            np.take(self.observations[key], idx, axis=0, out=buffers['compact'][key])
+            np.take(self.next_observations[key], idx, axis=0, out=buffers['next_compact'][key])
+        self.builder.expand(buffers['compact'], out=arrays['observations'])
+        self.builder.expand(buffers['next_compact'], out=arrays['next_observations'])
+        np.take(self.actions, idx, out=arrays['actions'])
+        np.take(self.rewards, idx, out=arrays['rewards'])
+        np.take(self.dones, idx, out=arrays['dones'])
+        batch = dict(buffers['batch'])
+        batch['indices'] = torch.from_numpy(idx)
+        return batch
+
+    def size(self) -> int:
+        return self.count
+
+    def __len__(self) -> int:
+        return self.count
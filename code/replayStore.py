@@ -0,0 +1,189 @@
+import os
+import json
+import numpy as np
+import torch
+from gymnasium import spaces
+from typing import Optional
+from observationBuilder import ObservationBuilder
+
+index_filename = 'index.json'
+shard_filename = 'shard-{:05d}.npy'
+default_shard_size = 65536
+
+
+def field_specs(observation: dict) -> dict:
+    '''
+    Returns key -> [shape, dtype string] of an observation, the record layout stored in the index.
+    '''
+    return {key: [list(np.shape(value)), np.asarray(value).dtype.str] for key, value in observation.items()}
+
+
+def _space_example(observation_space: spaces.Dict) -> dict:
+    return {key: np.zeros(space.shape, dtype=bool if isinstance(space, spaces.MultiBinary) else np.float32)
+            for key, space in observation_space.items()}
+
+
+def record_dtype(fields: dict) -> np.dtype:
+    '''
+    Returns the structured dtype of one transition record for observation fields key -> [shape, dtype].
+    '''
+    observation = np.dtype([(key, np.dtype(dtype), tuple(shape)) for key, (shape, dtype) in fields.items()])
+    return np.dtype([('observation', observation), ('next_observation', observation),
+                     ('action', np.int64), ('reward', np.float32), ('done', bool)])
+
+
+class MemmapReplayStore:
+    '''
+    Replay memory kept on disk as memory mapped .npy shards of fixed size transition records,
+    plus index.json holding the record layout, the shard size, the capacity and the write position.
+    Sampling reads random records through the page cache, so the store can be far larger than RAM.
+
+    Records hold full observations (observation_space) or, given an ObservationBuilder, compact
+    observations (see ObservationBuilder.compact) that are expanded on sample.
+    Opening an existing directory resumes it. One process writes, any number of processes can
+    open the store with readonly=True and call refresh to see what the writer flushed.
+    Transitions added after the last flush are not visible to readers and are lost on a crash.
+    '''
+
+    def __init__(self, directory: str, observation_space: Optional[spaces.Dict] = None, max_size: int = 10**6,
+                 shard_size: int = default_shard_size, observations: Optional[ObservationBuilder] = None,
+                 readonly: bool = False):
+        self.directory = directory
+        self.readonly = readonly
+        self.builder = observations
+        self._shards = {}
+        index_path = os.path.join(directory, index_filename)
+        if os.path.exists(index_path):
+            self._read_index()
+            if observation_space is not None or observations is not None:
+                expected = self._expected_fields(observation_space, observations)
+                if expected != self.fields or (observations is not None) != self.compact:
+                    raise ValueError(f'Replay store {directory} holds a different observation layout')
+        elif readonly:
+            raise FileNotFoundError(f'No replay store in {directory}')
+        else:
+            if observation_space is None and observations is None:
+                raise ValueError('A new replay store needs an observation_space or an observation builder')
+            self.fields = self._expected_fields(observation_space, observations)
+            self.compact = observations is not None
+            self.shard_size = min(shard_size, max_size)
+            self.max_size = -(-max_size // self.shard_size) * self.shard_size
+            self.position = 0
+            self.count = 0
+            os.makedirs(directory, exist_ok=True)
+            self._write_index()
+        if self.compact and self.builder is None:
+            raise ValueError('Expanding a compact replay store needs its observation builder')
+        self.dtype = record_dtype(self.fields)
+
+    @staticmethod
+    def _expected_fields(observation_space, observations) -> dict:
+        if observations is not None:
+            return field_specs(observations.compact())
+        return field_specs(_space_example(observation_space))
+
+    def _read_index(self):
+        with open(os.path.join(self.directory, index_filename)) as f:
+            index = json.load(f)
+        self.fields = index['fields']
+        self.compact = index['compact']
+        self.shard_size = index['shard_size']
+        self.max_size = index['max_size']
+        self.position = index['position']
+        self.count = index['count']
+
+    def _write_index(self):
+        index = {'fields': self.fields, 'compact': self.compact, 'shard_size': self.shard_size,
+                 'max_size': self.max_size, 'position': self.position, 'count': self.count}
+        path = os.path.join(self.directory, index_filename)
+        # readers never see a partially written index
+        with open(path + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(path + '.tmp', path)
+
+    def _shard(self, shard: int) -> np.ndarray:
+        if shard not in self._shards:
+            path = os.path.join(self.directory, shard_filename.format(shard))
+            if self.readonly:
+                self._shards[shard] = np.load(path, mmap_mode='r')
+            elif os.path.exists(path):
+                self._shards[shard] = np.load(path, mmap_mode='r+')
+            else:
+                self._shards[shard] = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype, shape=(self.shard_size,))
+        return self._shards[shard]
+
+    def add(self, observation: dict, action: int, reward: float, next_observation: dict, done: bool):
+        shard = self._shard(self.position // self.shard_size)
+        row = self.position % self.shard_size
+        for key in self.fields:
+            shard['observation'][key][row] = observation[key]
+            shard['next_observation'][key][row] = next_observation[key]
+        shard['action'][row] = action
+        shard['reward'][row] = reward
+        shard['done'][row] = done
+        self.position = (self.position + 1) % self.max_size
+        self.count = min(self.count + 1, self.max_size)
+
+    def add_batch(self, observations: dict, actions, rewards, next_observations: dict, dones):
+        for idx in range(len(actions)):
+            self.add({key: value[idx] for key, value in observations.items()}, actions[idx], rewards[idx],
+                     {key: value[idx] for key, value in next_observations.items()}, dones[idx])
+
+    def flush(self):
+        '''
+        Writes the dirty pages of the shards and then the index, making the new transitions durable and visible to readers.
+        '''
+        for shard in self._shards.values():
+            shard.flush()
+        self._write_index()
+
+    def refresh(self):
+        '''
+        Rereads the index written by the last flush of the writer.
+        '''
+        self._read_index()
+
+    def _read(self, idx: np.ndarray) -> np.ndarray:
+        records = np.empty(len(idx), dtype=self.dtype)
+        shards = idx // self.shard_size
+        for shard in np.unique(shards):
+            rows = np.flatnonzero(shards == shard)
+            records[rows] = self._shard(int(shard))[idx[rows] % self.shard_size]
+        return records
+
+    def _observations(self, records: np.ndarray) -> dict:
+        arrays = {key: np.ascontiguousarray(records[key]) for key in self.fields}
+        if self.compact:
+            out = {key: np.empty((len(records),) + buf.shape, dtype=buf.dtype) for key, buf in self.builder.buffers.items()}
+            arrays = self.builder.expand(arrays, out)
+        return {key: torch.from_numpy(value) for key, value in arrays.items()}
+
+    def sample(self, batch_size: int) -> dict:
+        '''
+        Returns a batch in the layout of ReplayBuffer.sample. Records are read in file order.
+        '''
+        idx = np.sort(np.random.randint(0, self.count, size=batch_size))
+        records = self._read(idx)
+        return {
+            'indices': torch.from_numpy(idx),
+            'observations': self._observations(records['observation']),
+            'actions': torch.from_numpy(records['action'].copy()),
+            'rewards': torch.from_numpy(records['reward'].copy()),
+            'next_observations': self._observations(records['next_observation']),
+            'dones': torch.from_numpy(records['done'].copy())
+        }
+
+    @property
+    def bytes_per_transition(self) -> int:
+        return self.dtype.itemsize
+
+    def close(self):
+        if not self.readonly:
+            self.flush()
+        self._shards = {}
+
+    def size(self) -> int:
+        return self.count
+
+    def __len__(self) -> int:
+        return self.count
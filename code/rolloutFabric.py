@@ -0,0 +1,282 @@
+import os
+import struct
+import argparse
+import numpy as np
+import torch
+import zmq
+from typing import Optional
+from actorLearner import ActorLearner, actor_epsilon_base, play_leagues, seed_actor, transition_wait
+from datasetStore import default_data_dir
+from fantasyDeepQNetwork import Agent, architectures
+from fantasyenv import FantasyFootballEnv
+from replayStore import field_specs, record_dtype
+
+# messages a socket queues before senders block, this is what pushes back on workers when the learner lags
+default_high_water_mark = 64
+default_transitions_per_message = 16
+# milliseconds a blocked worker waits for the learner before retrying a send
+backpressure_poll = 100
+# milliseconds a new worker waits for weights before asking again
+weights_request_interval = 200
+
+
+class TransitionCodec:
+    '''
+    Packs compact transitions (see ObservationBuilder.compact) into the fixed size records of
+    replayStore.record_dtype, so a message of n transitions is a single frame of n records.
+    '''
+
+    def __init__(self, compact_observation: dict):
+        self.dtype = record_dtype(field_specs(compact_observation))
+        self.keys = self.dtype['observation'].names
+
+    def encode(self, transitions: list) -> bytes:
+        records = np.empty(len(transitions), dtype=self.dtype)
+        for row, (observation, action, reward, next_observation, done) in enumerate(transitions):
+            for key in self.keys:
+                records['observation'][key][row] = observation[key]
+                records['next_observation'][key][row] = next_observation[key]
+            records['action'][row] = action
+            records['reward'][row] = reward
+            records['done'][row] = done
+        return records.tobytes()
+
+    def decode(self, frame: bytes) -> tuple:
+        '''
+        Returns the stacked (observations, actions, rewards, next_observations, dones) of a frame, as taken by add_batch.
+        '''
+        records = np.frombuffer(frame, dtype=self.dtype)
+        return ({key: records['observation'][key] for key in self.keys}, records['action'], records['reward'],
+                {key: records['next_observation'][key] for key in self.keys}, records['done'])
+
+
+def pack_weights(model: torch.nn.Module, version: int) -> list:
+    '''
+    Returns the weights message: topic, version and one raw frame per state_dict tensor in order.
+    '''
+    return [b'weights', struct.pack('<q', version)] + \
+        [value.detach().cpu().contiguous().numpy().tobytes() for value in model.state_dict().values()]
+
+
+def unpack_weights(model: torch.nn.Module, frames: list) -> int:
+    '''
+    Loads a message of pack_weights into a model of the same architecture and returns its version.
+    '''
+    for value, frame in zip(model.state_dict().values(), frames[2:]):
+        # frames are read only, the copy keeps torch from writing through them
+        array = np.frombuffer(frame, dtype=value.cpu().numpy().dtype).reshape(value.shape).copy()
+        value.copy_(torch.from_numpy(array))
+    return struct.unpack('<q', frames[1])[0]
+
+
+class RolloutWorker:
+    '''
+    Plays FantasyFootballEnv leagues on any host and streams them to a RolloutLearner:
+    transitions, finished league scores and errors go over a PUSH socket, weights and the stop
+    signal come back over a SUB socket. Sends block once high_water_mark messages are queued,
+    so a worker slows down to the pace of the learner instead of piling up memory.
+    Transitions are tagged with the version of the weights that played them.
+    '''
+
+    def __init__(self, learner_host: str, push_port: int, pub_port: int, env_args: tuple, agent_kwargs: dict,
+                 worker_id: str, sync_interval: int = 16, transitions_per_message: int = default_transitions_per_message,
+                 high_water_mark: int = default_high_water_mark, stop=None):
+        self.env_args = env_args
+        self.worker_id = worker_id.encode()
+        self.sync_interval = sync_interval
+        self.transitions_per_message = transitions_per_message
+        self.stop = stop
+        self.stopped = False
+        self.version = -1
+
+        self.env = FantasyFootballEnv(*env_args)
+        space = self.env.observation_space
+        self.agent = Agent(space['stats'].shape, space['draftboard'].shape, space['roster'].shape,
+                           self.env.action_space.n, 0.0, **agent_kwargs)
+        self.codec = TransitionCodec(self.env.observations.compact())
+
+        self.context = zmq.Context()
+        self.push = self.context.socket(zmq.PUSH)
+        self.push.setsockopt(zmq.SNDHWM, high_water_mark)
+        self.push.setsockopt(zmq.LINGER, 0)
+        self.push.connect(f'tcp://{learner_host}:{push_port}')
+        self.sub = self.context.socket(zmq.SUB)
+        self.sub.setsockopt(zmq.SUBSCRIBE, b'weights')
+        self.sub.setsockopt(zmq.SUBSCRIBE, b'stop')
+        self.sub.setsockopt(zmq.LINGER, 0)
+        self.sub.connect(f'tcp://{learner_host}:{pub_port}')
+
+    def _is_stopped(self) -> bool:
+        return self.stopped or (self.stop is not None and self.stop.is_set())
+
+    def poll_learner(self, timeout: int = 0):
+        '''
+        Handles the messages of the learner, only the newest weights are loaded.
+        '''
+        latest = None
+        while self.sub.poll(timeout):
+            frames = self.sub.recv_multipart()
+            if frames[0] == b'stop':
+                self.stopped = True
+            else:
+                latest = frames
+            timeout = 0
+        if latest is not None:
+            self.version = unpack_weights(self.agent.Q, latest)
+
+    def send(self, frames: list):
+        while not self._is_stopped():
+            try:
+                self.push.send_multipart(frames, zmq.NOBLOCK)
+                return
+            except zmq.Again:
+                # the learner is behind
+                self.poll_learner(backpressure_poll)
+
+    def await_weights(self):
+        '''
+        Asks the learner for its weights until they arrive, a SUB socket that has just connected
+        drops what is published before it joined.
+        '''
+        while self.version < 0 and not self._is_stopped():
+            self.send([b'hello', self.worker_id])
+            self.poll_learner(weights_request_interval)
+
+    def run(self):
+        self.await_weights()
+        pending = []
+        for kind, data in play_leagues(self.env_args, self.agent, self._is_stopped, self.poll_learner,
+                                       self.sync_interval, env=self.env):
+            if kind == 'transition':
+                pending.append(data)
+                if len(pending) == self.transitions_per_message or data[4]:
+                    self.send([b'transitions', self.worker_id, self.codec.encode(pending), struct.pack('<q', self.version)])
+                    pending = []
+            elif kind == 'episode':
+                self.send([b'episode', self.worker_id, struct.pack('<d', data)])
+            else:
+                self.send([b'error', self.worker_id, data.encode()])
+        self.close()
+
+    def close(self):
+        self.push.close()
+        self.sub.close()
+        self.context.term()
+
+
+def _local_worker(seed: int, *args, **kwargs):
+    seed_actor(seed)
+    try:
+        RolloutWorker(*args, **kwargs).run()
+    except KeyboardInterrupt:
+        pass
+
+
+class RolloutLearner(ActorLearner):
+    '''
+    ActorLearner fed over ZeroMQ: RolloutWorkers on any host PUSH compact transitions to the PULL
+    socket bound on bind_host and receive weights from the PUB socket. Ports default to random free ones.
+    num_local_workers workers run as local processes, which with the default 127.0.0.1 bind_host is
+    a loopback mode needing no network. Remote workers are started with
+    python rolloutFabric.py <learner host> --push-port <push_port> --pub-port <pub_port>
+    first_versions holds the weights version of the first transitions of each worker.
+    '''
+
+    def __init__(self, board_path, weekly_stats_path, weekly_info_path, num_local_workers: int = 0,
+                 bind_host: str = '127.0.0.1', push_port: Optional[int] = None, pub_port: Optional[int] = None,
+                 high_water_mark: int = default_high_water_mark,
+                 transitions_per_message: int = default_transitions_per_message, **kwargs):
+        self.bind_host = bind_host
+        self.push_port = push_port
+        self.pub_port = pub_port
+        self.high_water_mark = high_water_mark
+        self.transitions_per_message = transitions_per_message
+        self.workers = set()
+        self.first_versions = {}
+        super().__init__(num_local_workers, board_path, weekly_stats_path, weekly_info_path, **kwargs)
+
+    def _bind(self, socket, port: Optional[int]) -> int:
+        if port is None:
+            return socket.bind_to_random_port(f'tcp://{self.bind_host}')
+        socket.bind(f'tcp://{self.bind_host}:{port}')
+        return port
+
+    def _make_transport(self):
+        self.codec = TransitionCodec(self.probe.observations.compact())
+        self.context = zmq.Context()
+        self.pull = self.context.socket(zmq.PULL)
+        self.pull.setsockopt(zmq.RCVHWM, self.high_water_mark)
+        self.pull.setsockopt(zmq.LINGER, 0)
+        self.push_port = self._bind(self.pull, self.push_port)
+        self.pub = self.context.socket(zmq.PUB)
+        self.pub.setsockopt(zmq.LINGER, 0)
+        self.pub_port = self._bind(self.pub, self.pub_port)
+        self.version = 0
+        self.published_steps = None
+
+    def _actor_process(self, idx: int, agent_kwargs: dict, seed: int):
+        host = '127.0.0.1' if self.bind_host in ('*', '0.0.0.0') else self.bind_host
+        return self._ctx.Process(target=_local_worker, daemon=True,
+                                 args=(seed, host, self.push_port, self.pub_port, self.env_args, agent_kwargs, f'local-{idx}',
+                                       self.sync_interval, self.transitions_per_message, self.high_water_mark, self.stop))
+
+    def _publish(self):
+        # a worker asking again before the next learn step gets the same version
+        if self.published_steps != self.learn_steps:
+            self.version += 1
+            self.weights_message = pack_weights(self.agent.Q, self.version)
+            self.published_steps = self.learn_steps
+        self.pub.send_multipart(self.weights_message)
+
+    def _next_message(self, block: bool):
+        timeout = int(transition_wait * 1000) if block else 0
+        while self.pull.poll(timeout):
+            kind, worker_id, *data = self.pull.recv_multipart()
+            worker = worker_id.decode()
+            if kind == b'hello':
+                # a new worker starts from the current weights, it says hello until they arrive
+                self.workers.add(worker)
+                self._publish()
+                continue
+            if kind == b'transitions':
+                frame, version = data
+                self.first_versions.setdefault(worker, struct.unpack('<q', version)[0])
+                return 'transitions', worker, self.codec.decode(frame)
+            data = data[0]
+            if kind == b'episode':
+                return 'episode', worker, struct.unpack('<d', data)[0]
+            else:
+                return 'error', worker, data.decode()
+        return None
+
+    def close(self):
+        if not self.pub.closed:
+            self.pub.send_multipart([b'stop'])
+        super().close()
+
+    def _close_transport(self):
+        if self.context.closed:
+            return
+        self.pull.close()
+        self.pub.close()
+        self.context.term()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plays leagues and streams them to a RolloutLearner')
+    parser.add_argument('learner_host')
+    parser.add_argument('--push-port', type=int, required=True)
+    parser.add_argument('--pub-port', type=int, required=True)
+    parser.add_argument('--epsilon', type=float, default=actor_epsilon_base)
+    parser.add_argument('--architecture', choices=architectures, default='dense')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--worker-id', default=f'{os.uname().nodename}-{os.getpid()}')
+    parser.add_argument('--board', default=os.path.join(default_data_dir, 'ppr-adp-2023-updated.csv'))
+    parser.add_argument('--weekly-stats', default=os.path.join(default_data_dir, 'weekly-stats-2022.csv'))
+    parser.add_argument('--weekly-info', default=os.path.join(default_data_dir, 'simulator-weekly-info-2023.csv'))
+    args = parser.parse_args()
+
+    seed_actor(args.seed)
+    agent_kwargs = {'epsilon': args.epsilon, 'eps_min': args.epsilon, 'architecture': args.architecture}
+    RolloutWorker(args.learner_host, args.push_port, args.pub_port, (args.board, args.weekly_stats, args.weekly_info),
+                  agent_kwargs, args.worker_id).run()
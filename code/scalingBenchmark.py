@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import queue
+import platform
+import argparse
+import resource
+import traceback
+import multiprocessing as mp
+from goldenHarness import load_engine
+
+default_engine = 'goldenHarness:reference_engine'
+league_sizes = [8, 10, 12]
+# seconds between checks for workers that died without reporting, e.g. killed for memory
+result_poll = 1.0
+
+
+def league_batch(num_leagues: int) -> list:
+    '''
+    Returns the (seed, number of teams) of num_leagues leagues, cycling through the league sizes.
+    '''
+    return [(seed, league_sizes[seed % len(league_sizes)]) for seed in range(num_leagues)]
+
+
+default_batch = league_batch(8)
+
+
+def worker_counts(max_workers: int) -> list:
+    '''
+    Returns 1, 2, 4, ... up to and including max_workers.
+    '''
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def _worker(idx: int, engine_spec: str, paths: dict, tasks, results, go, started: float):
+    '''
+    Loads the engine, reports its startup time, then plays leagues from tasks until a None.
+    '''
+    try:
+        import torch
+        import events
+        from profiler import seed_everything
+        torch.set_num_threads(1)
+        events.set_sink(events.NullSink())
+        engine = load_engine(engine_spec)
+        results.put(('ready', idx, time.time() - started))
+        go.wait()
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seed, num_teams = task
+            seed_everything(seed)
+            start = time.perf_counter()
+            try:
+                engine(num_teams, **paths)
+                results.put(('league', idx, time.perf_counter() - start))
+            except Exception:
+                results.put(('error', idx, traceback.format_exc()))
+        results.put(('done', idx, _peak_rss_mb()))
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        results.put(('failed', idx, traceback.format_exc()))
+
+
+def _next_result(results, processes: list, pending: list) -> tuple:
+    '''
+    Returns the next message of the workers. Raises a RuntimeError once a worker whose pending
+    entry is None has exited without its message arriving.
+    '''
+    while True:
+        try:
+            return results.get(timeout=result_poll)
+        except queue.Empty:
+            dead = [idx for idx, process in enumerate(processes) if pending[idx] is None and not process.is_alive()]
+            if not dead:
+                continue
+            # the worker may have flushed its last message and exited after the timeout
+            try:
+                return results.get_nowait()
+            except queue.Empty:
+                raise RuntimeError(f'Worker {dead[0]} died with exit code {processes[dead[0]].exitcode}')
+
+
+def run_scaling(num_workers: int, batch: list = default_batch, engine_spec: str = default_engine,
+                start_method: str = 'spawn', **paths) -> dict:
+    '''
+    Plays batch on num_workers processes. The clock starts once every worker has loaded the
+    engine, so leagues_per_sec is the steady state throughput and startup is reported per worker.
+    '''
+    ctx = mp.get_context(start_method)
+    tasks, results, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+    for task in batch:
+        tasks.put(task)
+    for _ in range(num_workers):
+        tasks.put(None)
+
+    processes = []
+    for idx in range(num_workers):
+        process = ctx.Process(target=_worker, daemon=True,
+                              args=(idx, engine_spec, paths, tasks, results, go, time.time()))
+        process.start()
+        processes.append(process)
+
+    startup = [None] * num_workers
+    peak_rss_mb = [None] * num_workers
+    league_seconds = []
+    errors = []
+    try:
+        while None in startup:
+            kind, idx, data = _next_result(results, processes, startup)
+            if kind == 'failed':
+                raise RuntimeError(f'Worker {idx} failed to start:\n{data}')
+            startup[idx] = data
+        start = time.perf_counter()
+        go.set()
+        while None in peak_rss_mb:
+            kind, idx, data = _next_result(results, processes, peak_rss_mb)
+            if kind == 'league':
+                league_seconds.append(data)
+            elif kind == 'error':
+                # the league raised, it does not count towards the throughput
+                errors.append(data)
+            elif kind == 'failed':
+                raise RuntimeError(f'Worker {idx} failed:\n{data}')
+            else:
+                peak_rss_mb[idx] = data
+        elapsed = time.perf_counter() - start
+    finally:
+        go.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    return {'workers': num_workers, 'elapsed': elapsed, 'leagues': len(league_seconds), 'errors': errors,
+            'leagues_per_sec': len(league_seconds) / elapsed, 'league_seconds': league_seconds,
+            'startup': startup, 'peak_rss_mb': peak_rss_mb}
+
+
+def scaling_benchmark(counts: list, batch: list = default_batch, engine_spec: str = default_engine,
+                      start_method: str = 'spawn', **paths) -> dict:
+    '''
+    Runs run_scaling for every worker count and adds the parallel efficiency, the speedup over the
+    smallest count divided by the added workers, None when no league of the smallest count finished.
+    '''
+    runs = [run_scaling(num_workers, batch, engine_spec, start_method, **paths) for num_workers in counts]
+    base = runs[0]
+    for run in runs:
+        run['efficiency'] = (run['leagues_per_sec'] / base['leagues_per_sec']) * (base['workers'] / run['workers']) \
+            if base['leagues_per_sec'] > 0 else None
+    return {'engine': engine_spec, 'batch': batch, 'start_method': start_method, 'time': time.time(),
+            'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'processor': platform.processor(), 'cpus': os.cpu_count()},
+            'runs': runs}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Leagues per second of a fixed batch of leagues at 1, 2, 4, ... workers')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--leagues', type=int, default=len(default_batch), help='leagues of the batch')
+    parser.add_argument('--engine', default=default_engine, help='module:function, see goldenHarness')
+    parser.add_argument('--start-method', choices=mp.get_all_start_methods(), default='spawn')
+    parser.add_argument('--output', help='JSON file the results are written to')
+    args = parser.parse_args()
+
+    report = scaling_benchmark(worker_counts(args.max_workers), league_batch(args.leagues), args.engine, args.start_method)
+    for run in report['runs']:
+        efficiency = f'{run["efficiency"]:6.1%}' if run['efficiency'] is not None else '   n/a'
+        print(f'{run["workers"]:3} workers  {run["leagues_per_sec"]:8.4f} leagues/s  efficiency {efficiency}  '
+              f'startup {max(run["startup"]):6.2f}s  peak RSS {max(run["peak_rss_mb"]):7.1f} MB  errors {len(run["errors"])}')
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+from datasetStore import DatasetStore
+
+# raw stat columns of weekly-stats-*.csv used for scoring
+offense_raw_columns = ['passing_yards', 'passing_tds', 'interceptions', 'rushing_yards', 'rushing_tds',
+                       'receptions', 'receiving_yards', 'receiving_tds', 'special_teams_tds']
+
+# derived columns: (name, source columns that are summed)
+offense_summed_columns = {
+    'fumbles_lost': ['sack_fumbles_lost', 'rushing_fumbles_lost', 'receiving_fumbles_lost'],
+    'two_point_conversions': ['passing_2pt_conversions', 'rushing_2pt_conversions', 'receiving_2pt_conversions']
+}
+
+# yardage bonuses are stored as 0/1 indicator columns so bonuses stay linear
+bonus_thresholds = {
+    'passing_yards_300': ('passing_yards', 300),
+    'passing_yards_400': ('passing_yards', 400),
+    'rushing_yards_100': ('rushing_yards', 100),
+    'rushing_yards_200': ('rushing_yards', 200),
+    'receiving_yards_100': ('receiving_yards', 100),
+    'receiving_yards_200': ('receiving_yards', 200)
+}
+
+kicker_columns = ['FieldGoalsMade', 'FieldGoalsMissed', 'ExtraPointsMade', 'ExtraPointsMissed']
+
+defense_raw_columns = ['Sacks', 'Interceptions', 'FumblesRecovered', 'Safeties',
+                       'DefensiveTouchdowns', 'SpecialTeamsTouchdowns']
+
+# points allowed tiers: (name, lowest, highest) inclusive
+points_allowed_tiers = [
+    ('PointsAllowed0', 0, 0),
+    ('PointsAllowed1_6', 1, 6),
+    ('PointsAllowed7_13', 7, 13),
+    ('PointsAllowed14_20', 14, 20),
+    ('PointsAllowed21_27', 21, 27),
+    ('PointsAllowed28_34', 28, 34),
+    ('PointsAllowed35Plus', 35, np.inf)
+]
+
+stat_columns = (offense_raw_columns + list(offense_summed_columns) + list(bonus_thresholds)
+                + kicker_columns + defense_raw_columns + [tier[0] for tier in points_allowed_tiers])
+
+# scoring rulesets: stat column -> points per unit, missing columns score 0
+standard_rules = {
+    'passing_yards': 0.04, 'passing_tds': 4, 'interceptions': -2,
+    'rushing_yards': 0.1, 'rushing_tds': 6,
+    'receiving_yards': 0.1, 'receiving_tds': 6,
+    'fumbles_lost': -2, 'two_point_conversions': 2, 'special_teams_tds': 6,
+    'FieldGoalsMade': 3, 'ExtraPointsMade': 1,
+    'Sacks': 1, 'Interceptions': 2, 'FumblesRecovered': 2, 'Safeties': 2,
+    'DefensiveTouchdowns': 6, 'SpecialTeamsTouchdowns': 6,
+    'PointsAllowed0': 10, 'PointsAllowed1_6': 7, 'PointsAllowed7_13': 4, 'PointsAllowed14_20': 1,
+    'PointsAllowed21_27': 0, 'PointsAllowed28_34': -1, 'PointsAllowed35Plus': -4
+}
+half_ppr_rules = {**standard_rules, 'receptions': 0.5}
+ppr_rules = {**standard_rules, 'receptions': 1}
+
+
+class ScoringEngine:
+    '''
+    Computes fantasy points for every player week of a season from the raw stat files
+    (weekly-stats-<season>.csv, <season>_k_stats.csv and <season>_defense_stats.csv).
+    The stats are laid out once as a (player weeks x stat columns) matrix so scoring
+    a ruleset is a single matrix-vector product.
+    The kicker files do not include field goal distances, so distance bonuses are not
+    available for kickers.
+    '''
+
+    def __init__(self, store: DatasetStore, season: int, season_type: str = 'REG'):
+        self.season = season
+        self.columns = stat_columns
+        self._column_idx = {col: idx for idx, col in enumerate(self.columns)}
+
+        offense = store.read_csv(f'weekly-stats-{season}.csv')
+        offense = offense[offense['season_type'] == season_type]
+        kickers = store.read_csv(f'{season}_k_stats.csv')
+        defense = store.read_csv(f'{season}_defense_stats.csv')
+
+        num_rows = len(offense) + len(kickers) + len(defense)
+        self.matrix = np.zeros((num_rows, len(self.columns)), dtype=np.float64)
+
+        start, end = 0, len(offense)
+        block = self.matrix[start:end]
+        for col in offense_raw_columns:
+            block[:, self._column_idx[col]] = offense[col].to_numpy(dtype=np.float64)
+        for col, sources in offense_summed_columns.items():
+            block[:, self._column_idx[col]] = offense[sources].to_numpy(dtype=np.float64).sum(axis=1)
+        for col, (source, threshold) in bonus_thresholds.items():
+            block[:, self._column_idx[col]] = offense[source].to_numpy() >= threshold
+
+        start, end = end, end + len(kickers)
+        block = self.matrix[start:end]
+        block[:, self._column_idx['FieldGoalsMade']] = kickers['FieldGoalsMade']
+        block[:, self._column_idx['FieldGoalsMissed']] = kickers['FieldGoalsAttempted'] - kickers['FieldGoalsMade']
+        block[:, self._column_idx['ExtraPointsMade']] = kickers['ExtraPointsMade']
+        block[:, self._column_idx['ExtraPointsMissed']] = kickers['ExtraPointsAttempted'] - kickers['ExtraPointsMade']
+
+        start, end = end, end + len(defense)
+        block = self.matrix[start:end]
+        for col in defense_raw_columns:
+            block[:, self._column_idx[col]] = defense[col].to_numpy(dtype=np.float64)
+        points_allowed = defense['PointsAllowedByDefenseSpecialTeams'].to_numpy()
+        for col, low, high in points_allowed_tiers:
+            block[:, self._column_idx[col]] = (points_allowed >= low) & (points_allowed <= high)
+
+        self.names = np.concatenate([offense['player_display_name'].to_numpy(dtype=object),
+                                     kickers['Name'].to_numpy(dtype=object),
+                                     defense['Name'].to_numpy(dtype=object)])
+        self.positions = np.concatenate([offense['position'].to_numpy(dtype=object),
+                                         kickers['Position'].to_numpy(dtype=object),
+                                         defense['Position'].to_numpy(dtype=object)])
+        self.weeks = np.concatenate([offense['week'].to_numpy(),
+                                     kickers['Week'].to_numpy(),
+                                     defense['Week'].to_numpy()]).astype(np.int64)
+        self.num_weeks = int(self.weeks.max())
+
+        player_codes, self.player_names = pd.factorize(self.names)
+        self.player_codes = player_codes
+        self._player_idx = {name: idx for idx, name in enumerate(self.player_names)}
+
+    def weights(self, rules: dict) -> np.ndarray:
+        '''
+        Converts a ruleset into the weight vector of the stat matrix.
+        '''
+        unknown = set(rules) - set(self._column_idx)
+        if unknown:
+            raise ValueError(f"Unknown scoring columns: {sorted(unknown)}")
+        weights = np.zeros(len(self.columns), dtype=np.float64)
+        for col, points in rules.items():
+            weights[self._column_idx[col]] = points
+        return weights
+
+    def score(self, rules: dict) -> np.ndarray:
+        '''
+        Returns the fantasy points of every player week row under a ruleset.
+        '''
+        return self.matrix @ self.weights(rules)
+
+    def season_points(self, rules: dict, dtype=np.float32) -> np.ndarray:
+        '''
+        Returns a (players x weeks) array of fantasy points where row i belongs to
+        player_names[i] and column j to week j + 1. Weeks without a game are 0.
+        '''
+        season = np.zeros((len(self.player_names), self.num_weeks), dtype=dtype)
+        np.add.at(season, (self.player_codes, self.weeks - 1), self.score(rules))
+        return season
+
+    def player_index(self, name: str) -> int:
+        return self._player_idx[name]
+
+    def weekly_points(self, rules: dict) -> pd.DataFrame:
+        '''
+        Returns the scored rows in the layout of simulator-weekly-info-*.csv
+        (Name, Position, Week, FantasyPoints).
+        '''
+        return pd.DataFrame({
+            'Name': self.names,
+            'Position': self.positions,
+            'Week': self.weeks,
+            'FantasyPoints': self.score(rules)
+        })
+
+    def apply_to_weekly_info(self, weekly_info_df: pd.DataFrame, rules: dict) -> pd.DataFrame:
+        '''
+        Returns a copy of a weekly info dataframe with FantasyPoints rescored under a
+        ruleset. Player weeks that are missing from the raw stat files keep their points.
+        '''
+        season = self.season_points(rules, dtype=np.float64)
+        res = weekly_info_df.copy()
+        player_idx = res['Name'].map(self._player_idx)
+        week_idx = res['Week'].to_numpy() - 1
+        known = player_idx.notna().to_numpy() & (week_idx >= 0) & (week_idx < self.num_weeks)
+        has_game = np.zeros(len(self.player_names) * self.num_weeks, dtype=bool)
+        has_game[self.player_codes * self.num_weeks + self.weeks - 1] = True
+        flat_idx = player_idx.to_numpy()[known].astype(int) * self.num_weeks + week_idx[known]
+        matched = has_game[flat_idx]
+        rows = res.index[known][matched]
+        res.loc[rows, 'FantasyPoints'] = season.ravel()[flat_idx[matched]]
+        return res
@@ -4,18 +4,28 @@ from waiverWireSimulator import WaiverWireSimulator
 from fantasyTeam import Team
 from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Union
+from datasetStore import WeeklyDefense
+from injuryIndex import InjuryIndex, report_status_projection_factor
+from telemetry import timed
+from events import emit, enabled, LineupSet, MatchupResult, PlayoffResult, SeasonFinished
 
 PLAYOFF_START_WEEK = 14
 
 class SeasonSimulator:
 
-    def __init__(self, teams: list[Team], weekly_info_path: str, waiver_wire_df: pd.DataFrame):
+    def __init__(self, teams: list[Team], weekly_info_path: Union[str, pd.DataFrame], waiver_wire_df: pd.DataFrame, defense: Optional[WeeklyDefense] = None,
+                 injuries: Optional[InjuryIndex] = None, season: Optional[int] = None):
         """
         Initialize the season simulator with teams, their drafted rosters, and points data.
         
         :param teams: List of team names
         :param draft_rosters: Dictionary where keys are team names and values are dataframes of drafted players
-        :param weekly_info_df: Dataframe containing the points scored by each player each week
+        :param weekly_info_path: Path to (or dataframe of) the points scored by each player each week
+        :param defense: Optional weekly DST actuals that replace the DST points of the weekly info
+        :param injuries: Optional injury report index applied on top of the weekly info statuses
+        :param season: Season of the weekly info, required when injuries are given
         """
         self.teams = teams
         self.teamNames = [team.name for team in self.teams]
@@ -35,7 +45,18 @@ class SeasonSimulator:
             self.toilet_bowl_style = '6Player'
         else:
             raise ValueError("Only 8, 10, and 12 team leagues are supported")
-        self.weekly_info_df = pd.read_csv(weekly_info_path)
+        if injuries is not None and season is None:
+            raise ValueError("A season is required to look up injury reports")
+        self.injuries = injuries
+        self.season = season
+        if isinstance(weekly_info_path, pd.DataFrame):
+            # e.g. weekly info rescored under a different ruleset by the ScoringEngine
+            self.weekly_info_df = weekly_info_path.copy()
+        else:
+            self.weekly_info_df = pd.read_csv(weekly_info_path)
+        if defense is not None:
+            # DST scoring and the points per game used for streaming come from the weekly defense files
+            self.weekly_info_df = defense.apply_to_weekly_info(self.weekly_info_df)
         self.standings = self._create_standings_df()
         self.matchups = self._create_matchups()
         self.playoff_standings = self._create_playoff_standings_df()
@@ -115,6 +136,7 @@ class SeasonSimulator:
 
         return matchups
     
+    @timed('season.ppg')
     def _update_points_per_game(self, week: int):
         '''
         Update running totals for waiver wire and roster
@@ -155,6 +177,7 @@ class SeasonSimulator:
             updated_rosters.drop(columns=['PointsPerGame_new'], inplace=True)
             team.roster = updated_rosters
         
+    @timed('season.status')
     def update_player_status_points(self, week: int):
         '''
         Updates the statuses of all players in waiver wire and rosters for upcoming week.
@@ -170,6 +193,8 @@ class SeasonSimulator:
             elif not update_info.empty:
                 self.waiverWire.waiver_wire.at[idx, 'Status'] = update_info.iloc[0]['Status']
                 self.waiverWire.waiver_wire.at[idx, 'ProjectedFantasyPoints'] = update_info.iloc[0]['ProjectedFantasyPoints']
+                if self.injuries is not None:
+                    self._apply_injury_report(self.waiverWire.waiver_wire, idx, player['Name'], week)
             else:
                 self.waiverWire.waiver_wire.at[idx, 'ProjectedFantasyPoints'] = 0.0
                 self.waiverWire.waiver_wire.at[idx, 'Status'] = 'INA'
@@ -177,6 +202,11 @@ class SeasonSimulator:
         # Update team rosters
         for team in self.teams:
             for idx, player in team.roster.iterrows():
+                if pd.isna(player['Name']):
+                    # empty roster slot
+                    team.roster.at[idx, 'ProjectedFantasyPoints'] = 0.0
+                    team.roster.at[idx, 'Status'] = 'INA'
+                    continue
                 update_info = weekly_info_current_week[weekly_info_current_week['Name'] == player['Name']]
                 if player['ByeWeek'] == week:
                     team.roster.at[idx, 'ProjectedFantasyPoints'] = 0.0
@@ -184,10 +214,28 @@ class SeasonSimulator:
                 elif not update_info.empty:
                     team.roster.at[idx, 'Status'] = update_info.iloc[0]['Status']
                     team.roster.at[idx, 'ProjectedFantasyPoints'] = update_info.iloc[0]['ProjectedFantasyPoints']
+                    if self.injuries is not None:
+                        self._apply_injury_report(team.roster, idx, player['Name'], week)
                 else:
                     team.roster.at[idx, 'ProjectedFantasyPoints'] = 0.0
                     team.roster.at[idx, 'Status'] = 'INA'
 
+    def _apply_injury_report(self, df: pd.DataFrame, idx, name: str, week: int):
+        '''
+        Applies the injury report designation of an active player for the week.
+        Players ruled out are set to Out, questionable and doubtful players keep
+        playing with a reduced projection.
+        '''
+        if df.at[idx, 'Status'] != 'ACT':
+            return
+        report = self.injuries.report_status_by_name(name, self.season, week)
+        if report == 'Out':
+            df.at[idx, 'Status'] = 'Out'
+            df.at[idx, 'ProjectedFantasyPoints'] = 0.0
+        elif report in report_status_projection_factor:
+            df.at[idx, 'ProjectedFantasyPoints'] = df.at[idx, 'ProjectedFantasyPoints'] * report_status_projection_factor[report]
+
+    @timed('season.scoring')
     def simulate_week(self, week: int):
         """
         Simulate a given week of matchups.
@@ -201,7 +249,7 @@ class SeasonSimulator:
             
             self._update_standings(team1, team1_points, team2, team2_points)
             
-            print(f"Week {week} - {team1} vs {team2}: {team1_points} - {team2_points}")
+            emit(MatchupResult, week, team1, team2, team1_points, team2_points)
     
     def _calculate_team_points(self, team: Team, week_points: pd.DataFrame):
         """
@@ -247,6 +295,7 @@ class SeasonSimulator:
         self.standings.loc[self.standings['Team'] == team2, 'Points Against'] += team1_points
         self.standings.sort_values(by=['Wins', 'Points For'], ascending=[False, False], inplace=True)
 
+    @timed('season.scoring')
     def simulate_playoffs(self, week: int):
         """
         Simulate playoffs based on the standings.
@@ -330,7 +379,7 @@ class SeasonSimulator:
             self.playoff_standings.loc[self.playoff_standings['Team'] == winner, 'Rank'] = 1
             self.playoff_standings.loc[self.playoff_standings['Team'] == (seed1_advance if winner != seed1_advance else seed2_advance), 'Rank'] = 2
 
-            print(f"4-Player Playoff Final: {seed1_advance} vs {seed2_advance} - Winner: {winner}")
+            emit(PlayoffResult, 'Playoff', 4, seed1_advance, seed2_advance, winner)
 
     def _simulate_6player_playoffs(self, week: int):
         """
@@ -440,7 +489,7 @@ class SeasonSimulator:
             self.playoff_standings.loc[self.playoff_standings['Team'] == winner, 'Rank'] = 1
             self.playoff_standings.loc[self.playoff_standings['Team'] == (seed1_advance if winner != seed1_advance else seed2_advance), 'Rank'] = 2
 
-            print(f"6-Player Playoff Final: {seed1_advance} vs {seed2_advance} - Winner: {winner}")
+            emit(PlayoffResult, 'Playoff', 6, seed1_advance, seed2_advance, winner)
 
     def _simulate_toilet_bowl(self, week: int):
         """
@@ -516,7 +565,7 @@ class SeasonSimulator:
             self.playoff_standings.loc[self.playoff_standings['Team'] == winner, 'Rank'] = start + 3
             self.playoff_standings.loc[self.playoff_standings['Team'] == (seed1_advance if winner != seed1_advance else seed2_advance), 'Rank'] = start + 2
 
-            print(f"4-Player Toilet Bowl Final: {seed1_advance} vs {seed2_advance} - Winner: {winner}")
+            emit(PlayoffResult, 'Toilet Bowl', 4, seed1_advance, seed2_advance, winner)
 
     def _simulate_toilet_bowl_6player(self, week: int):
         """
@@ -622,9 +671,10 @@ class SeasonSimulator:
             self.playoff_standings.loc[self.playoff_standings['Team'] == winner, 'Rank'] = 11
             self.playoff_standings.loc[self.playoff_standings['Team'] == (seed1_advance if winner != seed1_advance else seed2_advance), 'Rank'] = 12
 
-            print(f"6-Player Toilet Bowl Final: {seed1_advance} vs {seed2_advance} - Winner: {winner}")
+            emit(PlayoffResult, 'Toilet Bowl', 6, seed1_advance, seed2_advance, winner)
 
 
+    @timed('season.waivers')
     def update_rosters(self):
         '''
         Updates all team's rosters for the upcoming week.
@@ -668,6 +718,18 @@ class SeasonSimulator:
                 team.streamDST = not team.streamDST
                 
 
+    def _emit_lineups(self, week: int):
+        '''
+        Emits the (fantasy position, player) rows every team starts the week with, empty rows have no player.
+        '''
+        if not enabled():
+            return
+        for team in self.teams:
+            lineup = tuple((slot, None if pd.isna(name) else name)
+                           for slot, name in zip(team.roster['FantasyPosition'], team.roster['Name']))
+            emit(LineupSet, week, team.name, lineup)
+
+    @timed('season')
     def simulate_season(self):
         """
         Simulate the entire season week by week.
@@ -684,16 +746,15 @@ class SeasonSimulator:
                 break
             self.update_player_status_points(week)
             self.update_rosters()
+            self._emit_lineups(week)
             self.simulate_week(week)
             self._update_points_per_game(week)
             self.waiverWireOrdering = self.standings['Team'].to_numpy()[::-1]
         for playoff_week in range(playoff_start, self.numWeeks + 1):
             self.update_player_status_points(playoff_week)
             self.update_rosters()
+            self._emit_lineups(playoff_week)
             self.simulate_playoffs(playoff_week)
             self._update_points_per_game(playoff_week)
-        print("\nFinal Season Standings:")
-        print(self.standings)
-        print("\nFinal Playoff Standings:")
         self.playoff_standings.sort_values(by='Rank', ascending=True, inplace=True)
-        print(self.playoff_standings)
\ No newline at end of file
+        emit(SeasonFinished, self.standings, self.playoff_standings)
\ No newline at end of file
@@ -0,0 +1,216 @@
+import os
+import csv
+import json
+import time
+import functools
+import numpy as np
+
+# percentiles of the phase durations reported on every flush
+telemetry_percentiles = [50, 90, 99]
+
+# the Telemetry collecting spans and counts, None while disabled
+_active = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'durations', 'spans', 'start')
+
+    def __init__(self, name: str, durations: list, spans):
+        self.name = name
+        self.durations = durations
+        self.spans = spans
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        end = time.perf_counter_ns()
+        self.durations.append(end - self.start)
+        if self.spans is not None:
+            self.spans.append((self.name, self.start, end))
+        return False
+
+
+def span(name: str):
+    '''
+    Context manager timing a phase with the monotonic clock, a shared no-op while telemetry is disabled.
+    '''
+    if _active is None:
+        return _null_span
+    return _Span(name, _active.durations(name), _active.spans)
+
+
+def count(name: str, num: int = 1):
+    '''
+    Adds to a counter of the active telemetry, e.g. env steps. The 'steps' counter drives steps/sec.
+    '''
+    if _active is not None:
+        _active.count(name, num)
+
+
+def timed(name: str):
+    '''
+    Decorator timing every call of a function as the phase name.
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return function(*args, **kwargs)
+            durations = _active.durations(name)
+            spans = _active.spans
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end = time.perf_counter_ns()
+                durations.append(end - start)
+                if spans is not None:
+                    spans.append((name, start, end))
+        return wrapper
+    return decorator
+
+
+class JsonlSink:
+    '''
+    Appends one JSON line per flush.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, record: dict):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+class CsvSink:
+    '''
+    Appends one row per phase and flush: time, elapsed, steps_per_sec, phase and its statistics.
+    '''
+
+    columns = ['time', 'elapsed', 'steps_per_sec', 'phase', 'calls', 'total', 'mean', 'max'] + \
+        [f'p{percentile}' for percentile in telemetry_percentiles]
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'a', newline='') as f:
+            if f.tell() == 0:
+                csv.writer(f).writerow(self.columns)
+
+    def write(self, record: dict):
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            for phase, stats in record['phases'].items():
+                row = dict(stats, time=record['time'], elapsed=record['elapsed'],
+                           steps_per_sec=record['steps_per_sec'], phase=phase)
+                writer.writerow([row[column] for column in self.columns])
+
+
+class Telemetry:
+    '''
+    Collects phase durations (see span and timed) and counters in memory while active. Every
+    flush_interval seconds, checked when counters are updated, it writes per phase call counts,
+    total and mean seconds, max and percentiles plus the rolling steps/sec since the previous
+    flush to sink, and starts a new window. Use as a context manager around training.
+    With trace set every span is also kept with its start and end for chrome_trace.
+    '''
+
+    def __init__(self, sink=None, flush_interval: float = 30.0, trace: bool = False):
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self.records = []
+        self.spans = [] if trace else None
+        self._trace_start = None
+        self._durations = {}
+        self._counts = {}
+        self._window_start = None
+        self._window_steps = 0
+
+    def durations(self, name: str) -> list:
+        durations = self._durations.get(name)
+        if durations is None:
+            durations = self._durations[name] = []
+        return durations
+
+    def count(self, name: str, num: int = 1):
+        self._counts[name] = self._counts.get(name, 0) + num
+        if name == 'steps':
+            self._window_steps += num
+        if time.perf_counter() - self._window_start >= self.flush_interval:
+            self.flush()
+
+    def start(self):
+        global _active
+        self._window_start = time.perf_counter()
+        if self._trace_start is None:
+            self._trace_start = time.perf_counter_ns()
+        _active = self
+
+    def stop(self):
+        global _active
+        if _active is self:
+            self.flush()
+            _active = None
+
+    def summary(self) -> dict:
+        '''
+        Returns the statistics of the current window without starting a new one.
+        '''
+        elapsed = time.perf_counter() - self._window_start
+        phases = {}
+        for name, durations in self._durations.items():
+            if not durations:
+                continue
+            seconds = np.asarray(durations, dtype=np.float64) / 1e9
+            phases[name] = {'calls': len(seconds), 'total': float(seconds.sum()), 'mean': float(seconds.mean()),
+                            'max': float(seconds.max())}
+            for percentile, value in zip(telemetry_percentiles, np.percentile(seconds, telemetry_percentiles)):
+                phases[name][f'p{percentile}'] = float(value)
+        return {'time': time.time(), 'elapsed': elapsed, 'steps_per_sec': self._window_steps / elapsed if elapsed > 0 else 0.0,
+                'counts': dict(self._counts), 'phases': phases}
+
+    def flush(self) -> dict:
+        record = self.summary()
+        self.records.append(record)
+        if self.sink is not None:
+            self.sink.write(record)
+        for durations in self._durations.values():
+            durations.clear()
+        self._window_start = time.perf_counter()
+        self._window_steps = 0
+        return record
+
+    def chrome_trace(self) -> dict:
+        '''
+        Returns the traced spans as complete events of the Chrome trace event format, which
+        chrome://tracing and Perfetto open. Nested spans show up nested.
+        '''
+        if self.spans is None:
+            raise ValueError('Telemetry was created without trace')
+        pid = os.getpid()
+        events = [{'name': name, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': 0,
+                   'ts': (start - self._trace_start) / 1e3, 'dur': (end - start) / 1e3}
+                  for name, start, end in self.spans]
+        # enclosing spans end last, sorting by start keeps them ahead of the spans they contain
+        events.sort(key=lambda event: (event['ts'], -event['dur']))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
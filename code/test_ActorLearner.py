@@ -0,0 +1,47 @@
+import unittest
+import os
+import torch
+import torch.multiprocessing as mp
+from actorLearner import ActorLearner, SharedWeights, actor_epsilons
+from fantasyDeepQNetwork import FantasyDeepQNetwork
+
+
+class TestActorLearner(unittest.TestCase):
+
+    def test_actor_epsilons(self):
+        epsilons = actor_epsilons(8)
+        self.assertAlmostEqual(epsilons[0], 0.4)
+        self.assertAlmostEqual(epsilons[-1], 0.4 ** 8)
+        self.assertEqual(sorted(epsilons, reverse=True), epsilons)
+        self.assertEqual(actor_epsilons(1), [0.4])
+
+    def test_shared_weights(self):
+        learner = FantasyDeepQNetwork(0.001, 4, (2, 3), (2, 3), (1, 2))
+        actor = FantasyDeepQNetwork(0.001, 4, (2, 3), (2, 3), (1, 2))
+        weights = SharedWeights(learner, mp.get_context('spawn'))
+        version = weights.pull(actor, -1)
+        self.assertEqual(version, 0)
+        self.assertTrue(torch.equal(actor.fc4.weight, learner.fc4.weight))
+        with torch.no_grad():
+            learner.fc4.weight.add_(1)
+        self.assertEqual(weights.pull(actor, version), 0)
+        weights.publish(learner)
+        self.assertEqual(weights.pull(actor, version), 1)
+        self.assertTrue(torch.equal(actor.fc4.weight, learner.fc4.weight))
+
+    def test_run(self):
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        with ActorLearner(1, os.path.join(data_dir, 'ppr-adp-2023-updated.csv'),
+                          os.path.join(data_dir, 'weekly-stats-2022.csv'),
+                          os.path.join(data_dir, 'simulator-weekly-info-2023.csv'),
+                          batch_size=4, publish_interval=2, seed=3, architecture='candidate') as trainer:
+            trainer.run(max_learn_steps=4)
+            self.assertEqual(trainer.learn_steps, 4)
+            self.assertEqual(trainer.weights.version.value, 2)
+            self.assertGreaterEqual(trainer.replay_buffer.size(), 4)
+            self.assertEqual(trainer.errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import numpy as np
+from asyncVectorEnv import AsyncVectorEnv
+from observationBuilder import draftboard_name_column
+
+
+class TestAsyncVectorEnv(unittest.TestCase):
+
+    def setUp(self):
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        self.vec_env = AsyncVectorEnv(2, os.path.join(data_dir, 'ppr-adp-2023-updated.csv'),
+                                      os.path.join(data_dir, 'weekly-stats-2022.csv'),
+                                      os.path.join(data_dir, 'simulator-weekly-info-2023.csv'), seed=7)
+
+    def tearDown(self):
+        self.vec_env.close()
+
+    def _legal_actions(self, observations):
+        names = observations['draftboard'][:, :, draftboard_name_column]
+        return [int(names[idx][observations['action_mask'][idx]][0]) for idx in range(self.vec_env.num_envs)]
+
+    def test_step(self):
+        observations = self.vec_env.reset()
+        self.assertEqual(observations['stats'].shape, (2,) + self.vec_env.single_observation_space['stats'].shape)
+        # workers wrote their first observation into shared memory
+        self.assertTrue((observations['draftboard'][:, 0, draftboard_name_column] >= 0).all())
+        actions = self._legal_actions(observations)
+        self.vec_env.step_async(actions)
+        next_observations, rewards, dones = self.vec_env.step_wait()
+        self.assertIs(next_observations['draftboard'], observations['draftboard'])
+        np.testing.assert_array_equal(rewards, [0, 0])
+        np.testing.assert_array_equal(dones, [False, False])
+        for idx in range(2):
+            self.assertNotIn(actions[idx], next_observations['draftboard'][idx, :, draftboard_name_column])
+
+    def test_restart_dead_worker(self):
+        observations = self.vec_env.reset()
+        actions = self._legal_actions(observations)
+        self.vec_env.processes[0].kill()
+        self.vec_env.processes[0].join()
+        observations, rewards, dones = self.vec_env.step(actions)
+        self.assertEqual(self.vec_env.restarted, [0])
+        np.testing.assert_array_equal(dones, [True, False])
+        self.assertTrue(self.vec_env.processes[0].is_alive())
+        # the restarted league can be stepped again
+        observations, rewards, dones = self.vec_env.step(self._legal_actions(observations))
+        self.assertEqual(self.vec_env.restarted, [])
+        np.testing.assert_array_equal(dones, [False, False])
+
+    def test_step_wait_requires_step_async(self):
+        self.vec_env.reset()
+        with self.assertRaises(RuntimeError):
+            self.vec_env.step_wait()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import os
+import tempfile
+import benchmark
+from benchmark import compare, load_baseline, run_benchmark, save_baseline, select
+
+
+def result(seconds):
+    return {'median': seconds, 'min': seconds, 'max': seconds, 'repeats': 1}
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_compare(self):
+        baseline = {'threshold': 0.5, 'benchmarks': {'fast': result(1.0), 'slow': result(1.0)}}
+        results = {'fast': result(1.4), 'slow': result(1.6), 'new': result(100.0)}
+        regressions = compare(results, baseline)
+        self.assertEqual([name for name, *_ in regressions], ['slow'])
+        self.assertAlmostEqual(regressions[0][3], 0.6)
+        # an explicit threshold overrides the one of the baseline
+        self.assertEqual(len(compare(results, baseline, threshold=0.1)), 2)
+
+    def test_save_merges(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            self.assertEqual(load_baseline(path)['benchmarks'], {})
+            save_baseline({'a': result(1.0), 'b': result(2.0)}, path)
+            save_baseline({'b': result(3.0)}, path)
+            baseline = load_baseline(path)
+        self.assertEqual(baseline['benchmarks']['a']['min'], 1.0)
+        self.assertEqual(baseline['benchmarks']['b']['min'], 3.0)
+        self.assertEqual(baseline['threshold'], benchmark.default_threshold)
+
+    def test_committed_baseline_covers_benchmarks(self):
+        baseline = load_baseline()
+        self.assertEqual(set(baseline['benchmarks']), {bench.name for bench in benchmark.benchmarks})
+
+    def test_run_micro(self):
+        bench, = select(['_selectTopPlayerByPositionSet'])
+        timing = run_benchmark(bench, repeats=2)
+        self.assertEqual(timing['repeats'], 2)
+        self.assertGreater(timing['min'], 0)
+        self.assertLessEqual(timing['min'], timing['median'])
+        self.assertEqual([bench.name for bench in select(kind='macro')],
+                         ['draft_8', 'draft_10', 'draft_12', 'season', 'episode'])
+
+
+if __name__ == '__main__':
+    unittest.main()
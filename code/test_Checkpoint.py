@@ -0,0 +1,146 @@
+import unittest
+import os
+import random
+import tempfile
+from unittest import mock
+import numpy as np
+import torch
+from gymnasium import spaces
+from checkpoint import Checkpointer
+from fantasyDeepQNetwork import Agent
+from replayBuffer import ReplayBuffer, PrioritizedReplayBuffer
+
+
+def make_observation(value):
+    return {
+        'stats': np.full((4, 3), value, dtype=np.float32),
+        'draftboard': np.array([[0, value, 0], [0, 1, 0]], dtype=np.float32),
+        'roster': np.full((2, 2), value, dtype=np.float32),
+        'action_mask': np.array([True, True])
+    }
+
+
+class TestCheckpointer(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        np.random.seed(0)
+        self.directory = tempfile.TemporaryDirectory()
+        self.observation_space = spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(4, 3), dtype=np.float32),
+            'draftboard': spaces.Box(low=-1, high=100, shape=(2, 3), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(2, 2), dtype=np.float32),
+            'action_mask': spaces.MultiBinary(2)
+        })
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _agent(self):
+        return Agent((4, 3), (2, 3), (2, 2), 6, 0.001)
+
+    def _fill(self, buffer, steps):
+        for step in steps:
+            buffer.add(make_observation(step), step % 6, float(step), make_observation(step + 1), False)
+
+    def test_resume(self):
+        agent, buffer = self._agent(), PrioritizedReplayBuffer(8, self.observation_space)
+        self._fill(buffer, range(5))
+        batch = buffer.sample(4)
+        buffer.update_priorities(batch['indices'], agent.learn(batch))
+        checkpointer = Checkpointer(self.directory.name)
+        checkpointer.save(agent, buffer, {'episode': 3, 'scores': [1.0, 2.0, 3.0]})
+        expected = (random.random(), np.random.random(), torch.rand(1).item())
+
+        resumed_agent, resumed_buffer = self._agent(), PrioritizedReplayBuffer(8, self.observation_space)
+        counters = Checkpointer(self.directory.name).load(resumed_agent, resumed_buffer)
+        self.assertEqual(counters, {'episode': 3, 'scores': [1.0, 2.0, 3.0]})
+        self.assertEqual((random.random(), np.random.random(), torch.rand(1).item()), expected)
+        self.assertEqual(resumed_agent.epsilon, agent.epsilon)
+        self.assertTrue(torch.equal(resumed_agent.Q.fc4.weight, agent.Q.fc4.weight))
+        self.assertEqual(resumed_agent.Q.optimizer.state_dict()['state'][0]['step'], 1)
+        self.assertEqual((resumed_buffer.position, resumed_buffer.count), (5, 5))
+        self.assertTrue(torch.equal(resumed_buffer.observations['stats'][:5], buffer.observations['stats'][:5]))
+        np.testing.assert_array_equal(resumed_buffer.priorities.tree, buffer.priorities.tree)
+
+    def test_incremental_replay(self):
+        agent, buffer = self._agent(), ReplayBuffer(8, self.observation_space)
+        checkpointer = Checkpointer(self.directory.name, keep=2)
+        self._fill(buffer, range(6))
+        checkpointer.save(agent, buffer, {'episode': 1})
+        self.assertEqual(checkpointer.last_saved_slots, 8)
+        # three new transitions wrap around the end of the ring
+        self._fill(buffer, range(6, 9))
+        checkpointer.save(agent, buffer, {'episode': 2})
+        self.assertEqual(checkpointer.last_saved_slots, 3)
+        checkpointer.save(agent, buffer, {'episode': 3})
+        self.assertEqual(checkpointer.last_saved_slots, 0)
+        self.assertEqual(sorted(entry for entry in os.listdir(self.directory.name) if entry.startswith('checkpoint')),
+                         ['checkpoint-000001', 'checkpoint-000002'])
+
+        resumed = ReplayBuffer(8, self.observation_space)
+        self.assertEqual(Checkpointer(self.directory.name).load(self._agent(), resumed), {'episode': 3})
+        self.assertEqual(resumed.actions.tolist(), buffer.actions.tolist())
+        self.assertEqual(resumed.observations['stats'][0, 0, 0].item(), 8)
+
+    def test_aborted_save(self):
+        agent, buffer = self._agent(), ReplayBuffer(8, self.observation_space)
+        checkpointer = Checkpointer(self.directory.name, keep=2)
+        self._fill(buffer, range(6))
+        first = checkpointer.save(agent, buffer, {'episode': 1})
+        first_stats = buffer.observations['stats'].clone()
+        self._fill(buffer, range(6, 9))
+        checkpointer.save(agent, buffer, {'episode': 2})
+        second_stats, second_actions = buffer.observations['stats'].clone(), buffer.actions.clone()
+        # the delta of the third save is written, then the save dies before it is committed
+        self._fill(buffer, range(9, 13))
+        with mock.patch('checkpoint.json.dump', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                checkpointer.save(agent, buffer, {'episode': 3})
+
+        resumed = ReplayBuffer(8, self.observation_space)
+        self.assertEqual(Checkpointer(self.directory.name).load(self._agent(), resumed), {'episode': 2})
+        self.assertTrue(torch.equal(resumed.observations['stats'], second_stats))
+        self.assertTrue(torch.equal(resumed.actions, second_actions))
+        self.assertEqual((resumed.position, resumed.count, resumed.added), (1, 8, 9))
+        # the older kept checkpoint still holds its own transitions
+        older = ReplayBuffer(8, self.observation_space)
+        self.assertEqual(Checkpointer(self.directory.name).load(self._agent(), older, first), {'episode': 1})
+        self.assertTrue(torch.equal(older.observations['stats'][:6], first_stats[:6]))
+
+        # the retried save still covers the transitions of the aborted one
+        checkpointer.save(agent, buffer, {'episode': 3})
+        self.assertEqual(checkpointer.last_saved_slots, 4)
+        resumed = ReplayBuffer(8, self.observation_space)
+        Checkpointer(self.directory.name).load(self._agent(), resumed)
+        self.assertTrue(torch.equal(resumed.observations['stats'], buffer.observations['stats']))
+        self.assertFalse(os.path.exists(first))
+
+    def test_aborted_fold(self):
+        agent, buffer = self._agent(), ReplayBuffer(8, self.observation_space)
+        checkpointer = Checkpointer(self.directory.name, keep=2)
+        self._fill(buffer, range(4))
+        checkpointer.save(agent, buffer, {'episode': 1})
+        # the second save commits, then dies folding the first delta into the base
+        self._fill(buffer, range(4, 6))
+        with mock.patch.object(Checkpointer, '_fold', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                checkpointer.save(agent, buffer, {'episode': 2})
+
+        restarted, resumed = Checkpointer(self.directory.name, keep=2), ReplayBuffer(8, self.observation_space)
+        self.assertEqual(restarted.load(self._agent(), resumed), {'episode': 2})
+        self._fill(resumed, range(6, 7))
+        restarted.save(agent, resumed, {'episode': 3})
+        self.assertEqual(sorted(entry for entry in os.listdir(self.directory.name) if entry.startswith('checkpoint')),
+                         ['checkpoint-000001', 'checkpoint-000002'])
+
+        loaded = ReplayBuffer(8, self.observation_space)
+        self.assertEqual(Checkpointer(self.directory.name).load(self._agent(), loaded), {'episode': 3})
+        self.assertEqual(loaded.rewards.tolist(), [0, 1, 2, 3, 4, 5, 6, 0])
+
+    def test_no_checkpoint(self):
+        self.assertIsNone(Checkpointer(self.directory.name).load(self._agent(), ReplayBuffer(2, self.observation_space)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+from datasetStore import DatasetStore, defense_stat_columns
+
+
+class TestDatasetStore(unittest.TestCase):
+
+    def setUp(self):
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        self.store = DatasetStore(data_dir)
+
+    def test_weekly_defense_shape(self):
+        defense = self.store.weekly_defense(2023)
+        self.assertEqual(len(defense.teams), 32)
+        self.assertEqual(defense.played.shape, (32, 18))
+        for col in defense_stat_columns:
+            self.assertEqual(defense.stat(col).shape, (32, 18))
+            self.assertEqual(defense.stat(col).dtype, np.float32)
+        # every team has at least one bye week in an 18 week export
+        self.assertTrue((defense.played.sum(axis=1) < 18).all())
+
+    def test_weekly_defense_values(self):
+        defense = self.store.weekly_defense(2023)
+        dal = defense.team_index('DAL')
+        self.assertEqual(defense.team_names[dal], 'Dallas Cowboys')
+        self.assertEqual(defense.team_index('Dallas Cowboys'), dal)
+        self.assertEqual(defense.points('DAL', 1), 37.0)
+        self.assertEqual(defense.stat('SACK')[dal, 0], 7.0)
+        self.assertAlmostEqual(float(defense.rostered[dal, 0]), 92.8, places=4)
+        # JAC in the weekly files is normalized to the board abbreviation
+        self.assertIn('JAX', defense.teams)
+        self.assertEqual(defense.team_index('JAC'), defense.team_index('JAX'))
+
+    def test_weekly_defense_is_cached(self):
+        self.assertIs(self.store.weekly_defense(2022), self.store.weekly_defense(2022))
+        self.assertIsNot(self.store.weekly_defense(2022), self.store.weekly_defense(2023))
+
+    def test_apply_to_weekly_info(self):
+        defense = self.store.weekly_defense(2023)
+        weekly_info = pd.DataFrame({
+            'Name': ['Dallas Cowboys', 'Dallas Cowboys', 'AJ Brown'],
+            'Position': ['DST', 'DST', 'WR'],
+            'Week': [1, 7, 1],
+            'FantasyPoints': [35.0, 3.0, 14.9],
+            'Status': ['ACT', 'ACT', 'ACT'],
+            'ProjectedFantasyPoints': [7.1, 7.0, 16.04]
+        })
+        updated = defense.apply_to_weekly_info(weekly_info)
+        self.assertEqual(updated.loc[0, 'FantasyPoints'], 37.0)
+        # week 7 is the Dallas bye so the original value is kept
+        self.assertEqual(updated.loc[1, 'FantasyPoints'], 3.0)
+        self.assertEqual(updated.loc[2, 'FantasyPoints'], 14.9)
+        self.assertEqual(weekly_info.loc[0, 'FantasyPoints'], 35.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import io
+import os
+import json
+import tempfile
+import contextlib
+import pandas as pd
+import events
+from events import NullSink, RingBufferSink, JsonlSink, ConsoleSink, MatchupResult, PickMade, emit, use_sink
+from seasonSimulator import SeasonSimulator
+from fantasyTeam import Team
+pd.options.mode.chained_assignment = None
+
+
+class Unbuildable:
+    def __init__(self, *fields):
+        raise AssertionError('the null sink built an event')
+
+
+class TestEvents(unittest.TestCase):
+
+    def test_null_sink_skips_building(self):
+        with use_sink(NullSink()):
+            emit(Unbuildable, 1, 2)
+
+    def test_ring_buffer(self):
+        with use_sink(RingBufferSink(capacity=2)) as sink:
+            for pick in range(1, 4):
+                emit(PickMade, 'Team1', pick, 1, f'Player{pick}', 'WR')
+        self.assertEqual([event.pick for event in sink.events], [2, 3])
+        self.assertIsInstance(sink.events[0], PickMade)
+
+    def test_use_sink_restores(self):
+        previous = events.get_sink()
+        with use_sink(NullSink()):
+            self.assertIsInstance(events.get_sink(), NullSink)
+        self.assertIs(events.get_sink(), previous)
+
+    def test_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.jsonl')
+            sink = JsonlSink(path)
+            with use_sink(sink):
+                emit(MatchupResult, 1, 'Team1', 'Team2', 101.5, 99.0)
+            sink.close()
+            with open(path) as f:
+                record = json.loads(f.readline())
+        self.assertEqual(record, {'event': 'MatchupResult', 'week': 1, 'team1': 'Team1', 'team2': 'Team2',
+                                  'points1': 101.5, 'points2': 99.0})
+
+    def test_console(self):
+        output = io.StringIO()
+        with use_sink(ConsoleSink()), contextlib.redirect_stdout(output):
+            emit(PickMade, 'Team1', 3, 1, 'Justin Jefferson', 'WR')
+        self.assertEqual(output.getvalue(), 'Team1 selection at pick 3, round 1: Justin Jefferson, WR\n')
+
+    def test_season_matchups(self):
+        teams = [Team(f'Team{i}', i) for i in range(1, 9)]
+        teams[0].addPickToRoster('WR', 'Justin Jefferson', 1, 1.0, 'MIN', 13, 0, 'ACT')
+        weekly_info_df = pd.DataFrame({'Name': ['Justin Jefferson'], 'Position': ['WR'], 'Week': [1],
+                                       'FantasyPoints': [15.4], 'Status': ['ACT'], 'ProjectedFantasyPoints': [16.0]})
+        waiver_wire_df = pd.DataFrame({'Name': ['Cooper Kupp'], 'Team': ['LAR'], 'ByeWeek': [10], 'Position': ['WR'],
+                                       'AverageDraftPositionPPR': [20.0], 'Status': ['ACT'], 'PointsPerGame': [0.0],
+                                       'ProjectedFantasyPoints': [0.0], 'FantasyPoints': [0.0]})
+        season = SeasonSimulator(teams, weekly_info_df, waiver_wire_df)
+        with use_sink(RingBufferSink()) as sink:
+            season.simulate_week(1)
+        self.assertEqual(len(sink.events), 4)
+        self.assertTrue(all(isinstance(event, MatchupResult) and event.week == 1 for event in sink.events))
+        points = {event.team1: event.points1 for event in sink.events}
+        points.update({event.team2: event.points2 for event in sink.events})
+        self.assertEqual(points['Team1'], 15.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
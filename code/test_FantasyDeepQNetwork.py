@@ -0,0 +1,130 @@
+import unittest
+import numpy as np
+import torch
+from fantasyDeepQNetwork import Agent, CandidateQNetwork, action_slots
+
+
+class TestAgent(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        torch.manual_seed(0)
+        self.dims = ((6, 3), (4, 3), (2, 2), 10)
+        draftboard = np.zeros((3, 4, 3), dtype=np.float32)
+        draftboard[..., 1] = [[0, 1, 2, -1], [3, 4, 5, 6], [7, 8, 9, -1]]
+        self.observations = {
+            'stats': np.random.random((3, 6, 3)).astype(np.float32),
+            'draftboard': draftboard,
+            'roster': np.random.random((3, 2, 2)).astype(np.float32),
+            'action_mask': np.array([[False, True, True, False], [True, True, True, True], [False] * 4])
+        }
+
+    def test_choose_actions_are_legal(self):
+        agent = Agent(*self.dims, 0.001, epsilon=0.0)
+        with torch.no_grad():
+            q_values = agent.Q({key: torch.from_numpy(self.observations[key]) for key in ['stats', 'draftboard', 'roster']})
+        actions = agent.choose_actions(self.observations)
+        self.assertEqual(actions[0], [1, 2][q_values[0, [1, 2]].argmax()])
+        self.assertEqual(actions[1], 3 + q_values[1, 3:7].argmax())
+        # no legal candidate left, every listed name is allowed
+        self.assertIn(actions[2], [7, 8, 9])
+        single = {key: value[1] for key, value in self.observations.items()}
+        self.assertEqual(agent.choose_action(single), actions[1])
+
+    def test_exploring_rows_stay_legal(self):
+        agent = Agent(*self.dims, 0.001, epsilon=1.0)
+        for _ in range(20):
+            actions = agent.choose_actions(self.observations)
+            self.assertIn(actions[0], [1, 2])
+            self.assertIn(actions[2], [7, 8, 9])
+
+    def test_inference_backends(self):
+        reference = Agent(*self.dims, 0.001, epsilon=0.0)
+        for backend in ['script', 'compile', 'quantized']:
+            agent = Agent(*self.dims, 0.001, epsilon=0.0, inference_backend=backend)
+            agent.Q.load_state_dict(reference.Q.state_dict())
+            agent.refresh_inference_model()
+            actions = agent.choose_actions(self.observations)
+            self.assertIn(actions[0], [1, 2])
+            if backend != 'quantized':
+                np.testing.assert_array_equal(actions[:2], reference.choose_actions(self.observations)[:2])
+
+    def test_inference_refresh(self):
+        transitions = [({key: value[1] for key, value in self.observations.items()}, 3, 1.0,
+                        {key: value[0] for key, value in self.observations.items()}, False)] * 2
+        for backend in ['script', 'compile']:
+            for architecture in ['dense', 'candidate']:
+                agent = Agent(*self.dims, 0.001, epsilon=0.0, inference_backend=backend, inference_refresh=2,
+                              architecture=architecture)
+                if architecture == 'candidate':
+                    # three week stat blocks, the inference copy is rebuilt with them
+                    agent.Q.num_weeks = 3
+                    agent.inference_Q = None
+                    agent.refresh_inference_model()
+                agent.learn(transitions)
+                self.assertFalse(torch.equal(list(agent.inference_Q.parameters())[-1], list(agent.Q.parameters())[-1]))
+                agent.learn(transitions)
+                self.assertTrue(torch.equal(list(agent.inference_Q.parameters())[-1], list(agent.Q.parameters())[-1]))
+                agent.choose_actions(self.observations)
+
+
+class TestCandidateQNetwork(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        torch.manual_seed(0)
+        # two stat candidates of three weeks, four draftboard candidates
+        self.network = CandidateQNetwork(0.001, (6, 5), (4, 3), (2, 2), num_weeks=3)
+        self.observations = {
+            'stats': torch.rand(2, 6, 5),
+            'draftboard': torch.rand(2, 4, 3),
+            'roster': torch.full((2, 2, 2), -1.0)
+        }
+
+    def test_one_value_per_candidate(self):
+        q_values = self.network(self.observations)
+        self.assertEqual(q_values.shape, (2, 4))
+        # the same weights score a longer draftboard
+        longer = dict(self.observations, draftboard=torch.rand(2, 7, 3))
+        self.assertEqual(self.network(longer).shape, (2, 7))
+
+    def test_candidates_share_weights(self):
+        observations = {key: value.clone() for key, value in self.observations.items()}
+        observations['draftboard'][0, 3] = observations['draftboard'][0, 2]
+        q_values = self.network(observations)
+        # neither candidate has stats, identical rows score the same
+        self.assertAlmostEqual(q_values[0, 2].item(), q_values[0, 3].item(), places=6)
+
+    def test_padding_weeks_are_ignored(self):
+        observations = {key: value.clone() for key, value in self.observations.items()}
+        # one played week against the same week played twice
+        observations['stats'][:, 1] = observations['stats'][:, 0]
+        observations['stats'][:, 2] = -1
+        twice = self.network(observations)
+        observations['stats'][:, 1] = -1
+        np.testing.assert_allclose(self.network(observations).detach().numpy(), twice.detach().numpy(), rtol=1e-5)
+
+    def test_agent(self):
+        agent = Agent((6, 3), (4, 3), (2, 2), 10, 0.001, epsilon=0.0, architecture='candidate')
+        agent.Q.num_weeks = 3
+        draftboard = np.zeros((2, 4, 3), dtype=np.float32)
+        draftboard[..., 1] = [[4, 7, 2, -1], [9, 5, 1, 0]]
+        observations = {
+            'stats': np.random.random((2, 6, 3)).astype(np.float32),
+            'draftboard': draftboard,
+            'roster': np.random.random((2, 2, 2)).astype(np.float32),
+            'action_mask': np.array([[True, False, True, False], [True] * 4])
+        }
+        actions = agent.choose_actions(observations)
+        self.assertIn(actions[0], [4, 2])
+        self.assertIn(actions[1], [9, 5, 1, 0])
+        np.testing.assert_array_equal(action_slots(torch.from_numpy(draftboard), torch.tensor([2, 0])), [2, 3])
+        with self.assertRaises(ValueError):
+            action_slots(torch.from_numpy(draftboard), torch.tensor([2, 3]))
+        transitions = [({key: value[0] for key, value in observations.items()}, 2, 1.0,
+                        {key: value[1] for key, value in observations.items()}, False)] * 2
+        self.assertEqual(agent.learn(transitions).shape, (2,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+from featureStore import PlayerFeatureStore, load_position_aggregates
+
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        script_dir = os.path.dirname(__file__)
+        self.descriptive_path = os.path.join(script_dir, '..', 'data', 'players_historic_descriptive_stats.csv')
+        self.stats = pd.DataFrame({
+            'player_display_name': [2, 2, 2, 0],
+            'week': [1, 2, 4, 1],
+            'fantasy_points_ppr': [10.5, 3.0, 21.0, 7.0]
+        })
+        self.positions = pd.Series(['QB', 'QB', 'QB', 'K'])
+        self.aggregates = load_position_aggregates(self.descriptive_path, 2022)
+        self.store = PlayerFeatureStore(self.stats, 'player_display_name', num_players=3,
+                                        positions=self.positions, aggregates=self.aggregates, num_weeks=4)
+
+    def test_load_position_aggregates(self):
+        self.assertEqual(list(self.aggregates.index), ['FB', 'QB', 'RB', 'TE', 'WR'])
+        self.assertIn('fantasy_points_ppr_mean', self.aggregates.columns)
+        self.assertNotIn('week_mean', self.aggregates.columns)
+        self.assertAlmostEqual(float(self.aggregates.loc['QB', 'fantasy_points_ppr_mean']), 16.301991, places=5)
+
+    def test_gather(self):
+        out = np.zeros((3 * 4, 3), dtype=np.float32)
+        res = self.store.gather([2, -1, 1], out=out)
+        self.assertIs(res, out)
+        np.testing.assert_array_equal(out[:3, 1], [1, 2, 4])
+        np.testing.assert_array_equal(out[3], [-1, -1, -1])
+        # players without stats and missing ids are padding
+        self.assertTrue((out[4:] == -1).all())
+        np.testing.assert_array_equal(self.store.num_games, [1, 0, 3])
+
+    def test_gather_aggregates(self):
+        res = self.store.gather_aggregates([2, 0, -1])
+        col = self.store.aggregate_columns.index('fantasy_points_ppr_mean')
+        self.assertAlmostEqual(float(res[0, col]), 16.301991, places=5)
+        # no descriptive stats for kickers
+        self.assertTrue((res[1:] == -1).all())
+
+    def test_truncates_to_num_weeks(self):
+        store = PlayerFeatureStore(self.stats, 'player_display_name', num_players=3, num_weeks=2)
+        np.testing.assert_array_equal(store.gather([2])[:, 1], [1, 2])
+        with self.assertRaises(ValueError):
+            store.gather_aggregates([2])
+
+
+if __name__ == '__main__':
+    unittest.main()
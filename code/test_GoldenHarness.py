@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+import pandas as pd
+from events import MatchupResult, SeasonFinished, WaiverTransaction
+from goldenHarness import (GoldenRecorder, canonical, check_engine, first_divergence, reference_engine)
+
+
+class TestGoldenHarness(unittest.TestCase):
+
+    def test_canonical(self):
+        self.assertEqual(canonical((np.int64(3), np.float64(1.23456789), float('nan'), pd.NA, ('QB', None))),
+                         [3, 1.234568, None, None, ['QB', None]])
+
+    def test_recorder(self):
+        recorder = GoldenRecorder()
+        recorder.write(WaiverTransaction(1, 'Team1', 'Greg Joseph', None, 'K'))
+        recorder.write(MatchupResult(1, 'Team1', 'Team2', np.float64(100.1), 99.0))
+        standings = pd.DataFrame({'Team': ['Team1', 'Team2'], 'Wins': [1, 0]})
+        playoff_standings = pd.DataFrame({'Team': ['Team2', 'Team1'], 'Rank': [1, 2]})
+        recorder.write(SeasonFinished(standings, playoff_standings))
+        self.assertEqual(recorder.rows, [
+            ['WaiverTransaction', 1, 'Team1', 'Greg Joseph', None, 'K'],
+            ['MatchupResult', 1, 'Team1', 'Team2', 100.1, 99.0],
+            ['Standings', 'Team1', 1], ['Standings', 'Team2', 0],
+            ['PlayoffStandings', 'Team2', 1], ['PlayoffStandings', 'Team1', 2]
+        ])
+
+    def test_first_divergence(self):
+        expected = [['PickMade', 'Team1', 1, 1, 'A', 'WR'], ['PickMade', 'Team2', 2, 1, 'B', 'RB']]
+        self.assertIsNone(first_divergence(expected, [list(row) for row in expected]))
+        divergence = first_divergence(expected, [expected[0], ['PickMade', 'Team2', 2, 1, 'C', 'RB']])
+        self.assertEqual(divergence.index, 1)
+        self.assertEqual(divergence.actual[4], 'C')
+        # a shorter record diverges at its first missing row
+        self.assertEqual(first_divergence(expected, expected[:1]), (1, expected[1], None))
+
+    def test_reference_engine_matches_golden(self):
+        self.assertEqual(check_engine(reference_engine, leagues=[(0, 8)]), {(0, 8): None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import os
+from datasetStore import DatasetStore
+from injuryIndex import report_status_codes, practice_status_codes
+
+
+class TestInjuryIndex(unittest.TestCase):
+
+    def setUp(self):
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        self.injuries = DatasetStore(data_dir).injury_index()
+
+    def test_lazy_loading(self):
+        self.assertFalse(self.injuries._loaded)
+        self.injuries.player_id('Darnell Mooney')
+        self.assertTrue(self.injuries._loaded)
+
+    def test_lookup(self):
+        player_id = self.injuries.player_id('Darnell Mooney')
+        self.assertEqual(player_id, '00-0036309')
+        report, practice = self.injuries.lookup(player_id, 2021, 1)
+        self.assertEqual(report, report_status_codes['Questionable'])
+        self.assertEqual(practice, practice_status_codes['Full Participation in Practice'])
+        self.assertEqual(self.injuries.lookup(player_id, 2021, 30), (0, 0))
+
+    def test_report_status_by_name(self):
+        self.assertEqual(self.injuries.report_status_by_name('Justin Jefferson', 2023, 15), 'Questionable')
+        self.assertEqual(self.injuries.report_status_by_name('Cooper Kupp', 2023, 18), 'Doubtful')
+        self.assertEqual(self.injuries.report_status_by_name('Darnell Mooney', 2023, 17), 'Out')
+        self.assertIsNone(self.injuries.report_status_by_name('Justin Jefferson', 2023, 1))
+        self.assertIsNone(self.injuries.report_status_by_name('Not A Player', 2023, 1))
+
+    def test_missed_weeks(self):
+        player_id = self.injuries.player_id('Deshaun Watson')
+        self.assertEqual(self.injuries.missed_weeks(player_id)[:2], [(2021, 1, 9), (2021, 11, 18)])
+        self.assertEqual(self.injuries.missed_weeks('not-an-id'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+import pandas as pd
+import torch
+from memoryProfiler import memory_report, track_allocations
+
+
+class Holder:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+leaked = []
+
+
+def leak():
+    leaked.append(bytearray(2**20))
+
+
+class TestMemoryProfiler(unittest.TestCase):
+
+    def test_report(self):
+        table = pd.DataFrame({'Name': ['a', 'b', 'c'], 'Points': [1.0, 2.0, 3.0]})
+        array = np.zeros((100, 10), dtype=np.float32)
+        child = Holder(table=table, copy=table.copy(), rows={'first': array[:10]})
+        # the walk charges a shared buffer to the first path reaching it
+        root = Holder(array=array, tensor=torch.from_numpy(array), child=child, again=table,
+                      weights=torch.zeros(8, 4))
+        report = memory_report({'root': root})
+
+        components = {component.path: component for component in report.components}
+        self.assertEqual(components['root.child.table'].nbytes, int(table.memory_usage(deep=True).sum()))
+        # the view, the tensor and the array share one buffer counted once
+        self.assertEqual(components['root.array'].nbytes, 4000)
+        self.assertEqual(components["root.child.rows['first']"].nbytes, 0)
+        self.assertEqual(components["root.child.rows['first']"].shared_with, 'root.array')
+        self.assertEqual(components['root.tensor'].nbytes, 0)
+        self.assertEqual(components['root.weights'].nbytes, 128)
+        # the same DataFrame reached twice is reported once
+        self.assertNotIn('root.again', components)
+        self.assertEqual(report.total, 4000 + 128 + 2 * components['root.child.table'].nbytes)
+        self.assertEqual(report.by_prefix(1)['root.child'], 2 * components['root.child.table'].nbytes)
+        self.assertEqual(report.duplicates(min_bytes=0), [['root.child.table', 'root.child.copy']])
+
+    def test_track_allocations(self):
+        growths = track_allocations(leak, 3, top=1)
+        self.assertEqual(len(growths), 3)
+        for growth in growths:
+            self.assertGreater(growth.growth, 2**19)
+            line, size, count = growth.top[0]
+            self.assertIn('test_MemoryProfiler.py', line)
+            self.assertGreater(size, 2**19)
+        leaked.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+import pandas as pd
+from gymnasium import spaces
+from featureStore import PlayerFeatureStore
+from observationBuilder import ObservationBuilder, copy_observation
+
+
+class TestObservationBuilder(unittest.TestCase):
+
+    def setUp(self):
+        # positions: 0 = QB, 1 = K
+        self.board = pd.DataFrame({
+            'Rank': [1, 2, 3, 4, 5],
+            'Name': [3, 0, 4, 1, 2],
+            'Position': [0, 0, 1, 0, 1],
+            'Available': [1, 1, 1, 1, 1]
+        })
+        stats = pd.DataFrame({'player_display_name': [0, 0, 3], 'week': [1, 2, 1]})
+        self.store = PlayerFeatureStore(stats, 'player_display_name', num_players=5, num_weeks=2)
+        observation_space = spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(2 * 2, 2), dtype=np.float32),
+            'draftboard': spaces.Box(low=-1, high=100, shape=(4, 4), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(3, 2), dtype=np.float32)
+        })
+        self.builder = ObservationBuilder(observation_space, candidates_per_position=2)
+        self.builder.load(self.board, self.store, position_codes=[0, 1], stats_position_codes=[0])
+
+    def test_build(self):
+        obs = self.builder.build()
+        np.testing.assert_array_equal(obs['draftboard'][:, 1], [3, 0, 4, 2])
+        np.testing.assert_array_equal(obs['stats'][:, 1], [1, -1, 1, 2])
+        self.assertTrue((obs['roster'] == -1).all())
+
+    def test_mark_unavailable(self):
+        self.builder.mark_unavailable(3)
+        self.builder.mark_unavailable(4)
+        obs = self.builder.build()
+        np.testing.assert_array_equal(obs['draftboard'][:, 1], [0, 1, 2, -1])
+        np.testing.assert_array_equal(obs['stats'][:, 1], [1, 2, -1, -1])
+
+    def test_action_mask(self):
+        obs = self.builder.build()
+        np.testing.assert_array_equal(obs['action_mask'], [True, True, True, True])
+        # kickers are no longer legal
+        self.builder.legal_positions[1] = False
+        self.builder.mark_unavailable(3)
+        obs = self.builder.build()
+        np.testing.assert_array_equal(obs['action_mask'], [True, True, False, False])
+
+    def test_buffers_are_reused(self):
+        obs = self.builder.build()
+        kept = copy_observation(obs)
+        self.builder.set_roster(np.array([[1, 2]], dtype=np.float32))
+        self.builder.mark_unavailable(3)
+        next_obs = self.builder.build()
+        self.assertIs(next_obs['draftboard'], obs['draftboard'])
+        np.testing.assert_array_equal(next_obs['roster'][:, 0], [1, -1, -1])
+        np.testing.assert_array_equal(kept['draftboard'][:, 1], [3, 0, 4, 2])
+
+    def test_compact_expand(self):
+        self.builder.set_roster(np.array([[1, 2]], dtype=np.float32))
+        self.builder.mark_unavailable(3)
+        expected = copy_observation(self.builder.build())
+        compact = self.builder.compact()
+        self.assertEqual(compact['candidate_rows'].dtype, np.int32)
+        # a batch of two copies expands into the built observation twice
+        batch = {key: np.stack([value, value]) for key, value in compact.items()}
+        out = {key: np.empty((2,) + buf.shape, dtype=buf.dtype) for key, buf in self.builder.buffers.items()}
+        self.builder.expand(batch, out)
+        for key, value in expected.items():
+            np.testing.assert_array_equal(out[key][1], value)
+
+    def test_tensor_views(self):
+        builder = ObservationBuilder(spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(4, 2), dtype=np.float32),
+            'draftboard': spaces.Box(low=-1, high=100, shape=(4, 4), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(3, 2), dtype=np.float32)
+        }), candidates_per_position=2, as_tensor=True)
+        builder.load(self.board, self.store, position_codes=[0, 1], stats_position_codes=[0])
+        obs = builder.build()
+        self.assertEqual(obs['draftboard'].data_ptr(), builder.buffers['draftboard'].ctypes.data)
+        self.assertEqual(obs['draftboard'][0, 1].item(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
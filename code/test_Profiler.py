@@ -0,0 +1,37 @@
+import unittest
+import json
+import pstats
+import tempfile
+from profiler import profile, prepare_runs
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_draft_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            outputs = profile('draft', 1, directory, seed=0)
+            stats = pstats.Stats(outputs['stats'])
+            self.assertTrue(any(function[2] == 'otherTeamSelection' for function in stats.stats))
+            with open(outputs['collapsed']) as f:
+                lines = f.read().splitlines()
+            with open(outputs['trace']) as f:
+                trace = json.load(f)
+
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith('profiler.py:_run;profiler.py:bot_draft'))
+            self.assertGreater(int(count), 0)
+        names = [event['name'] for event in trace['traceEvents']]
+        self.assertEqual(names[0], 'draft')
+        # every team picks in each of the 16 rounds
+        self.assertEqual(names.count('draft.pick') % 16, 0)
+        self.assertIn(names.count('draft.pick') // 16, [8, 10, 12])
+
+    def test_unknown_workload(self):
+        with self.assertRaises(ValueError):
+            prepare_runs('trade', 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
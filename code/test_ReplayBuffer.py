@@ -0,0 +1,165 @@
+import unittest
+import numpy as np
+import torch
+from gymnasium import spaces
+import pandas as pd
+from replayBuffer import ReplayBuffer, CompactReplayBuffer, PrioritizedReplayBuffer, SumTree, stack_transitions
+from featureStore import PlayerFeatureStore
+from observationBuilder import ObservationBuilder, copy_observation
+from fantasyDeepQNetwork import Agent
+
+
+def make_observation(value):
+    return {
+        'stats': np.full((4, 3), value, dtype=np.float32),
+        'draftboard': np.array([[0, value, 0], [0, -1, 0]], dtype=np.float32),
+        'roster': np.full((2, 2), value, dtype=np.float32),
+        'action_mask': np.array([True, False])
+    }
+
+
+class TestReplayBuffer(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.observation_space = spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(4, 3), dtype=np.float32),
+            'draftboard': spaces.Box(low=-1, high=100, shape=(2, 3), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(2, 2), dtype=np.float32),
+            'action_mask': spaces.MultiBinary(2)
+        })
+        self.buffer = ReplayBuffer(3, self.observation_space)
+
+    def test_ring_buffer(self):
+        for step in range(5):
+            self.buffer.add(make_observation(step), step, float(step), make_observation(step + 1), step == 4)
+        self.assertEqual(self.buffer.size(), 3)
+        self.assertEqual(self.buffer.position, 2)
+        # the two oldest transitions were overwritten
+        self.assertEqual(sorted(self.buffer.actions.tolist()), [2, 3, 4])
+        self.assertEqual(self.buffer.observations['stats'][0, 0, 0].item(), 3)
+        self.assertEqual(self.buffer.next_observations['roster'][1, 0, 0].item(), 5)
+        self.assertEqual(self.buffer.bytes_per_transition, 2 * (12 + 6 + 4) * 4 + 2 * 2 + 8 + 4 + 1)
+
+    def test_sample(self):
+        for step in range(3):
+            self.buffer.add(make_observation(step), step, float(step), make_observation(step + 1), False)
+        batch = self.buffer.sample(5)
+        self.assertEqual(batch['observations']['stats'].shape, (5, 4, 3))
+        self.assertEqual(batch['observations']['action_mask'].dtype, torch.bool)
+        # every field of a sampled row comes from the same transition
+        np.testing.assert_array_equal(batch['observations']['stats'][:, 0, 0].numpy(), batch['actions'].numpy())
+        np.testing.assert_array_equal(batch['next_observations']['roster'][:, 0, 0].numpy(), batch['rewards'].numpy() + 1)
+        # the batch tensors are reused
+        self.assertIs(self.buffer.sample(5)['actions'], batch['actions'])
+
+    def test_add_batch(self):
+        observations = {key: np.stack([make_observation(0)[key], make_observation(1)[key]]) for key in self.observation_space}
+        next_observations = {key: np.stack([make_observation(1)[key], make_observation(2)[key]]) for key in self.observation_space}
+        self.buffer.add_batch(observations, [0, 1], [0.0, 1.0], next_observations, [False, True])
+        self.buffer.add_batch(observations, [0, 1], [0.0, 1.0], next_observations, [False, True])
+        self.assertEqual(self.buffer.size(), 3)
+        self.assertEqual(self.buffer.actions.tolist(), [1, 1, 0])
+        self.assertEqual(self.buffer.dones.tolist(), [True, True, False])
+
+    def test_learn_from_sample(self):
+        for step in range(3):
+            self.buffer.add(make_observation(step), step, float(step), make_observation(step + 1), False)
+        agent = Agent((4, 3), (2, 3), (2, 2), 6, 0.001)
+        agent.learn(self.buffer.sample(2))
+        transitions = [(make_observation(0), 0, 0.0, make_observation(1), False)] * 2
+        batch = stack_transitions(transitions)
+        self.assertEqual(batch['observations']['stats'].shape, (2, 4, 3))
+        agent.learn(transitions)
+        self.assertLess(agent.epsilon, 1.0)
+
+
+class TestPrioritizedReplayBuffer(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        torch.manual_seed(0)
+        self.observation_space = spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(4, 3), dtype=np.float32),
+            'draftboard': spaces.Box(low=-1, high=100, shape=(2, 3), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(2, 2), dtype=np.float32),
+            'action_mask': spaces.MultiBinary(2)
+        })
+        self.buffer = PrioritizedReplayBuffer(5, self.observation_space, alpha=1.0, beta=0.5)
+        for step in range(5):
+            self.buffer.add(make_observation(step), step, float(step), make_observation(step), False)
+
+    def test_sum_tree(self):
+        tree = SumTree(5)
+        tree.update([0, 1, 2, 3, 4], [1.0, 0.0, 2.0, 3.0, 4.0])
+        self.assertEqual(tree.total, 10.0)
+        np.testing.assert_array_equal(tree.find([0.5, 1.0, 2.9, 3.0, 9.9]), [0, 2, 2, 3, 4])
+        tree.update([4, 4], [1.0, 0.5])
+        self.assertEqual(tree.total, 6.5)
+
+    def test_sample_follows_priorities(self):
+        self.buffer.update_priorities([0, 1, 2, 3, 4], [0.0, 0.0, 0.0, 0.0, 10.0])
+        batch = self.buffer.sample(4)
+        self.assertEqual(batch['indices'].tolist(), [4, 4, 4, 4])
+        np.testing.assert_array_equal(batch['observations']['stats'][:, 0, 0].numpy(), [4, 4, 4, 4])
+        self.assertEqual(self.buffer.max_priority, 10.0 + self.buffer.epsilon)
+
+    def test_importance_weights(self):
+        self.buffer.update_priorities([0, 1, 2, 3, 4], [1.0, 1.0, 1.0, 1.0, 4.0])
+        batch = self.buffer.sample(8)
+        weights = dict(zip(batch['indices'].tolist(), batch['weights'].tolist()))
+        self.assertAlmostEqual(weights[0], 1.0)
+        self.assertAlmostEqual(weights[4], np.sqrt((1 + self.buffer.epsilon) / (4 + self.buffer.epsilon)), places=5)
+        self.assertGreater(self.buffer.beta, 0.5)
+
+    def test_learn_updates_priorities(self):
+        agent = Agent((4, 3), (2, 3), (2, 2), 6, 0.001)
+        batch = self.buffer.sample(3)
+        td_errors = agent.learn(batch)
+        self.assertEqual(td_errors.shape, (3,))
+        self.buffer.update_priorities(batch['indices'], td_errors)
+        np.testing.assert_allclose(self.buffer.priorities.get(batch['indices'].numpy()),
+                                   td_errors.numpy() + self.buffer.epsilon, rtol=1e-5)
+
+
+class TestCompactReplayBuffer(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        board = pd.DataFrame({'Rank': [1, 2, 3], 'Name': [2, 0, 1], 'Position': [0, 0, 0], 'Available': [1, 1, 1]})
+        stats = pd.DataFrame({'player_display_name': [0, 0, 2], 'week': [1, 2, 1]})
+        store = PlayerFeatureStore(stats, 'player_display_name', num_players=3, num_weeks=2)
+        self.builder = ObservationBuilder(spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(2 * 2, 2), dtype=np.float32),
+            'draftboard': spaces.Box(low=-1, high=100, shape=(2, 4), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(2, 2), dtype=np.float32)
+        }), candidates_per_position=2)
+        self.builder.load(board, store, position_codes=[0], stats_position_codes=[0])
+        self.buffer = CompactReplayBuffer(4, self.builder)
+
+    def test_sample_matches_built_observations(self):
+        expected = []
+        for step, name in enumerate([2, 0, 1]):
+            obs = copy_observation(self.builder.build())
+            compact = self.builder.compact()
+            self.builder.mark_unavailable(name)
+            self.builder.set_roster(np.array([[step, name]], dtype=np.float32))
+            expected.append((obs, copy_observation(self.builder.build())))
+            self.buffer.add(compact, step, float(step), self.builder.compact(), step == 2)
+        batch = self.buffer.sample(6)
+        self.assertEqual(batch['observations']['stats'].dtype, torch.float32)
+        for row, idx in enumerate(batch['indices'].tolist()):
+            obs, next_obs = expected[idx]
+            self.assertEqual(batch['actions'][row].item(), idx)
+            for key in obs:
+                np.testing.assert_array_equal(batch['observations'][key][row].numpy(), obs[key])
+                np.testing.assert_array_equal(batch['next_observations'][key][row].numpy(), next_obs[key])
+
+    def test_bytes_per_transition(self):
+        full = ReplayBuffer(4, spaces.Dict({key: spaces.Box(low=-1, high=100, shape=buf.shape)
+                                            for key, buf in self.builder.buffers.items()}))
+        self.assertLess(self.buffer.bytes_per_transition, full.bytes_per_transition)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from gymnasium import spaces
+from replayStore import MemmapReplayStore
+from featureStore import PlayerFeatureStore
+from observationBuilder import ObservationBuilder, copy_observation
+
+
+def make_observation(value):
+    return {
+        'stats': np.full((4, 3), value, dtype=np.float32),
+        'roster': np.full((2, 2), value, dtype=np.float32),
+        'action_mask': np.array([True, value % 2 == 0])
+    }
+
+
+class TestMemmapReplayStore(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.directory = tempfile.TemporaryDirectory()
+        self.observation_space = spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(4, 3), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(2, 2), dtype=np.float32),
+            'action_mask': spaces.MultiBinary(2)
+        })
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _fill(self, store, steps):
+        for step in steps:
+            store.add(make_observation(step), step, float(step), make_observation(step + 1), step % 3 == 0)
+
+    def test_sample_across_shards(self):
+        store = MemmapReplayStore(self.directory.name, self.observation_space, max_size=8, shard_size=3)
+        self.assertEqual(store.max_size, 9)
+        self._fill(store, range(11))
+        self.assertEqual(len(store), 9)
+        batch = store.sample(20)
+        actions = batch['actions'].numpy()
+        self.assertTrue(set(actions) <= set(range(2, 11)))
+        np.testing.assert_array_equal(batch['observations']['stats'][:, 0, 0].numpy(), actions)
+        np.testing.assert_array_equal(batch['next_observations']['roster'][:, 0, 0].numpy(), actions + 1)
+        np.testing.assert_array_equal(batch['observations']['action_mask'][:, 1].numpy(), actions % 2 == 0)
+        np.testing.assert_array_equal(batch['dones'].numpy(), actions % 3 == 0)
+
+    def test_resume(self):
+        store = MemmapReplayStore(self.directory.name, self.observation_space, max_size=10, shard_size=4)
+        self._fill(store, range(6))
+        store.close()
+        store = MemmapReplayStore(self.directory.name, self.observation_space)
+        self.assertEqual((len(store), store.position, store.max_size), (6, 6, 12))
+        self._fill(store, range(6, 8))
+        self.assertEqual(sorted(set(store.sample(50)['actions'].tolist())), list(range(8)))
+        with self.assertRaises(ValueError):
+            MemmapReplayStore(self.directory.name, spaces.Dict({'stats': self.observation_space['stats']}))
+
+    def test_readers_see_flushed_transitions(self):
+        writer = MemmapReplayStore(self.directory.name, self.observation_space, max_size=10, shard_size=4)
+        self._fill(writer, range(3))
+        writer.flush()
+        reader = MemmapReplayStore(self.directory.name, readonly=True)
+        self._fill(writer, range(3, 6))
+        self.assertEqual(len(reader), 3)
+        writer.flush()
+        reader.refresh()
+        self.assertEqual(len(reader), 6)
+        self.assertTrue(set(reader.sample(30)['actions'].tolist()) <= set(range(6)))
+
+    def test_compact_observations(self):
+        board = pd.DataFrame({'Rank': [1, 2, 3], 'Name': [2, 0, 1], 'Position': [0, 0, 0], 'Available': [1, 1, 1]})
+        stats = pd.DataFrame({'player_display_name': [0, 0, 2], 'week': [1, 2, 1]})
+        builder = ObservationBuilder(spaces.Dict({
+            'stats': spaces.Box(low=-1, high=100, shape=(2 * 2, 2), dtype=np.float32),
+            'draftboard': spaces.Box(low=-1, high=100, shape=(2, 4), dtype=np.float32),
+            'roster': spaces.Box(low=-1, high=100, shape=(2, 2), dtype=np.float32)
+        }), candidates_per_position=2)
+        builder.load(board, PlayerFeatureStore(stats, 'player_display_name', num_players=3, num_weeks=2),
+                     position_codes=[0], stats_position_codes=[0])
+        store = MemmapReplayStore(self.directory.name, max_size=4, observations=builder)
+        expected = copy_observation(builder.build())
+        compact = builder.compact()
+        builder.mark_unavailable(2)
+        expected_next = copy_observation(builder.build())
+        store.add(compact, 0, 0.0, builder.compact(), False)
+        batch = store.sample(2)
+        for key in expected:
+            np.testing.assert_array_equal(batch['observations'][key][1].numpy(), expected[key])
+            np.testing.assert_array_equal(batch['next_observations'][key][0].numpy(), expected_next[key])
+
+
+if __name__ == '__main__':
+    unittest.main()
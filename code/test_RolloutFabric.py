@@ -0,0 +1,72 @@
+import unittest
+import os
+import numpy as np
+import torch
+import zmq
+from rolloutFabric import RolloutLearner, TransitionCodec, pack_weights, unpack_weights
+from fantasyDeepQNetwork import FantasyDeepQNetwork
+
+
+class TestRolloutFabric(unittest.TestCase):
+
+    def test_transition_codec(self):
+        observation = {'candidate_rows': np.arange(4, dtype=np.int32), 'roster': np.ones((2, 3), dtype=np.float32),
+                       'action_mask': np.array([True, False, True, False])}
+        next_observation = {key: value[::-1].copy() for key, value in observation.items()}
+        codec = TransitionCodec(observation)
+        frame = codec.encode([(observation, 5, 1.5, next_observation, False), (next_observation, 7, 0.0, observation, True)])
+        self.assertEqual(len(frame), 2 * codec.dtype.itemsize)
+        observations, actions, rewards, next_observations, dones = codec.decode(frame)
+        np.testing.assert_array_equal(actions, [5, 7])
+        np.testing.assert_array_equal(rewards, [1.5, 0.0])
+        np.testing.assert_array_equal(dones, [False, True])
+        np.testing.assert_array_equal(observations['candidate_rows'][1], [3, 2, 1, 0])
+        np.testing.assert_array_equal(next_observations['action_mask'][0], [False, True, False, True])
+
+    def test_weights(self):
+        learner = FantasyDeepQNetwork(0.001, 4, (2, 3), (2, 3), (1, 2))
+        worker = FantasyDeepQNetwork(0.001, 4, (2, 3), (2, 3), (1, 2))
+        self.assertEqual(unpack_weights(worker, pack_weights(learner, 3)), 3)
+        for key, value in learner.state_dict().items():
+            self.assertTrue(torch.equal(worker.state_dict()[key], value))
+
+    def test_loopback(self):
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        with RolloutLearner(os.path.join(data_dir, 'ppr-adp-2023-updated.csv'),
+                            os.path.join(data_dir, 'weekly-stats-2022.csv'),
+                            os.path.join(data_dir, 'simulator-weekly-info-2023.csv'),
+                            num_local_workers=1, batch_size=4, publish_interval=2, seed=3,
+                            architecture='candidate') as learner:
+            learner.run(max_learn_steps=4)
+            self.assertEqual(learner.workers, {'local-0'})
+            self.assertEqual(learner.learn_steps, 4)
+            # one publish for the hello of the worker and one every two learn steps
+            self.assertEqual(learner.version, 3)
+            # the worker waited for the weights published on its hello before playing
+            self.assertGreaterEqual(learner.first_versions['local-0'], 1)
+            self.assertGreaterEqual(learner.received, 4)
+            self.assertEqual(learner.errors, [])
+
+    def test_backpressure(self):
+        context = zmq.Context()
+        pull = context.socket(zmq.PULL)
+        pull.setsockopt(zmq.RCVHWM, 1)
+        port = pull.bind_to_random_port('tcp://127.0.0.1')
+        push = context.socket(zmq.PUSH)
+        push.setsockopt(zmq.SNDHWM, 1)
+        push.connect(f'tcp://127.0.0.1:{port}')
+        sent = 0
+        # a learner that never reads stops the worker after a few messages
+        with self.assertRaises(zmq.Again):
+            for sent in range(1000):
+                push.send(b'x' * 100000, zmq.NOBLOCK)
+                pull.poll(10)
+        self.assertLess(sent, 100)
+        for socket in (push, pull):
+            socket.close(linger=0)
+        context.term()
+
+
+if __name__ == '__main__':
+    unittest.main()
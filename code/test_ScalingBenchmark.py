@@ -0,0 +1,56 @@
+import unittest
+import os
+import time
+import signal
+from scalingBenchmark import league_batch, scaling_benchmark, worker_counts
+
+
+def sleep_engine(num_teams, **paths):
+    time.sleep(0.01 * num_teams)
+
+
+def failing_engine(num_teams, **paths):
+    raise ValueError('bad league')
+
+
+def killed_engine(num_teams, **paths):
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+class TestScalingBenchmark(unittest.TestCase):
+
+    def test_worker_counts(self):
+        self.assertEqual(worker_counts(1), [1])
+        self.assertEqual(worker_counts(4), [1, 2, 4])
+        self.assertEqual(worker_counts(6), [1, 2, 4, 6])
+
+    def test_league_batch(self):
+        self.assertEqual(league_batch(4), [(0, 8), (1, 10), (2, 12), (3, 8)])
+
+    def test_scaling(self):
+        report = scaling_benchmark([1, 2], league_batch(4), 'test_ScalingBenchmark:sleep_engine')
+        self.assertEqual([run['workers'] for run in report['runs']], [1, 2])
+        for run in report['runs']:
+            self.assertEqual(run['leagues'], 4)
+            self.assertEqual(run['errors'], [])
+            self.assertGreater(run['leagues_per_sec'], 0)
+            self.assertEqual(len(run['startup']), run['workers'])
+            self.assertTrue(all(startup > 0 for startup in run['startup']))
+            self.assertTrue(all(rss > 0 for rss in run['peak_rss_mb']))
+        self.assertEqual(report['runs'][0]['efficiency'], 1.0)
+
+    def test_failed_leagues(self):
+        report = scaling_benchmark([1], league_batch(2), 'test_ScalingBenchmark:failing_engine')
+        run, = report['runs']
+        self.assertEqual(run['leagues'], 0)
+        self.assertEqual(len(run['errors']), 2)
+        self.assertIn('bad league', run['errors'][0])
+        self.assertIsNone(run['efficiency'])
+
+    def test_killed_worker(self):
+        with self.assertRaisesRegex(RuntimeError, 'Worker 0 died with exit code -9'):
+            scaling_benchmark([1], league_batch(1), 'test_ScalingBenchmark:killed_engine')
+
+
+if __name__ == '__main__':
+    unittest.main()
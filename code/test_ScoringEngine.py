@@ -0,0 +1,64 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+from datasetStore import DatasetStore
+from scoringEngine import ScoringEngine, ppr_rules, half_ppr_rules, standard_rules
+
+
+class TestScoringEngine(unittest.TestCase):
+
+    def setUp(self):
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        self.store = DatasetStore(data_dir)
+        self.engine = ScoringEngine(self.store, 2023)
+
+    def test_ppr_matches_precomputed_points(self):
+        offense = self.store.read_csv('weekly-stats-2023.csv')
+        offense = offense[offense['season_type'] == 'REG']
+        points = self.engine.score(ppr_rules)[:len(offense)]
+        np.testing.assert_allclose(points, offense['fantasy_points_ppr'].to_numpy(), atol=1e-9)
+
+    def test_reception_scoring(self):
+        ppr = self.engine.score(ppr_rules)
+        half = self.engine.score(half_ppr_rules)
+        standard = self.engine.score(standard_rules)
+        receptions = self.engine.matrix[:, self.engine.columns.index('receptions')]
+        np.testing.assert_allclose(ppr - standard, receptions)
+        np.testing.assert_allclose(half - standard, 0.5 * receptions)
+
+    def test_custom_bonus(self):
+        rules = {**ppr_rules, 'rushing_yards_100': 3}
+        bonus = self.engine.score(rules) - self.engine.score(ppr_rules)
+        rushing_yards = self.engine.matrix[:, self.engine.columns.index('rushing_yards')]
+        np.testing.assert_allclose(bonus, 3 * (rushing_yards >= 100))
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            self.engine.score({'passing_yard': 0.04})
+
+    def test_season_points(self):
+        season = self.engine.season_points(ppr_rules)
+        self.assertEqual(season.shape, (len(self.engine.player_names), self.engine.num_weeks))
+        self.assertEqual(season.dtype, np.float32)
+        row = self.engine.player_index('AJ Brown')
+        self.assertAlmostEqual(float(season[row, 0]), 14.9, places=4)
+
+    def test_apply_to_weekly_info(self):
+        weekly_info = pd.DataFrame({
+            'Name': ['AJ Brown', 'Not A Player'],
+            'Position': ['WR', 'WR'],
+            'Week': [1, 1],
+            'FantasyPoints': [0.0, 5.0],
+            'Status': ['ACT', 'ACT'],
+            'ProjectedFantasyPoints': [16.04, 1.0]
+        })
+        rescored = self.engine.apply_to_weekly_info(weekly_info, half_ppr_rules)
+        # 7 receptions for 79 yards in week 1
+        self.assertAlmostEqual(rescored.loc[0, 'FantasyPoints'], 11.4)
+        self.assertEqual(rescored.loc[1, 'FantasyPoints'], 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
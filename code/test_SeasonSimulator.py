@@ -1,10 +1,74 @@
 import unittest
+import os
 import pandas as pd
 import numpy as np
 from seasonSimulator import SeasonSimulator
 from waiverWireSimulator import WaiverWireSimulator
+from fantasyTeam import Team
+from datasetStore import DatasetStore
+pd.options.mode.chained_assignment = None
 
 class TestSeasonSimulator(unittest.TestCase):
 
     def setUp(self):
-        pass
\ No newline at end of file
+        np.random.seed(42)
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        self.store = DatasetStore(data_dir)
+
+        self.teams = [Team(f'Team{i}', i) for i in range(1, 9)]
+        self.teams[0].addPickToRoster('WR', 'Justin Jefferson', 1, 1.0, 'MIN', 13, 0, 'ACT')
+        self.teams[0].addPickToRoster('QB', 'Aaron Rodgers', 16, 80.0, 'NYJ', 7, 0, 'ACT')
+
+        self.weekly_info_df = pd.DataFrame({
+            'Name': ['Justin Jefferson', 'Aaron Rodgers', 'Cooper Kupp'],
+            'Position': ['WR', 'QB', 'WR'],
+            'Week': [15, 15, 15],
+            'FantasyPoints': [15.4, 10.0, 12.0],
+            'Status': ['ACT', 'ACT', 'ACT'],
+            'ProjectedFantasyPoints': [16.0, 12.0, 14.0]
+        })
+        self.waiver_wire_df = pd.DataFrame({
+            'Name': ['Cooper Kupp'],
+            'Team': ['LAR'],
+            'ByeWeek': [10],
+            'Position': ['WR'],
+            'AverageDraftPositionPPR': [20.0],
+            'Status': ['ACT'],
+            'PointsPerGame': [0.0],
+            'ProjectedFantasyPoints': [0.0],
+            'FantasyPoints': [0.0]
+        })
+
+    def test_injuries_require_season(self):
+        with self.assertRaises(ValueError):
+            SeasonSimulator(self.teams, self.weekly_info_df, self.waiver_wire_df, injuries=self.store.injury_index())
+
+    def test_update_player_status_points_with_injuries(self):
+        season = SeasonSimulator(self.teams, self.weekly_info_df, self.waiver_wire_df,
+                                 injuries=self.store.injury_index(), season=2023)
+        season.update_player_status_points(15)
+        roster = self.teams[0].roster
+        jefferson = roster[roster['Name'] == 'Justin Jefferson'].iloc[0]
+        rodgers = roster[roster['Name'] == 'Aaron Rodgers'].iloc[0]
+        # questionable keeps playing with a reduced projection
+        self.assertEqual(jefferson['Status'], 'ACT')
+        self.assertAlmostEqual(jefferson['ProjectedFantasyPoints'], 16.0 * 0.85)
+        # ruled out for week 15 of 2023
+        self.assertEqual(rodgers['Status'], 'Out')
+        self.assertEqual(rodgers['ProjectedFantasyPoints'], 0.0)
+        kupp = season.waiverWire.waiver_wire.iloc[0]
+        self.assertEqual(kupp['Status'], 'ACT')
+        self.assertEqual(kupp['ProjectedFantasyPoints'], 14.0)
+
+    def test_update_player_status_points_without_injuries(self):
+        season = SeasonSimulator(self.teams, self.weekly_info_df, self.waiver_wire_df)
+        season.update_player_status_points(15)
+        roster = self.teams[0].roster
+        rodgers = roster[roster['Name'] == 'Aaron Rodgers'].iloc[0]
+        self.assertEqual(rodgers['Status'], 'ACT')
+        self.assertEqual(rodgers['ProjectedFantasyPoints'], 12.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
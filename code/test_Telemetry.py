@@ -0,0 +1,83 @@
+import unittest
+import os
+import csv
+import json
+import time
+import tempfile
+import telemetry
+from telemetry import Telemetry, JsonlSink, CsvSink, span, timed
+
+
+@timed('work')
+def work(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        self.assertIsNone(telemetry._active)
+        self.assertIs(span('phase'), span('other'))
+        self.assertEqual(work(0), 0)
+        telemetry.count('steps')
+
+    def test_spans_and_counts(self):
+        with Telemetry() as recorder:
+            for _ in range(3):
+                work(0.01)
+            with span('phase'):
+                time.sleep(0.02)
+            telemetry.count('steps', 4)
+            record = recorder.summary()
+        self.assertIsNone(telemetry._active)
+        self.assertEqual(record['phases']['work']['calls'], 3)
+        self.assertGreaterEqual(record['phases']['work']['p50'], 0.01)
+        self.assertGreaterEqual(record['phases']['phase']['total'], 0.02)
+        self.assertEqual(record['counts'], {'steps': 4})
+        self.assertGreater(record['steps_per_sec'], 0)
+        # stop flushed the window
+        self.assertEqual(recorder.records[-1]['phases']['work']['calls'], 3)
+
+    def test_periodic_flush(self):
+        jsonl_path = os.path.join(self.directory.name, 'telemetry.jsonl')
+        csv_path = os.path.join(self.directory.name, 'telemetry.csv')
+        for sink in (JsonlSink(jsonl_path), CsvSink(csv_path)):
+            with Telemetry(sink, flush_interval=0.0):
+                work(0)
+                telemetry.count('steps')
+                work(0)
+        with open(jsonl_path) as f:
+            records = [json.loads(line) for line in f]
+        # the count flushed the first call, stop the second one
+        self.assertEqual([record['phases']['work']['calls'] for record in records], [1, 1])
+        with open(csv_path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['phase'] for row in rows], ['work', 'work'])
+        self.assertIn('p99', rows[0])
+
+    def test_chrome_trace(self):
+        with Telemetry(trace=True) as recorder:
+            with span('outer'):
+                work(0.01)
+                work(0)
+        trace = recorder.chrome_trace()
+        names = [event['name'] for event in trace['traceEvents']]
+        self.assertEqual(names, ['outer', 'work', 'work'])
+        outer, first, second = trace['traceEvents']
+        self.assertEqual(outer['ph'], 'X')
+        self.assertLessEqual(outer['ts'], first['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], second['ts'] + second['dur'])
+        self.assertGreaterEqual(first['dur'], 1e4)
+        with self.assertRaises(ValueError):
+            Telemetry().chrome_trace()
+
+
+if __name__ == '__main__':
+    unittest.main()
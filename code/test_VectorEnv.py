@@ -0,0 +1,44 @@
+import unittest
+import os
+import numpy as np
+from vectorEnv import VectorEnv
+from observationBuilder import draftboard_name_column
+
+
+class TestVectorEnv(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(42)
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        self.vec_env = VectorEnv(2, os.path.join(data_dir, 'ppr-adp-2023-updated.csv'),
+                                 os.path.join(data_dir, 'weekly-stats-2022.csv'),
+                                 os.path.join(data_dir, 'simulator-weekly-info-2023.csv'))
+
+    def _legal_actions(self, observations):
+        names = observations['draftboard'][:, :, draftboard_name_column]
+        return [int(names[idx][observations['action_mask'][idx]][0]) for idx in range(self.vec_env.num_envs)]
+
+    def test_reset(self):
+        observations = self.vec_env.reset()
+        self.assertEqual(observations['stats'].shape, (2,) + self.vec_env.single_observation_space['stats'].shape)
+        self.assertEqual(observations['action_mask'].shape, (2, 60))
+        for idx, env in enumerate(self.vec_env.envs):
+            self.assertTrue(np.shares_memory(observations['draftboard'], env.observations.buffers['draftboard']))
+            np.testing.assert_array_equal(observations['roster'][idx], env.get_observation()['roster'])
+        self.assertIs(self.vec_env.envs[0].store, self.vec_env.envs[1].store)
+
+    def test_step(self):
+        observations = self.vec_env.reset()
+        actions = self._legal_actions(observations)
+        observations, rewards, dones = self.vec_env.step(actions)
+        np.testing.assert_array_equal(rewards, [0, 0])
+        np.testing.assert_array_equal(dones, [False, False])
+        for idx, env in enumerate(self.vec_env.envs):
+            self.assertEqual(sum(env.team.posFreqMap.values()), 1)
+            # the drafted player is no longer a candidate
+            self.assertNotIn(actions[idx], observations['draftboard'][idx, :, draftboard_name_column])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+from datasetStore import DatasetStore
+from vocabulary import Vocabulary, missing_label
+
+
+class TestVocabulary(unittest.TestCase):
+
+    def setUp(self):
+        script_dir = os.path.dirname(__file__)
+        data_dir = os.path.join(script_dir, '..', 'data')
+        self.store = DatasetStore(data_dir)
+
+    def test_from_values(self):
+        vocabulary = Vocabulary.from_values(['WR', 'QB', 'WR'], ['FB', 'QB'])
+        self.assertEqual(list(vocabulary.labels), ['QB', 'WR', 'FB'])
+        self.assertEqual(vocabulary.code('FB'), 2)
+        self.assertEqual(vocabulary.label(1), 'WR')
+        np.testing.assert_array_equal(vocabulary.encode(['FB', 'QB']), [2, 0])
+        np.testing.assert_array_equal(vocabulary.decode([1, 0]), ['WR', 'QB'])
+
+    def test_missing_values(self):
+        vocabulary = Vocabulary.from_values(pd.Series(['ACT', None, 'INA'], dtype='string'))
+        self.assertIn(missing_label, vocabulary)
+        np.testing.assert_array_equal(vocabulary.encode(pd.Series([np.nan, 'INA'])), [0, 2])
+
+    def test_unknown_label(self):
+        vocabulary = Vocabulary.from_values(['QB'])
+        with self.assertRaises(ValueError):
+            vocabulary.encode(['QB', 'P'])
+        with self.assertRaises(KeyError):
+            vocabulary.code('P')
+
+    def test_board_codes_match_label_encoder(self):
+        vocabularies = self.store.vocabularies('ppr-adp-2023-updated.csv', 'weekly-stats-2022.csv')
+        self.assertIs(vocabularies, self.store.vocabularies('ppr-adp-2023-updated.csv', 'weekly-stats-2022.csv'))
+        board = self.store.read_csv('ppr-adp-2023-updated.csv')
+        for col in ['Name', 'Position', 'Team']:
+            expected = LabelEncoder().fit_transform(board[col].astype(str))
+            np.testing.assert_array_equal(vocabularies[col].encode(board[col]), expected)
+        self.assertEqual(len(vocabularies['Name']), board['Name'].nunique())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,84 +1,167 @@
 from fantasyenv import FantasyFootballEnv
 from fantasyDeepQNetwork import Agent
-from collections import deque
-import random
+from observationBuilder import copy_observation
+from vectorEnv import VectorEnv
+from replayBuffer import ReplayBuffer, CompactReplayBuffer, PrioritizedReplayBuffer
+from replayStore import MemmapReplayStore
+from checkpoint import Checkpointer
+import telemetry
+import events
 import os
 import numpy as np
 
-class ReplayBuffer:
-    def __init__(self, max_size):
-        self.buffer = deque(maxlen=max_size)
+def make_replay_buffer(buffer_size, observation_space, observations, compact_replay=False, prioritized_replay=False,
+                       replay_dir=None):
+    '''
+    compact_replay stores observations as candidate ids (CompactReplayBuffer) instead of full arrays,
+    prioritized_replay samples by TD error (PrioritizedReplayBuffer).
+    replay_dir keeps the transitions on disk (MemmapReplayStore) and resumes the store found there.
+    '''
+    if compact_replay and prioritized_replay:
+        raise ValueError('compact_replay and prioritized_replay cannot be combined')
+    if replay_dir is not None:
+        if prioritized_replay:
+            raise ValueError('prioritized_replay is not supported by the disk replay store')
+        return MemmapReplayStore(replay_dir, observation_space, buffer_size,
+                                 observations=observations if compact_replay else None)
+    if compact_replay:
+        return CompactReplayBuffer(buffer_size, observations)
+    if prioritized_replay:
+        return PrioritizedReplayBuffer(buffer_size, observation_space)
+    return ReplayBuffer(buffer_size, observation_space)
 
-    def add(self, experience):
-        self.buffer.append(experience)
+def train_agent(env: FantasyFootballEnv, agent: Agent, num_episodes, batch_size, update_frequency, buffer_size=10000,
+                compact_replay=False, prioritized_replay=False, replay_dir=None, checkpoint_dir=None, checkpoint_every=100, event_sink=None):
+    '''
+    checkpoint_dir saves the run every checkpoint_every episodes (see Checkpointer) and resumes from
+    the latest checkpoint found there. Simulator events (see events) go to event_sink, by default they are dropped.
+    '''
+    replay_buffer = make_replay_buffer(buffer_size, env.observation_space, env.observations, compact_replay, prioritized_replay,
+                                       replay_dir)
+    scores = []
+    start_episode = 0
+    checkpointer = Checkpointer(checkpoint_dir) if checkpoint_dir is not None else None
+    if checkpointer is not None:
+        counters = checkpointer.load(agent, replay_buffer)
+        if counters is not None:
+            start_episode = counters['episode']
+            scores = counters['scores']
+
+    with events.use_sink(event_sink if event_sink is not None else events.NullSink()):
+        for episode in range(start_episode, num_episodes):
+            print(f'episode {episode}')
+            if episode > start_episode:
+                env.reset()
+            done = False
+            score = 0
+            env._run_draft() # state is updated in run draft
 
-    def sample(self, batch_size):
-        return random.sample(self.buffer, batch_size)
+            while not done:
+                # observation buffers are reused by the env, step overwrites them
+                observations = copy_observation(env.get_observation()) # observations depends on current state
+                stored_observations = env.observations.compact() if compact_replay else observations
+                action = agent.choose_action(observations)
+                next_observation, reward, done = env.step(action)
+                if compact_replay:
+                    next_observation = env.observations.compact()
+                replay_buffer.add(stored_observations, action, reward, next_observation, done)
+                score += reward
+                telemetry.count('steps')
 
-    def size(self):
-        return len(self.buffer)
+                if env.current_step % update_frequency == 0 and replay_buffer.size() >= batch_size:
+                    print('We are learning')
+                    batch = replay_buffer.sample(batch_size)
+                    td_errors = agent.learn(batch)
+                    if prioritized_replay:
+                        replay_buffer.update_priorities(batch['indices'], td_errors)
 
-def train_agent(env: FantasyFootballEnv, agent: Agent, num_episodes, batch_size, update_frequency):
-    replay_buffer = ReplayBuffer(max_size=10000)
+            if replay_dir is not None:
+                replay_buffer.flush()
+            scores.append(score)
+            telemetry.count('episodes')
+            print(f'Episode {episode}, Score: {score}, Epsilon: {agent.epsilon}')
+            if checkpointer is not None and (episode + 1) % checkpoint_every == 0:
+                checkpointer.save(agent, replay_buffer, {'episode': episode + 1, 'scores': [float(s) for s in scores]})
+    
+    return scores
+
+def train_agent_vectorized(vec_env: VectorEnv, agent: Agent, num_episodes, batch_size, update_frequency, buffer_size=10000,
+                           compact_replay=False, prioritized_replay=False, replay_dir=None, event_sink=None):
+    '''
+    Trains on vec_env.num_envs leagues at once until num_episodes leagues have finished.
+    Simulator events (see events) go to event_sink, by default they are dropped.
+    '''
+    # every league shares the board and feature store layout, the first league rebuilds compact samples
+    replay_buffer = make_replay_buffer(buffer_size, vec_env.single_observation_space, vec_env.envs[0].observations,
+                                       compact_replay, prioritized_replay, replay_dir)
     scores = []
+    league_scores = np.zeros(vec_env.num_envs)
+    step = 0
+
+    with events.use_sink(event_sink if event_sink is not None else events.NullSink()):
+        observations = copy_observation(vec_env.reset())
+        stored_observations = vec_env.compact_observations() if compact_replay else observations
+        while len(scores) < num_episodes:
+            actions = agent.choose_actions(observations)
+            next_observations, rewards, dones = vec_env.step(actions)
+            next_stored = vec_env.compact_observations() if compact_replay else next_observations
+            replay_buffer.add_batch(stored_observations, actions, rewards, next_stored, dones)
+            next_observations = copy_observation(next_observations)
+            stored_observations = next_stored if compact_replay else next_observations
+            league_scores += rewards
+            telemetry.count('steps', vec_env.num_envs)
+            telemetry.count('episodes', int(dones.sum()))
+            step += 1
+
+            if replay_dir is not None and dones.any():
+                replay_buffer.flush()
+            for idx in np.flatnonzero(dones):
+                scores.append(league_scores[idx])
+                print(f'Episode {len(scores) - 1}, Score: {league_scores[idx]}, Epsilon: {agent.epsilon}')
+                league_scores[idx] = 0
 
-    for episode in range(num_episodes):
-        print(f'episode {episode}')
-        if episode > 0:
-            env.reset()
-        done = False
-        score = 0
-        env._run_draft() # state is updated in run draft
-
-        while not done:
-            observations = env.get_observation() # observations depends on current state
-            action = agent.choose_action(observations)
-            next_observation, reward, done = env.step(action)
-            replay_buffer.add((observations, action, reward, next_observation, done))
-            score += reward
-
-            if env.current_step % update_frequency == 0 and replay_buffer.size() >= batch_size:
-                print('We are learning')
+            if step % update_frequency == 0 and replay_buffer.size() >= batch_size:
                 batch = replay_buffer.sample(batch_size)
-                agent.learn(batch)
+                td_errors = agent.learn(batch)
+                if prioritized_replay:
+                    replay_buffer.update_priorities(batch['indices'], td_errors)
+            observations = next_observations
 
-        scores.append(score)
-        print(f'Episode {episode}, Score: {score}, Epsilon: {agent.epsilon}')
-    
     return scores
 
-np.random.seed(42)
-# Define hyperparameters
-num_episodes = 10
-batch_size = 16
-learning_rate = 0.001
-gamma = 0.99
-epsilon = 1.0
-eps_min = 0.01
-eps_dec = 1e-5
-update_frequency = 4
-
-script_dir = os.path.dirname(os.path.abspath(''))
-proj_dir = os.path.join(script_dir, 'fantasy')
-data_dir = os.path.join(proj_dir, 'data')
-board_path = os.path.join(data_dir, 'ppr-adp-2023-updated.csv')
-weekly_stats_path = os.path.join(data_dir, 'weekly-stats-2022.csv')
-weekly_info_path = os.path.join(data_dir, 'simulator-weekly-info-2023.csv')
-
-# Initialize environment and agent
-env = FantasyFootballEnv(board_path, weekly_stats_path, weekly_info_path)
-stats_dims = env.observation_space['stats'].shape
-board_dims = env.observation_space['draftboard'].shape
-roster_dims = env.observation_space['roster'].shape
-n_actions = env.action_space.n
-# print(f'stats dims are: {stats_dims}')
-# print(f'board dims are: {board_dims}')
-# print(f'roster dims are: {roster_dims}')
-# print(f'number of actions {n_actions}')
-
-agent = Agent(stats_dims, board_dims, roster_dims, n_actions, learning_rate, gamma, epsilon, eps_dec, eps_min)
-
-# Train the agent
-scores = train_agent(env, agent, num_episodes, batch_size, update_frequency)
-
-# Plot scores or perform further analysis
+if __name__ == '__main__':
+    np.random.seed(42)
+    # Define hyperparameters
+    num_episodes = 10
+    batch_size = 16
+    learning_rate = 0.001
+    gamma = 0.99
+    epsilon = 1.0
+    eps_min = 0.01
+    eps_dec = 1e-5
+    update_frequency = 4
+
+    script_dir = os.path.dirname(os.path.abspath(''))
+    proj_dir = os.path.join(script_dir, 'fantasy')
+    data_dir = os.path.join(proj_dir, 'data')
+    board_path = os.path.join(data_dir, 'ppr-adp-2023-updated.csv')
+    weekly_stats_path = os.path.join(data_dir, 'weekly-stats-2022.csv')
+    weekly_info_path = os.path.join(data_dir, 'simulator-weekly-info-2023.csv')
+
+    # Initialize environment and agent
+    env = FantasyFootballEnv(board_path, weekly_stats_path, weekly_info_path)
+    stats_dims = env.observation_space['stats'].shape
+    board_dims = env.observation_space['draftboard'].shape
+    roster_dims = env.observation_space['roster'].shape
+    n_actions = env.action_space.n
+    # print(f'stats dims are: {stats_dims}')
+    # print(f'board dims are: {board_dims}')
+    # print(f'roster dims are: {roster_dims}')
+    # print(f'number of actions {n_actions}')
+
+    agent = Agent(stats_dims, board_dims, roster_dims, n_actions, learning_rate, gamma, epsilon, eps_dec, eps_min)
+
+    # Train the agent
+    scores = train_agent(env, agent, num_episodes, batch_size, update_frequency)
+
+    # Plot scores or perform further analysis
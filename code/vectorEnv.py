@@ -0,0 +1,76 @@
+import os
+import numpy as np
+from typing import Optional
+from datasetStore import DatasetStore
+from fantasyenv import FantasyFootballEnv
+
+
+class VectorEnv:
+    '''
+    Runs num_envs independent FantasyFootballEnv leagues in lockstep.
+    Every league writes its observation into row i of stacked arrays shared by all leagues, so a
+    single forward pass of the network covers every league. The leagues share one DatasetStore,
+    so vocabularies and data files are only loaded once.
+    A league that finishes its season is reset right away and its row then holds the first
+    observation of its next draft.
+    '''
+
+    def __init__(self, num_envs: int, board_path, weekly_stats_path, weekly_info_path,
+                 store: Optional[DatasetStore] = None, observation_tensors: bool = False):
+        self.num_envs = num_envs
+        self.store = store if store is not None else DatasetStore(os.path.dirname(board_path))
+        self.envs = [FantasyFootballEnv(board_path, weekly_stats_path, weekly_info_path, store=self.store)
+                     for _ in range(num_envs)]
+        self.single_observation_space = self.envs[0].observation_space
+        self.single_action_space = self.envs[0].action_space
+
+        self.buffers = {key: np.empty((num_envs,) + buf.shape, dtype=buf.dtype)
+                        for key, buf in self.envs[0].observations.buffers.items()}
+        for idx, env in enumerate(self.envs):
+            env.observations.use_buffers({key: buf[idx] for key, buf in self.buffers.items()})
+
+        if observation_tensors:
+            import torch
+            self._views = {key: torch.from_numpy(buf) for key, buf in self.buffers.items()}
+        else:
+            self._views = self.buffers
+
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.episodes = np.zeros(num_envs, dtype=np.int64)
+
+    def _start_draft(self, env: FantasyFootballEnv):
+        '''
+        Runs the bot picks up to the agent's first pick and writes the observation.
+        '''
+        env._run_draft()
+        env.get_observation()
+
+    def reset(self) -> dict:
+        for env in self.envs:
+            env.reset()
+            self._start_draft(env)
+        self.episodes.fill(0)
+        return dict(self._views)
+
+    def step(self, actions):
+        '''
+        Applies one action per league. Returns the stacked observations and copies of the
+        reward and done arrays; the buffers behind the observations are reused by the next step.
+        '''
+        for idx, env in enumerate(self.envs):
+            _, reward, done = env.step(int(actions[idx]))
+            self.rewards[idx] = reward
+            self.dones[idx] = done
+            if done:
+                self.episodes[idx] += 1
+                env.reset()
+                self._start_draft(env)
+        return dict(self._views), self.rewards.copy(), self.dones.copy()
+
+    def compact_observations(self) -> dict:
+        '''
+        Returns the compact form of the current observations (see ObservationBuilder.compact) stacked by league.
+        '''
+        compact = [env.observations.compact() for env in self.envs]
+        return {key: np.stack([obs[key] for obs in compact]) for key in compact[0]}
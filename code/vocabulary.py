@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# label of missing values, matches str() of pandas' NA in the string columns of the draftboard
+missing_label = '<NA>'
+
+
+def as_labels(values) -> np.ndarray:
+    '''
+    Converts values to the string labels stored in vocabularies.
+    '''
+    return pd.Series(values).astype('string').fillna(missing_label).to_numpy(dtype=object)
+
+
+class Vocabulary:
+    '''
+    Fixed mapping between the labels of a categorical column and dense int codes.
+    '''
+
+    def __init__(self, labels):
+        self.labels = np.asarray(labels, dtype=object)
+        self._codes = {label: code for code, label in enumerate(self.labels)}
+        self._index = pd.Index(self.labels)
+
+    @classmethod
+    def from_values(cls, *values):
+        '''
+        Builds a vocabulary whose first codes are the sorted labels of the first values, so they
+        match a LabelEncoder fit on them. Labels only found in later values are appended sorted.
+        '''
+        labels = []
+        for vals in values:
+            labels.extend(sorted(set(as_labels(vals)) - set(labels)))
+        return cls(labels)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, label) -> bool:
+        return label in self._codes
+
+    def code(self, label: str) -> int:
+        return self._codes[label]
+
+    def label(self, code: int) -> str:
+        return self.labels[code]
+
+    def encode(self, values) -> np.ndarray:
+        codes = self._index.get_indexer(as_labels(values))
+        if (codes < 0).any():
+            unknown = sorted(set(as_labels(values)) - set(self._codes))
+            raise ValueError(f"Labels not in vocabulary: {unknown[:10]}")
+        return codes
+
+    def decode(self, codes) -> np.ndarray:
+        return self.labels[np.asarray(codes)]
+
+
+def build_vocabularies(board: pd.DataFrame, stats: pd.DataFrame) -> dict:
+    '''
+    Builds the vocabularies of the categorical draftboard and weekly stats columns.
+    Name codes of draftboard players come first so every action index is below the board size.
+    '''
+    # boards without a Status column are drafted with every player active
+    status = board['Status'] if 'Status' in board.columns else pd.Series(['ACT'])
+    return {
+        'Name': Vocabulary.from_values(board['Name'], stats['player_display_name']),
+        'Position': Vocabulary.from_values(board['Position'], stats['position']),
+        'Team': Vocabulary.from_values(board['Team'], stats['recent_team']),
+        'Status': Vocabulary.from_values(status),
+        'season_type': Vocabulary.from_values(stats['season_type']),
+        'opponent_team': Vocabulary.from_values(stats['opponent_team'])
+    }
@@ -1,6 +1,7 @@
 import pandas as pd
 from fantasyTeam import Team
 from typing import Optional
+from events import emit, WaiverTransaction
 
 positions = ['QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'K', 'DST']
 offense_positions = ['QB', 'RB1', 'WR1', 'TE']
@@ -376,6 +377,7 @@ class WaiverWireSimulator():
         avgadp = addPlayer['AverageDraftPositionPPR'].values[0]
         proj = addPlayer['ProjectedFantasyPoints'].values[0]
         pts = addPlayer['FantasyPoints'].values[0]
+        dropPlayerName = dropPlayer['Name'].values[0] if dropPlayer is not None and not dropPlayer.empty else None
         # case where DST and Kickers are being streamed
         if position == 'K':
             if team.streamK:
@@ -391,6 +393,7 @@ class WaiverWireSimulator():
                     new_values = [playerName, position, 0, avgadp, playerTeam, byeWeek, ppg, status, proj, pts]
                     team.roster.loc[idx, ['Name', 'Position', 'PickNumber', 'AverageDraftPositionPPR', 'Team', 'ByeWeek', 'PointsPerGame', 'Status', 'ProjectedFantasyPoints', 'FantasyPoints']] = new_values
                     self.removePlayerFromWaiverWire(addPlayer)
+                    emit(WaiverTransaction, self.week, team.name, playerName, rostered['Name'].values[0], position)
             else:
                 rostered = team.roster[team.roster['FantasyPosition'] == 'K']
                 if not rostered.empty:
@@ -403,7 +406,6 @@ class WaiverWireSimulator():
                     # drop proposed player
                     if dropPlayer is not None and not dropPlayer.empty:
                         # print(f'roster before player drop\n {team.roster}')
-                        dropPlayerName = dropPlayer['Name'].values[0]
                         team.dropPlayer(dropPlayerName)
                         self.addPlayerToWaiverWire(dropPlayer)
                         # print(f'roster after player drop\n {team.roster}')
@@ -412,6 +414,7 @@ class WaiverWireSimulator():
                         # print(f'adding player {playerName} to team roster')
                         team.addToBench(playerName, position, 0, avgadp, playerTeam, byeWeek, ppg, status, proj, pts)
                         self.removePlayerFromWaiverWire(addPlayer)
+                        emit(WaiverTransaction, self.week, team.name, playerName, dropPlayerName, position)
 
         elif position == 'DST':
             if team.streamDST:
@@ -427,6 +430,7 @@ class WaiverWireSimulator():
                     new_values = [playerName, position, 0, avgadp, playerTeam, byeWeek, ppg, status, proj, pts]
                     team.roster.loc[idx, ['Name', 'Position', 'PickNumber', 'AverageDraftPositionPPR', 'Team', 'ByeWeek', 'PointsPerGame', 'Status', 'ProjectedFantasyPoints', 'FantasyPoints']] = new_values
                     self.removePlayerFromWaiverWire(addPlayer)
+                    emit(WaiverTransaction, self.week, team.name, playerName, rostered['Name'].values[0], position)
             else:
                 rostered = team.roster[team.roster['FantasyPosition'] == 'DST']
                 if not rostered.empty:
@@ -438,23 +442,23 @@ class WaiverWireSimulator():
                     # print(f'{team.name}, week {self.week}')
                     if dropPlayer is not None and not dropPlayer.empty:
                         # print(f'roster before player drop\n {team.roster}')
-                        dropPlayerName = dropPlayer['Name'].values[0]
                         team.dropPlayer(dropPlayerName)
                         self.addPlayerToWaiverWire(dropPlayer)
                         # print(f'roster after player drop\n {team.roster}')
                     if not team.isBenchFull():
                         team.addToBench(playerName, position, 0, avgadp, playerTeam, byeWeek, ppg, status, proj, pts)
                         self.removePlayerFromWaiverWire(addPlayer)
+                        emit(WaiverTransaction, self.week, team.name, playerName, dropPlayerName, position)
         else:
             # add drop based on pair
             # print(f'executing waiver wire trade')
             # print(f'{team.name}, week {self.week}')
             if dropPlayer is not None and not dropPlayer.empty:
                 # print(f'roster before player drop\n {team.roster}')
-                dropPlayerName = dropPlayer['Name'].values[0]
                 team.dropPlayer(dropPlayerName)
                 self.addPlayerToWaiverWire(dropPlayer)
             if not team.isBenchFull():
                 team.addToBench(playerName, position, 0, avgadp, playerTeam, byeWeek, ppg, status, proj, pts)
                 self.removePlayerFromWaiverWire(addPlayer)
+                emit(WaiverTransaction, self.week, team.name, playerName, dropPlayerName, position)
         self._sortWaiverWire
\ No newline at end of file